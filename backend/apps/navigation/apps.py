@@ -5,3 +5,6 @@ class NavigationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.navigation'
     verbose_name = 'Navigation'
+
+    def ready(self):
+        from apps.navigation import signals  # noqa: F401
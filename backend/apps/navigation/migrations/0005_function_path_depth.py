@@ -0,0 +1,42 @@
+from django.db import migrations, models
+
+
+def populate_paths(apps, schema_editor):
+    """Compute the materialized path and depth of every existing function"""
+    Function = apps.get_model('navigation', 'Function')
+    parents = dict(Function.objects.values_list('id', 'parent_id'))
+    paths = {}
+
+    def path_for(function_id):
+        if function_id not in paths:
+            parent_id = parents[function_id]
+            prefix = path_for(parent_id) if parent_id else '/'
+            paths[function_id] = f"{prefix}{function_id}/"
+        return paths[function_id]
+
+    functions = list(Function.objects.all())
+    for function in functions:
+        function.path = path_for(function.id)
+        function.depth = function.path.count('/') - 2
+    Function.objects.bulk_update(functions, ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('navigation', '0004_function_cerbos_resource_function_is_system_category_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='function',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, help_text='Ruta materializada de IDs desde la raíz (mantenida automáticamente)', max_length=255, verbose_name='Ruta'),
+        ),
+        migrations.AddField(
+            model_name='function',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Nivel en el árbol (0 = raíz)', verbose_name='Profundidad'),
+        ),
+        migrations.RunPython(populate_paths, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,8 @@
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
+
+PATH_SEPARATOR = '/'
 
 
 class Function(models.Model):
@@ -62,6 +66,22 @@ class Function(models.Model):
         verbose_name='Función padre',
         help_text='Función padre para crear submenús'
     )
+    # Materialized path: IDs from the root down to this function, e.g. "/1/4/9/"
+    path = models.CharField(
+        max_length=255,
+        default='',
+        editable=False,
+        db_index=True,
+        verbose_name='Ruta',
+        help_text='Ruta materializada de IDs desde la raíz (mantenida automáticamente)'
+    )
+    depth = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Profundidad',
+        help_text='Nivel en el árbol (0 = raíz)'
+    )
+
     order = models.IntegerField(
         default=0,
         verbose_name='Orden',
@@ -95,8 +115,65 @@ class Function(models.Model):
     def __str__(self):
         return f"{self.name} ({self.code})"
 
-    def get_full_path(self):
-        """Retorna el path completo incluyendo padres"""
-        if self.parent:
-            return f"{self.parent.get_full_path()} > {self.name}"
-        return self.name
+    def save(self, *args, **kwargs):
+        """
+        Keep the materialized path in sync with the parent.
+        Moving a function rewrites the paths of its whole subtree in one UPDATE.
+        """
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'parent' not in update_fields:
+            return super().save(*args, **kwargs)
+
+        parent_path = self.parent.path if self.parent_id else PATH_SEPARATOR
+        if self.pk and self.path and parent_path.startswith(self.path):
+            raise ValueError('Una función no puede ser descendiente de sí misma')
+
+        super().save(*args, **kwargs)
+
+        new_path = f"{parent_path}{self.pk}{PATH_SEPARATOR}"
+        if new_path == self.path:
+            return
+
+        new_depth = new_path.count(PATH_SEPARATOR) - 2
+        if self.path:
+            # Moved: rewrite this function and all its descendants
+            Function.objects.filter(path__startswith=self.path).update(
+                path=Concat(Value(new_path), Substr('path', len(self.path) + 1)),
+                depth=F('depth') + (new_depth - self.depth)
+            )
+        else:
+            Function.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+
+        self.path = new_path
+        self.depth = new_depth
+
+    @property
+    def ancestor_ids(self):
+        """IDs of the ancestors, from the root down to the parent"""
+        parts = self.path.strip(PATH_SEPARATOR).split(PATH_SEPARATOR)[:-1]
+        return [int(part) for part in parts if part]
+
+    def is_descendant_of(self, other):
+        """O(1) check using the materialized paths"""
+        return self.pk != other.pk and bool(other.path) and self.path.startswith(other.path)
+
+    def get_descendants(self):
+        """All descendants in a single query"""
+        return Function.objects.filter(path__startswith=self.path).exclude(pk=self.pk)
+
+    def get_full_path(self, names=None):
+        """
+        Retorna el path completo incluyendo padres.
+
+        Args:
+            names: optional {id: name} map with the ancestors' names already loaded
+        """
+        ancestor_ids = self.ancestor_ids
+        if not ancestor_ids:
+            return self.name
+
+        if names is None or not all(ancestor_id in names for ancestor_id in ancestor_ids):
+            names = dict(Function.objects.filter(id__in=ancestor_ids).values_list('id', 'name'))
+
+        parts = [names[ancestor_id] for ancestor_id in ancestor_ids if ancestor_id in names]
+        return ' > '.join(parts + [self.name])
@@ -31,7 +31,9 @@ class CategorySerializer(serializers.ModelSerializer):
 
     def get_active_functions_count(self, obj):
         """Get number of active functions in this category"""
-        return obj.get_active_functions_count()
+        # Annotated by CategoryViewSet.get_queryset; query only for single instances
+        count = getattr(obj, 'active_functions_count', None)
+        return count if count is not None else obj.get_active_functions_count()
 
 
 class CategoryListSerializer(serializers.ModelSerializer):
@@ -57,7 +59,9 @@ class CategoryListSerializer(serializers.ModelSerializer):
 
     def get_active_functions_count(self, obj):
         """Get number of active functions in this category"""
-        return obj.get_active_functions_count()
+        # Annotated by CategoryViewSet.get_queryset; query only for single instances
+        count = getattr(obj, 'active_functions_count', None)
+        return count if count is not None else obj.get_active_functions_count()
 
 
 class CategoryCreateUpdateSerializer(serializers.ModelSerializer):
@@ -37,6 +37,14 @@ class FunctionSerializer(serializers.ModelSerializer):
 
     def get_children(self, obj):
         """Get children functions recursively"""
+        # Whole tree loaded in one query by the caller ({parent_id: [children]})
+        function_children = self.context.get('function_children')
+        if function_children is not None:
+            serializer = FunctionSerializer(
+                function_children.get(obj.id, []), many=True, context=self.context
+            )
+            return serializer.data
+
         children = obj.children.filter(is_active=True).order_by('order', 'name')
         # Prevent infinite recursion by limiting depth
         if hasattr(self, '_depth'):
@@ -51,13 +59,31 @@ class FunctionSerializer(serializers.ModelSerializer):
         return serializer.data
 
 
+class FunctionPathListSerializer(serializers.ListSerializer):
+    """
+    Loads the names of every ancestor of the listed functions in one query,
+    so full_path does not cost a query per row.
+    """
+
+    def to_representation(self, data):
+        functions = list(data.all() if hasattr(data, 'all') else data)
+        ancestor_ids = {
+            ancestor_id for function in functions for ancestor_id in function.ancestor_ids
+        }
+        names = {}
+        if ancestor_ids:
+            names = dict(Function.objects.filter(id__in=ancestor_ids).values_list('id', 'name'))
+        self.child.function_names = names
+        return super().to_representation(functions)
+
+
 class FunctionListSerializer(serializers.ModelSerializer):
     """
     Simplified serializer for listing functions without nested children
     """
     parent_name = serializers.CharField(source='parent.name', read_only=True, allow_null=True)
     category_name = serializers.CharField(source='category.name', read_only=True, allow_null=True)
-    full_path = serializers.CharField(source='get_full_path', read_only=True)
+    full_path = serializers.SerializerMethodField()
 
     class Meta:
         model = Function
@@ -80,6 +106,11 @@ class FunctionListSerializer(serializers.ModelSerializer):
             'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'parent_name', 'category_name', 'full_path']
+        list_serializer_class = FunctionPathListSerializer
+
+    def get_full_path(self, obj):
+        """Full path including parents (ancestor names preloaded by the list serializer)"""
+        return obj.get_full_path(names=getattr(self, 'function_names', None))
 
 
 class FunctionCreateUpdateSerializer(serializers.ModelSerializer):
@@ -108,14 +139,12 @@ class FunctionCreateUpdateSerializer(serializers.ModelSerializer):
     def validate_parent(self, value):
         """Prevent circular references"""
         if value and self.instance:
-            # Check if the new parent is a descendant of this function
-            current = value
-            while current:
-                if current.id == self.instance.id:
-                    raise serializers.ValidationError(
-                        "No se puede establecer como padre a un descendiente de esta función"
-                    )
-                current = current.parent
+            # Check if the new parent is this function or one of its descendants
+            # (materialized path)
+            if value.pk == self.instance.pk or value.is_descendant_of(self.instance):
+                raise serializers.ValidationError(
+                    "No se puede establecer como padre a un descendiente de esta función"
+                )
         return value
 
     def validate_code(self, value):
@@ -0,0 +1,6 @@
+from .menu import build_menu, get_menu_for_roles
+from .versioning import get_navigation_version, bump_navigation_version
+from .ordering import bulk_reorder
+
+__all__ = ['build_menu', 'get_menu_for_roles', 'get_navigation_version', 'bump_navigation_version',
+           'bulk_reorder']
@@ -0,0 +1,123 @@
+"""
+Dynamic menu service
+Builds the sidebar menu for a set of roles and caches the rendered result.
+
+Most users share a handful of role combinations, so the menu is cached per
+sorted set of role IDs. Every entry stores the navigation version it was
+built for; any navigation write bumps the version and invalidates all cached
+menus at once.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .versioning import NAVIGATION_VERSION_KEY, get_navigation_version
+
+MENU_KEY_PREFIX = 'navigation:menu:roles'
+
+
+def _menu_cache_key(role_ids: List[int]) -> str:
+    return f"{MENU_KEY_PREFIX}:{'-'.join(str(role_id) for role_id in role_ids) or 'none'}"
+
+
+def build_menu(role_ids: Iterable[int]) -> List[Dict[str, Any]]:
+    """
+    Build the menu for the given roles with a single query.
+    Functions are grouped by categories (collapsible sections); functions
+    without a category are root level items.
+    """
+    # Import here to avoid circular imports
+    from apps.navigation.models import Function
+
+    role_ids = list(role_ids)
+    if not role_ids:
+        return []
+
+    # All unique active functions of the roles, with their category
+    all_functions = list(
+        Function.objects.filter(roles__id__in=role_ids, is_active=True)
+        .select_related('category')
+        .distinct()
+    )
+
+    menu = []
+
+    # 1. Add functions WITHOUT category first (root level items like "Mi Perfil")
+    root_functions = [f for f in all_functions if not f.category_id]
+    root_functions.sort(key=lambda f: (f.order, f.name))
+
+    for func in root_functions:
+        menu.append({
+            'id': func.id,
+            'name': func.name,
+            'code': func.code,
+            'url': func.url,
+            'icon': func.icon,
+            'order': func.order,
+        })
+
+    # 2. Add active categories with their functions as children
+    categories = {}
+    for func in all_functions:
+        if func.category_id and func.category.is_active:
+            categories.setdefault(func.category_id, (func.category, []))[1].append(func)
+
+    for category, category_functions in sorted(
+        categories.values(), key=lambda item: (item[0].order, item[0].name)
+    ):
+        category_functions.sort(key=lambda f: (f.order, f.name))
+        menu.append({
+            'id': f'cat_{category.id}',
+            'name': category.name,
+            'code': category.code,
+            'icon': category.icon,
+            'color': category.color,
+            'order': category.order,
+            'is_category': True,
+            'children': [
+                {
+                    'id': f.id,
+                    'name': f.name,
+                    'code': f.code,
+                    'url': f.url,
+                    'icon': f.icon,
+                    'order': f.order,
+                }
+                for f in category_functions
+            ]
+        })
+
+    # Sort final menu by order
+    menu.sort(key=lambda x: x['order'])
+
+    return menu
+
+
+def get_menu_for_roles(role_ids: Iterable[int], version: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Return the menu for a set of roles, from cache when possible.
+    A cache hit costs a single cache round trip and no database queries.
+
+    Args:
+        role_ids: IDs of the user's active roles
+        version: navigation version, if the caller already read it
+    """
+    role_ids = sorted(set(role_ids))
+    key = _menu_cache_key(role_ids)
+
+    if version is None:
+        cached = cache.get_many([NAVIGATION_VERSION_KEY, key])
+        version = cached.get(NAVIGATION_VERSION_KEY)
+        if version is None:
+            version = get_navigation_version()
+        entry = cached.get(key)
+    else:
+        entry = cache.get(key)
+
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    menu = build_menu(role_ids)
+    cache.set(key, (version, menu), settings.NAVIGATION_MENU_CACHE_TIMEOUT)
+    return menu
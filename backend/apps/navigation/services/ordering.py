@@ -0,0 +1,49 @@
+"""
+Bulk reordering of navigation items
+Validates every ID with one query and writes all new orders in one UPDATE.
+"""
+from typing import Any, Dict, List
+
+from django.db import transaction
+
+from .versioning import bump_navigation_version
+
+
+def bulk_reorder(model, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Apply {"id", "order"} pairs to a model with an `order` field.
+
+    Entries without a valid integer id/order are skipped, and only rows whose
+    order actually changes are written and counted in updated_count.
+    bulk_update does not send post_save, so the navigation version is bumped
+    here, once.
+
+    Returns:
+        Dict: {'updated_count': int, 'missing_ids': [...], 'invalid_count': int}
+    """
+    orders = {}
+    invalid_count = 0
+    for item in items:
+        try:
+            orders[int(item['id'])] = int(item['order'])
+        except (KeyError, TypeError, ValueError):
+            invalid_count += 1
+
+    with transaction.atomic():
+        instances = model.objects.select_for_update().in_bulk(list(orders))
+        changed = []
+        for pk, instance in instances.items():
+            if instance.order != orders[pk]:
+                instance.order = orders[pk]
+                changed.append(instance)
+        if changed:
+            model.objects.bulk_update(changed, ['order'], batch_size=500)
+
+    if changed:
+        bump_navigation_version()
+
+    return {
+        'updated_count': len(changed),
+        'missing_ids': sorted(pk for pk in orders if pk not in instances),
+        'invalid_count': invalid_count,
+    }
@@ -0,0 +1,32 @@
+"""
+Navigation version counter
+A single number that changes on any write to functions, categories, roles
+or role assignments. Cached menus and ETags of navigation reads derive from it.
+"""
+import time
+
+from django.core.cache import cache
+
+NAVIGATION_VERSION_KEY = 'navigation:version'
+
+
+def _initial_version() -> int:
+    # Time based, so a lost counter (eviction, restart) never reuses an old value
+    return int(time.time() * 1000)
+
+
+def get_navigation_version() -> int:
+    """Current navigation version"""
+    version = cache.get(NAVIGATION_VERSION_KEY)
+    if version is None:
+        cache.add(NAVIGATION_VERSION_KEY, _initial_version(), None)
+        version = cache.get(NAVIGATION_VERSION_KEY)
+    return version
+
+
+def bump_navigation_version() -> None:
+    """Move to a new navigation version (invalidates cached menus and ETags)"""
+    try:
+        cache.incr(NAVIGATION_VERSION_KEY)
+    except ValueError:
+        cache.add(NAVIGATION_VERSION_KEY, _initial_version(), None)
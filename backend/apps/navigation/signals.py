@@ -0,0 +1,32 @@
+"""
+Signal handlers for the navigation app
+Bump the navigation version whenever data behind menus and navigation reads changes
+"""
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from apps.navigation.models import Category, Function
+from apps.navigation.services import bump_navigation_version
+from apps.permissions.models import Role, RoleAssignment
+from apps.permissions.signals import role_assignments_changed
+
+
+@receiver(post_save, sender=Function)
+@receiver(post_delete, sender=Function)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=RoleAssignment)
+@receiver(post_delete, sender=RoleAssignment)
+@receiver(role_assignments_changed)
+def navigation_changed(sender, **kwargs):
+    """Menus, permissions and navigation reads depend on this data"""
+    bump_navigation_version()
+
+
+@receiver(m2m_changed, sender=Role.functions.through)
+def role_functions_changed(sender, action, **kwargs):
+    """Functions were added to or removed from a role"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_navigation_version()
@@ -7,8 +7,11 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from django.db.models import Count, Q
 
+from common.utils.etag import conditional_response, make_etag
 from apps.navigation.models import Category
+from apps.navigation.services import bulk_reorder, get_navigation_version
 from apps.navigation.serializers import (
     CategorySerializer,
     CategoryListSerializer,
@@ -37,6 +40,11 @@ class CategoryViewSet(viewsets.ModelViewSet):
         if is_active is not None:
             queryset = queryset.filter(is_active=is_active.lower() == 'true')
 
+        # Active functions are counted in the same query instead of one COUNT(*) per row
+        queryset = queryset.annotate(
+            active_functions_count=Count('functions', filter=Q(functions__is_active=True))
+        )
+
         return queryset.order_by('order', 'name')
 
     def get_serializer_class(self):
@@ -60,8 +68,15 @@ class CategoryViewSet(viewsets.ModelViewSet):
         ]
     )
     def list(self, request, *args, **kwargs):
-        """GET /api/navigation/categories/ - List all categories"""
-        return super().list(request, *args, **kwargs)
+        """
+        GET /api/navigation/categories/ - List all categories
+        Supports If-None-Match: returns 304 while the navigation version is unchanged.
+        """
+        return conditional_response(
+            request,
+            make_etag('categories', get_navigation_version(), request.get_full_path()),
+            lambda: super(CategoryViewSet, self).list(request, *args, **kwargs)
+        )
 
     @swagger_auto_schema(
         tags=['Gestión de categorías'],
@@ -85,11 +100,10 @@ class CategoryViewSet(viewsets.ModelViewSet):
         POST /api/navigation/categories/ - Create a new category
         Requires Cerbos permission: category:create
         """
-        from apps.permissions.services.cerbos_client import cerbos_service
+        from apps.permissions.services.authorization_context import get_authorization_context
 
         # Check permission with Cerbos
-        if not cerbos_service.check_user_permission(
-            user=request.user,
+        if not get_authorization_context(request).check(
             resource_type='category',
             resource_id='new',
             action='create'
@@ -115,13 +129,12 @@ class CategoryViewSet(viewsets.ModelViewSet):
         PUT /api/navigation/categories/{id}/ - Update category
         Requires Cerbos permission: category:update
         """
-        from apps.permissions.services.cerbos_client import cerbos_service
+        from apps.permissions.services.authorization_context import get_authorization_context
 
         instance = self.get_object()
 
         # Check permission with Cerbos
-        if not cerbos_service.check_user_permission(
-            user=request.user,
+        if not get_authorization_context(request).check(
             resource_type='category',
             resource_id=str(instance.id),
             action='update'
@@ -161,7 +174,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
         System categories cannot be deleted.
         Requires Cerbos permission: category:delete
         """
-        from apps.permissions.services.cerbos_client import cerbos_service
+        from apps.permissions.services.authorization_context import get_authorization_context
 
         instance = self.get_object()
 
@@ -172,8 +185,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_403_FORBIDDEN)
 
         # Check permission with Cerbos
-        if not cerbos_service.check_user_permission(
-            user=request.user,
+        if not get_authorization_context(request).check(
             resource_type='category',
             resource_id=str(instance.id),
             action='delete'
@@ -203,7 +215,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
             }
         ),
         responses={
-            200: "Categorías reordenadas exitosamente",
+            200: "Categorías reordenadas exitosamente (incluye los IDs no encontrados)",
             400: "Datos inválidos"
         }
     )
@@ -222,25 +234,11 @@ class CategoryViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        updated_count = 0
-        for cat_data in categories_data:
-            cat_id = cat_data.get('id')
-            order = cat_data.get('order')
-
-            if cat_id is None or order is None:
-                continue
-
-            try:
-                category = Category.objects.get(id=cat_id)
-                category.order = order
-                category.save(update_fields=['order'])
-                updated_count += 1
-            except Category.DoesNotExist:
-                pass
+        result = bulk_reorder(Category, categories_data)
 
         return Response({
-            'message': f'{updated_count} categorías reordenadas exitosamente',
-            'updated_count': updated_count
+            'message': f"{result['updated_count']} categorías reordenadas exitosamente",
+            **result
         })
 
     @swagger_auto_schema(
@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -5,7 +7,9 @@ from rest_framework.permissions import IsAuthenticated
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+from common.utils.etag import conditional_response, make_etag
 from apps.navigation.models import Function
+from apps.navigation.services import bulk_reorder, get_navigation_version
 from apps.navigation.serializers import (
     FunctionSerializer,
     FunctionListSerializer,
@@ -93,11 +97,10 @@ class FunctionViewSet(viewsets.ModelViewSet):
         Create a new function.
         Requires Cerbos permission: function:create
         """
-        from apps.permissions.services.cerbos_client import cerbos_service
+        from apps.permissions.services.authorization_context import get_authorization_context
 
         # Check permission with Cerbos
-        if not cerbos_service.check_user_permission(
-            user=request.user,
+        if not get_authorization_context(request).check(
             resource_type='function',
             resource_id='new',
             action='create'
@@ -123,13 +126,12 @@ class FunctionViewSet(viewsets.ModelViewSet):
         Update a function.
         Requires Cerbos permission: function:update
         """
-        from apps.permissions.services.cerbos_client import cerbos_service
+        from apps.permissions.services.authorization_context import get_authorization_context
 
         instance = self.get_object()
 
         # Check permission with Cerbos
-        if not cerbos_service.check_user_permission(
-            user=request.user,
+        if not get_authorization_context(request).check(
             resource_type='function',
             resource_id=str(instance.id),
             action='update'
@@ -167,7 +169,7 @@ class FunctionViewSet(viewsets.ModelViewSet):
         System functions cannot be deleted.
         Requires Cerbos permission: function:delete
         """
-        from apps.permissions.services.cerbos_client import cerbos_service
+        from apps.permissions.services.authorization_context import get_authorization_context
 
         instance = self.get_object()
 
@@ -178,8 +180,7 @@ class FunctionViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_403_FORBIDDEN)
 
         # Check permission with Cerbos
-        if not cerbos_service.check_user_permission(
-            user=request.user,
+        if not get_authorization_context(request).check(
             resource_type='function',
             resource_id=str(instance.id),
             action='delete'
@@ -193,20 +194,39 @@ class FunctionViewSet(viewsets.ModelViewSet):
     @swagger_auto_schema(
         tags=['Gestión de funciones'],
         operation_description="Obtener árbol completo de funciones organizadas jerárquicamente",
-        responses={200: FunctionSerializer(many=True)}
+        responses={
+            200: FunctionSerializer(many=True),
+            304: "Sin cambios desde el ETag enviado en If-None-Match"
+        }
     )
     @action(detail=False, methods=['get'])
     def tree(self, request):
         """
         Get complete function tree (only root functions with nested children)
+        Supports If-None-Match: returns 304 while the navigation version is unchanged.
         """
-        root_functions = Function.objects.filter(
-            parent__isnull=True,
-            is_active=True
-        ).order_by('order', 'name')
+        def build_response():
+            # Whole active tree in one query, assembled in memory by parent
+            functions = Function.objects.filter(is_active=True).select_related(
+                'parent', 'category'
+            ).order_by('order', 'name')
+
+            function_children = defaultdict(list)
+            for function in functions:
+                function_children[function.parent_id].append(function)
+
+            serializer = FunctionSerializer(
+                function_children.get(None, []),
+                many=True,
+                context={'request': request, 'function_children': function_children}
+            )
+            return Response(serializer.data)
 
-        serializer = FunctionSerializer(root_functions, many=True)
-        return Response(serializer.data)
+        return conditional_response(
+            request,
+            make_etag('functions-tree', get_navigation_version()),
+            build_response
+        )
 
     @swagger_auto_schema(
         tags=['Gestión de funciones'],
@@ -227,7 +247,7 @@ class FunctionViewSet(viewsets.ModelViewSet):
             }
         ),
         responses={
-            200: "Funciones reordenadas exitosamente",
+            200: "Funciones reordenadas exitosamente (incluye los IDs no encontrados)",
             400: "Datos inválidos"
         }
     )
@@ -245,23 +265,9 @@ class FunctionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        updated_count = 0
-        for func_data in functions_data:
-            func_id = func_data.get('id')
-            order = func_data.get('order')
-
-            if func_id is None or order is None:
-                continue
-
-            try:
-                function = Function.objects.get(id=func_id)
-                function.order = order
-                function.save(update_fields=['order'])
-                updated_count += 1
-            except Function.DoesNotExist:
-                pass
+        result = bulk_reorder(Function, functions_data)
 
         return Response({
-            'message': f'{updated_count} funciones reordenadas exitosamente',
-            'updated_count': updated_count
+            'message': f"{result['updated_count']} funciones reordenadas exitosamente",
+            **result
         })
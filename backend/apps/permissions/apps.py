@@ -5,3 +5,6 @@ class PermissionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.permissions'
     verbose_name = 'Permissions'
+
+    def ready(self):
+        from apps.permissions import signals  # noqa: F401
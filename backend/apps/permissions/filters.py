@@ -0,0 +1,161 @@
+"""
+Cerbos query plan filtering
+Translates Cerbos PlanResources responses into Django Q objects, so list
+endpoints only fetch the rows the principal is allowed to see.
+"""
+import logging
+from typing import Any, Dict
+
+from cerbos.sdk.model import (
+    PlanResourcesExpression,
+    PlanResourcesFilterKind,
+    PlanResourcesValue,
+    PlanResourcesVariable,
+)
+from django.db.models import Q
+from rest_framework.filters import BaseFilterBackend
+
+logger = logging.getLogger(__name__)
+
+
+class QueryPlanError(Exception):
+    """Raised when a query plan cannot be expressed as a Django filter"""
+
+
+RESOURCE_ID_VARIABLE = 'request.resource.id'
+RESOURCE_ATTR_PREFIX = 'request.resource.attr.'
+
+# Plan operator -> (lookup, operands swapped lookup)
+_LOOKUPS = {
+    'eq': ('exact', 'exact'),
+    'lt': ('lt', 'gt'),
+    'le': ('lte', 'gte'),
+    'gt': ('gt', 'lt'),
+    'ge': ('gte', 'lte'),
+}
+
+
+def _field_name(variable: str, field_map: Dict[str, str]) -> str:
+    """Map a plan variable to a model field (attributes default to the same name)"""
+    if variable == RESOURCE_ID_VARIABLE:
+        return field_map.get('id', 'pk')
+    if variable.startswith(RESOURCE_ATTR_PREFIX):
+        attr = variable[len(RESOURCE_ATTR_PREFIX):]
+        return field_map.get(attr, attr.replace('.', '__'))
+    raise QueryPlanError(f"Unsupported variable in query plan: {variable}")
+
+
+def _comparison_to_q(operator: str, operands: list, field_map: Dict[str, str]) -> Q:
+    left, right = operands
+    if isinstance(left, PlanResourcesVariable) and isinstance(right, PlanResourcesValue):
+        variable, value, swapped = left.variable, right.value, False
+    elif isinstance(right, PlanResourcesVariable) and isinstance(left, PlanResourcesValue):
+        variable, value, swapped = right.variable, left.value, True
+    else:
+        raise QueryPlanError(f"Unsupported operands for '{operator}' in query plan")
+
+    field = _field_name(variable, field_map)
+
+    if operator == 'ne':
+        return ~Q(**{field: value})
+    if operator == 'in':
+        if swapped:
+            # value in resource.attr (list attribute) has no portable lookup
+            raise QueryPlanError("Membership in a resource attribute is not supported")
+        return Q(**{f'{field}__in': value})
+
+    lookup = _LOOKUPS[operator][1 if swapped else 0]
+    return Q(**{f'{field}__{lookup}': value})
+
+
+def plan_condition_to_q(condition: Any, field_map: Dict[str, str] = None) -> Q:
+    """
+    Convert a Cerbos query plan condition into a Django Q object.
+
+    Args:
+        condition: Operand tree from PlanResourcesFilter.condition
+        field_map: Mapping of resource attribute name (or 'id') to model field lookup
+
+    Returns:
+        Q: filter equivalent to the condition
+    """
+    field_map = field_map or {}
+
+    if isinstance(condition, PlanResourcesValue):
+        return Q() if condition.value is True else Q(pk__in=[])
+
+    if isinstance(condition, PlanResourcesVariable):
+        # Boolean attribute used directly as a condition
+        return Q(**{_field_name(condition.variable, field_map): True})
+
+    if not isinstance(condition, PlanResourcesExpression):
+        raise QueryPlanError(f"Unsupported query plan node: {condition!r}")
+
+    operator = condition.expression.operator
+    operands = condition.expression.operands
+
+    if operator in ('and', 'or'):
+        q = plan_condition_to_q(operands[0], field_map)
+        for operand in operands[1:]:
+            other = plan_condition_to_q(operand, field_map)
+            q = q & other if operator == 'and' else q | other
+        return q
+    if operator == 'not':
+        return ~plan_condition_to_q(operands[0], field_map)
+    if operator in _LOOKUPS or operator in ('ne', 'in'):
+        return _comparison_to_q(operator, operands, field_map)
+
+    raise QueryPlanError(f"Unsupported operator in query plan: {operator}")
+
+
+class CerbosQueryPlanFilter(BaseFilterBackend):
+    """
+    Filter backend that restricts querysets with a Cerbos query plan.
+
+    Views opt in by declaring `cerbos_resource_kind`. One PlanResources call
+    is made per request for the Cerbos action mapped to the view action:
+
+        class CustomerViewSet(viewsets.ModelViewSet):
+            cerbos_resource_kind = 'customer'
+            cerbos_field_map = {'id': 'id'}
+
+    Actions that are not in `cerbos_plan_actions` are left unfiltered.
+    """
+
+    default_plan_actions = {
+        'list': 'list',
+        'export': 'list',
+        'retrieve': 'read',
+        'update': 'read',
+        'partial_update': 'read',
+        'destroy': 'read',
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        resource_kind = getattr(view, 'cerbos_resource_kind', None)
+        if resource_kind is None or not request.user.is_authenticated:
+            return queryset
+
+        plan_actions = getattr(view, 'cerbos_plan_actions', self.default_plan_actions)
+        cerbos_action = plan_actions.get(getattr(view, 'action', None))
+        if cerbos_action is None:
+            return queryset
+
+        # Import here to avoid circular imports
+        from apps.permissions.services.authorization_context import get_authorization_context
+
+        plan_filter = get_authorization_context(request).plan(resource_kind, cerbos_action)
+
+        if plan_filter.kind == PlanResourcesFilterKind.ALWAYS_ALLOWED:
+            return queryset
+        if plan_filter.kind == PlanResourcesFilterKind.ALWAYS_DENIED:
+            return queryset.none()
+
+        try:
+            q = plan_condition_to_q(plan_filter.condition, getattr(view, 'cerbos_field_map', None))
+        except QueryPlanError:
+            logger.warning("Cerbos query plan for %s not supported, returning no rows",
+                           resource_kind, exc_info=True)
+            return queryset.none()
+
+        return queryset.filter(q)
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permissions', '0003_role_functions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='roleassignment',
+            index=models.Index(fields=['assigned_at', 'id'], name='permissions_assigne_533ae2_idx'),
+        ),
+    ]
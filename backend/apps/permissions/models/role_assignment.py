@@ -101,12 +101,26 @@ class RoleAssignment(TimeStampedModel):
             models.Index(fields=['role']),
             models.Index(fields=['expires_at']),
             models.Index(fields=['is_active']),
+            # Keyset pagination
+            models.Index(fields=['assigned_at', 'id']),
         ]
 
     def __str__(self):
         scope_info = f" ({self.scope_type}:{self.scope_id})" if self.scope_type else ""
         return f"{self.user.email} - {self.role.name}{scope_info}"
 
+    @classmethod
+    def prefetch_active(cls, lookup='role_assignments', to_attr='active_role_assignments'):
+        """
+        Prefetch of the active assignments (with their role) of a user queryset.
+        Serializers read them from `to_attr` instead of querying per row.
+        """
+        return models.Prefetch(
+            lookup,
+            queryset=cls.objects.filter(is_active=True).select_related('role'),
+            to_attr=to_attr
+        )
+
     def is_expired(self):
         """Check if the role assignment has expired"""
         if not self.expires_at:
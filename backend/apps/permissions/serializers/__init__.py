@@ -2,12 +2,14 @@ from .role import (
     RoleSerializer,
     RoleListSerializer,
     RoleCreateUpdateSerializer,
-    RoleAssignmentSerializer
+    RoleAssignmentSerializer,
+    RoleAssignmentBulkSerializer
 )
 
 __all__ = [
     'RoleSerializer',
     'RoleListSerializer',
     'RoleCreateUpdateSerializer',
-    'RoleAssignmentSerializer'
+    'RoleAssignmentSerializer',
+    'RoleAssignmentBulkSerializer'
 ]
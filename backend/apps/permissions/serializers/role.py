@@ -1,5 +1,8 @@
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 from apps.permissions.models import Role, RoleAssignment
+from apps.permissions.signals import role_assignments_changed
 from apps.navigation.serializers import FunctionListSerializer
 
 
@@ -41,7 +44,9 @@ class RoleSerializer(serializers.ModelSerializer):
 
     def get_users_count(self, obj):
         """Get count of active users with this role"""
-        return obj.role_assignments.filter(is_active=True).count()
+        # Annotated by RoleViewSet.get_queryset; query only for single instances
+        count = getattr(obj, 'users_count', None)
+        return count if count is not None else obj.role_assignments.filter(is_active=True).count()
 
 
 class RoleListSerializer(serializers.ModelSerializer):
@@ -73,11 +78,14 @@ class RoleListSerializer(serializers.ModelSerializer):
 
     def get_users_count(self, obj):
         """Get count of active users with this role"""
-        return obj.role_assignments.filter(is_active=True).count()
+        # Annotated by RoleViewSet.get_queryset; query only for single instances
+        count = getattr(obj, 'users_count', None)
+        return count if count is not None else obj.role_assignments.filter(is_active=True).count()
 
     def get_functions_count(self, obj):
         """Get count of functions assigned to this role"""
-        return obj.functions.filter(is_active=True).count()
+        count = getattr(obj, 'functions_count', None)
+        return count if count is not None else obj.functions.filter(is_active=True).count()
 
 
 class RoleCreateUpdateSerializer(serializers.ModelSerializer):
@@ -214,3 +222,145 @@ class RoleAssignmentSerializer(serializers.ModelSerializer):
                 )
 
         return attrs
+
+
+class RoleAssignmentScopeSerializer(serializers.Serializer):
+    """Scope of a bulk assignment"""
+    type = serializers.CharField(max_length=50)
+    id = serializers.IntegerField(required=False, allow_null=True)
+
+
+class RoleAssignmentBulkSerializer(serializers.Serializer):
+    """
+    Assign several roles to several users in one request.
+    Users and roles are validated with one query each; existing assignments
+    are loaded with one query and the missing ones are bulk inserted.
+    """
+    role_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        min_length=1,
+        max_length=100,
+        help_text="IDs de los roles a asignar"
+    )
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        min_length=1,
+        max_length=5000,
+        help_text="IDs de los usuarios que reciben los roles"
+    )
+    expires_at = serializers.DateTimeField(required=False, allow_null=True)
+    scope = RoleAssignmentScopeSerializer(required=False, allow_null=True)
+
+    def validate_role_ids(self, value):
+        role_ids = set(value)
+        # Kept for the per-role authorization check in the view
+        self.roles = list(Role.objects.filter(id__in=role_ids, is_active=True))
+        missing = sorted(role_ids - {role.id for role in self.roles})
+        if missing:
+            raise serializers.ValidationError(f"Roles no encontrados o inactivos: {missing}")
+        return sorted(role_ids)
+
+    def validate_user_ids(self, value):
+        # Import here to avoid circular imports
+        from apps.users.models import User
+
+        user_ids = set(value)
+        found = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+        missing = sorted(user_ids - found)
+        if missing:
+            raise serializers.ValidationError(f"Usuarios no encontrados: {missing}")
+        return sorted(user_ids)
+
+    def validate_expires_at(self, value):
+        if value is not None and value <= timezone.now():
+            raise serializers.ValidationError("La fecha de expiración debe ser futura")
+        return value
+
+    def create(self, validated_data):
+        """
+        Create missing assignments, reactivate inactive or expired ones and
+        skip the ones already active.
+
+        The unique constraint does not apply to assignments without scope
+        (NULL scope_type/scope_id never conflict), so the affected users are
+        locked for the transaction: concurrent bulk assignments to the same
+        users run one after the other and cannot insert duplicates.
+
+        Returns:
+            Dict[str, int]: {'created', 'reactivated', 'skipped'}
+        """
+        # Import here to avoid circular imports
+        from apps.users.models import User
+
+        data = validated_data
+        assigned_by = data.get('assigned_by')
+        scope = data.get('scope') or {}
+        scope_type = scope.get('type')
+        scope_id = scope.get('id')
+        expires_at = data.get('expires_at')
+        now = timezone.now()
+
+        with transaction.atomic():
+            # Serialize concurrent assignments to the same users (see above)
+            list(
+                User.objects.select_for_update()
+                .filter(id__in=data['user_ids'])
+                .values_list('id', flat=True)
+            )
+            existing = {
+                (user_id, role_id): (assignment_id, is_active, current_expires_at)
+                for assignment_id, user_id, role_id, is_active, current_expires_at
+                in RoleAssignment.objects.filter(
+                    user_id__in=data['user_ids'],
+                    role_id__in=data['role_ids'],
+                    scope_type=scope_type,
+                    scope_id=scope_id
+                ).values_list('id', 'user_id', 'role_id', 'is_active', 'expires_at')
+            }
+
+            to_create = []
+            to_reactivate = []
+            skipped = 0
+            for user_id in data['user_ids']:
+                for role_id in data['role_ids']:
+                    current = existing.get((user_id, role_id))
+                    if current is None:
+                        to_create.append(RoleAssignment(
+                            user_id=user_id,
+                            role_id=role_id,
+                            assigned_by=assigned_by,
+                            expires_at=expires_at,
+                            scope_type=scope_type,
+                            scope_id=scope_id,
+                            is_active=True
+                        ))
+                        continue
+                    assignment_id, is_active, current_expires_at = current
+                    if is_active and (current_expires_at is None or current_expires_at > now):
+                        skipped += 1
+                    else:
+                        to_reactivate.append(assignment_id)
+
+            if to_reactivate:
+                RoleAssignment.objects.filter(id__in=to_reactivate).update(
+                    is_active=True,
+                    expires_at=expires_at,
+                    assigned_by=assigned_by,
+                    assigned_at=now
+                )
+            created = 0
+            if to_create:
+                created = len(RoleAssignment.objects.bulk_create(to_create, batch_size=1000))
+
+            if to_create or to_reactivate:
+                user_ids = data['user_ids']
+                transaction.on_commit(lambda: role_assignments_changed.send(
+                    sender=RoleAssignment,
+                    user_ids=user_ids
+                ))
+
+        return {
+            'created': created,
+            'reactivated': len(to_reactivate),
+            'skipped': skipped,
+        }
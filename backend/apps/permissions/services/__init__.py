@@ -1,3 +1,4 @@
 from .cerbos_client import cerbos_service, CerbosService
+from .authorization_context import AuthorizationContext, get_authorization_context, load_role_assignments
 
-__all__ = ['cerbos_service', 'CerbosService']
+__all__ = ['cerbos_service', 'CerbosService', 'AuthorizationContext', 'get_authorization_context', 'load_role_assignments']
@@ -0,0 +1,227 @@
+"""
+Request-scoped authorization context
+Loads the principal's roles once per request and memoizes every Cerbos
+decision made while the request is being handled.
+"""
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from cerbos.sdk.model import PlanResourcesFilter
+from django.db.models import Q
+from django.utils import timezone
+
+from .cerbos_client import cerbos_service, CRUD_ACTIONS
+from .decision_cache import _freeze
+
+if TYPE_CHECKING:
+    from apps.users.models import User
+
+
+def load_role_assignments(user_id) -> List[Any]:
+    """Active, non-expired assignments of active roles of a user, joined with the role"""
+    # Import here to avoid circular imports
+    from apps.permissions.models import RoleAssignment
+
+    return list(
+        RoleAssignment.objects.filter(
+            user_id=user_id,
+            is_active=True,
+            role__is_active=True
+        ).filter(
+            Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now())
+        ).select_related('role')
+    )
+
+
+class AuthorizationContext:
+    """
+    Authorization state of the user behind a request.
+
+    Role assignments are loaded lazily on first use with a single query
+    (active, non-expired assignments of active roles, joined with the role),
+    and decisions are kept for the lifetime of the request, so views,
+    serializers and the menu builder never repeat a role lookup or a
+    Cerbos check. Requests authenticated with CachedJWTAuthentication carry
+    a cached principal, and role ids, codes and Cerbos roles are read from
+    it without any query.
+
+    The user is resolved on access because DRF authenticates the request
+    after middleware has run.
+    """
+
+    def __init__(self, request):
+        self._request = request
+        self._user_id = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self._role_assignments = None
+        self._decisions: Dict[tuple, bool] = {}
+        self._plans: Dict[tuple, PlanResourcesFilter] = {}
+
+    @property
+    def user(self) -> "User":
+        user = self._request.user
+        # Drop state built for a previous user (e.g. anonymous before authentication)
+        if user.pk != self._user_id:
+            self._user_id = user.pk
+            self._reset()
+        return user
+
+    @property
+    def role_assignments(self) -> List[Any]:
+        """Active, non-expired role assignments of the user, with their role"""
+        user = self.user
+        if self._role_assignments is None:
+            if not user.is_authenticated:
+                self._role_assignments = []
+            else:
+                self._role_assignments = load_role_assignments(user.pk)
+        return self._role_assignments
+
+    @property
+    def principal(self):
+        """
+        Cached principal attached by CachedJWTAuthentication, if any.
+        It carries the role ids and codes, so reading them needs no query.
+        """
+        user = self.user
+        principal = getattr(user, 'auth_principal', None)
+        if principal is not None and principal.id == user.pk:
+            return principal
+        return None
+
+    @property
+    def roles(self) -> List[Any]:
+        """Distinct active roles of the user"""
+        roles = {}
+        for assignment in self.role_assignments:
+            roles.setdefault(assignment.role_id, assignment.role)
+        return list(roles.values())
+
+    @property
+    def role_ids(self) -> List[int]:
+        principal = self.principal
+        if principal is not None:
+            return list(principal.role_ids)
+        return sorted({assignment.role_id for assignment in self.role_assignments})
+
+    @property
+    def role_codes(self) -> List[str]:
+        principal = self.principal
+        if principal is not None:
+            return list(principal.role_codes)
+        return sorted({role.code for role in self.roles})
+
+    @property
+    def cerbos_roles(self) -> List[str]:
+        """Values of Role.cerbos_role, sent to Cerbos as principal roles"""
+        principal = self.principal
+        if principal is not None:
+            return list(principal.cerbos_roles)
+        return sorted({role.cerbos_role for role in self.roles if role.cerbos_role})
+
+    def check_batch(
+        self,
+        resource_type: str,
+        resources: Dict[str, Dict[str, Any]],
+        actions: List[str]
+    ) -> Dict[str, Dict[str, bool]]:
+        """
+        Check several actions on several resources.
+        Only decisions not made earlier in the request are sent to Cerbos:
+        resources missing the same actions are checked together, one call per
+        distinct set of missing actions.
+
+        Returns:
+            Dict[str, Dict[str, bool]]: {resource_id: {action: allowed}}
+        """
+        user = self.user
+        resources = {str(resource_id): attr or {} for resource_id, attr in resources.items()}
+        results = {resource_id: {} for resource_id in resources}
+        # (missing actions) -> [resource ids]
+        pending: Dict[Tuple[str, ...], List[str]] = {}
+
+        for resource_id, attr in resources.items():
+            missing = []
+            for action in dict.fromkeys(actions):
+                key = (resource_type, resource_id, _freeze(attr), action)
+                if key in self._decisions:
+                    results[resource_id][action] = self._decisions[key]
+                else:
+                    missing.append(action)
+            if missing:
+                pending.setdefault(tuple(missing), []).append(resource_id)
+
+        for missing, resource_ids in pending.items():
+            decided = cerbos_service.check_user_permissions_batch(
+                user=user,
+                resource_type=resource_type,
+                resources={resource_id: resources[resource_id] for resource_id in resource_ids},
+                actions=list(missing),
+                roles=self.cerbos_roles
+            )
+            for resource_id, decisions in decided.items():
+                attr = resources[resource_id]
+                for action, allowed in decisions.items():
+                    if action not in missing:
+                        continue
+                    self._decisions[(resource_type, resource_id, _freeze(attr), action)] = allowed
+                    results[resource_id][action] = allowed
+
+        return results
+
+    def check(
+        self,
+        resource_type: str,
+        resource_id: str,
+        action: str,
+        resource_attr: Dict[str, Any] = None
+    ) -> bool:
+        """Check a single action on a single resource"""
+        results = self.check_batch(
+            resource_type=resource_type,
+            resources={str(resource_id): resource_attr or {}},
+            actions=[action]
+        )
+        return results[str(resource_id)][action]
+
+    def permissions_for(
+        self,
+        resource_type: str,
+        resource_id: str = "generic",
+        resource_attr: Dict[str, Any] = None,
+        actions: Optional[List[str]] = None
+    ) -> Dict[str, bool]:
+        """All CRUD permissions (or the given actions) on a resource"""
+        results = self.check_batch(
+            resource_type=resource_type,
+            resources={str(resource_id): resource_attr or {}},
+            actions=actions or CRUD_ACTIONS
+        )
+        return results[str(resource_id)]
+
+    def plan(self, resource_type: str, action: str) -> PlanResourcesFilter:
+        """Cerbos query plan for an action on a resource kind"""
+        user = self.user
+        key = (resource_type, action)
+        if key not in self._plans:
+            self._plans[key] = cerbos_service.plan_user_resources(
+                user=user,
+                resource_type=resource_type,
+                action=action,
+                roles=self.cerbos_roles
+            )
+        return self._plans[key]
+
+
+def get_authorization_context(request) -> AuthorizationContext:
+    """
+    Return the authorization context of a request (Django or DRF).
+    Creates it when AuthorizationContextMiddleware is not installed.
+    """
+    http_request = getattr(request, '_request', request)
+    context = getattr(http_request, 'authorization', None)
+    if context is None:
+        context = AuthorizationContext(http_request)
+        http_request.authorization = context
+    return context
@@ -2,15 +2,45 @@
 Cerbos client service
 Migrated from FastAPI app/cerbos/client.py
 """
-from cerbos.sdk.client import CerbosClient
-from cerbos.sdk.model import Principal, Resource
+import asyncio
+import logging
+import os
+import time
+import weakref
+
+from cerbos.sdk.client import AsyncCerbosClient, CerbosClient
+from cerbos.sdk.model import (
+    PlanResourcesFilter,
+    PlanResourcesFilterKind,
+    Principal,
+    Resource,
+    ResourceDesc,
+    ResourceList,
+)
 from django.conf import settings
-from typing import Dict, Any, List, TYPE_CHECKING
+from django.core.exceptions import ImproperlyConfigured
+from typing import Dict, Any, Iterable, List, Optional, TYPE_CHECKING
+
+from common.utils.telemetry import record_cerbos_call
+
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .decision_cache import DecisionCache
 
 if TYPE_CHECKING:
     from apps.users.models import User
 
 
+CRUD_ACTIONS = ["create", "read", "update", "delete", "list"]
+
+# Cerbos requires at least one role per principal
+DEFAULT_PRINCIPAL_ROLE = "user"
+
+# What to answer when the PDP cannot be reached (see CERBOS_FAILURE_MODE)
+FAILURE_MODES = ("closed", "open", "superuser")
+
+logger = logging.getLogger(__name__)
+
+
 class CerbosService:
     """
     Service for interacting with Cerbos.
@@ -18,19 +48,327 @@ class CerbosService:
     """
 
     def __init__(self):
-        """Initialize Cerbos client"""
-        self.client = CerbosClient(
-            host=settings.CERBOS_GRPC_ADDRESS,
-            tls_verify=False  # In development, use certificates in production
+        """Initialize Cerbos service (clients are created lazily, once per process)"""
+        self.mode = settings.CERBOS_MODE
+        if self.mode not in ("remote", "embedded", "shadow"):
+            raise ImproperlyConfigured(f"Invalid CERBOS_MODE: {self.mode!r}")
+
+        self.failure_mode = settings.CERBOS_FAILURE_MODE
+        if self.failure_mode not in FAILURE_MODES:
+            raise ImproperlyConfigured(f"Invalid CERBOS_FAILURE_MODE: {self.failure_mode!r}")
+
+        self.decision_cache = DecisionCache(
+            maxsize=settings.CERBOS_DECISION_CACHE_SIZE,
+            ttl=settings.CERBOS_DECISION_CACHE_TTL
+        )
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=settings.CERBOS_CIRCUIT_BREAKER_THRESHOLD,
+            reset_timeout=settings.CERBOS_CIRCUIT_BREAKER_RESET_TIMEOUT
+        )
+        self._client = None
+        self._client_pid = None
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    @property
+    def client(self):
+        """
+        Shared synchronous client. Its HTTP connection pool is reused by every
+        thread of the process; it is rebuilt after a fork (e.g. Gunicorn workers).
+        """
+        if self._client is None or self._client_pid != os.getpid():
+            self._client = self._build_client(self.mode)
+            self._client_pid = os.getpid()
+        return self._client
+
+    @client.setter
+    def client(self, value):
+        self._client = value
+        self._client_pid = os.getpid()
+
+    @property
+    def async_client(self):
+        """Asynchronous client for ASGI views, one per running event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._build_client(self.mode, asynchronous=True)
+            self._async_clients[loop] = client
+        return client
+
+    def _build_client(self, mode: str, asynchronous: bool = False):
+        """
+        Build the decision point for the configured CERBOS_MODE.
+
+        - remote: Cerbos PDP
+        - embedded: in-process evaluation of cerbos/policies
+        - shadow: Cerbos PDP, with embedded decisions compared and logged
+
+        Every PDP request is bounded by CERBOS_TIMEOUT seconds.
+        """
+        from .policy_engine import (
+            AsyncEmbeddedPolicyEngine,
+            AsyncShadowPolicyClient,
+            EmbeddedPolicyEngine,
+            ShadowPolicyClient,
+        )
+
+        if mode == "embedded":
+            engine = EmbeddedPolicyEngine(settings.CERBOS_POLICY_DIR)
+            return AsyncEmbeddedPolicyEngine(engine) if asynchronous else engine
+
+        client_class = AsyncCerbosClient if asynchronous else CerbosClient
+        client = client_class(
+            host=settings.CERBOS_HTTP_ADDRESS,
+            timeout_secs=settings.CERBOS_TIMEOUT,
+            tls_verify=settings.CERBOS_TLS_VERIFY
+        )
+        if mode == "shadow":
+            shadow_class = AsyncShadowPolicyClient if asynchronous else ShadowPolicyClient
+            return shadow_class(client, EmbeddedPolicyEngine(settings.CERBOS_POLICY_DIR))
+        return client
+
+    def _call(self, method, **kwargs):
+        """
+        Call a client method through the circuit breaker.
+        Raises CircuitOpenError without reaching the PDP while the circuit is open.
+        """
+        self.circuit_breaker.before_call()
+        started = time.perf_counter()
+        try:
+            response = method(**kwargs).raise_if_failed()
+        except Exception:
+            self.circuit_breaker.record_failure()
+            raise
+        finally:
+            record_cerbos_call(time.perf_counter() - started)
+        self.circuit_breaker.record_success()
+        return response
+
+    async def _acall(self, method, **kwargs):
+        """Async counterpart of _call"""
+        self.circuit_breaker.before_call()
+        started = time.perf_counter()
+        try:
+            response = (await method(**kwargs)).raise_if_failed()
+        except Exception:
+            self.circuit_breaker.record_failure()
+            raise
+        finally:
+            record_cerbos_call(time.perf_counter() - started)
+        self.circuit_breaker.record_success()
+        return response
+
+    def _fallback_decision(self, user: Optional["User"] = None) -> bool:
+        """
+        Decision used when Cerbos cannot answer, according to CERBOS_FAILURE_MODE:
+        - closed: deny everything
+        - open: allow everything
+        - superuser: only superusers are allowed
+        """
+        if self.failure_mode == "open":
+            return True
+        if self.failure_mode == "superuser":
+            return bool(user is not None and user.is_superuser)
+        return False
+
+    def _log_failure(self, error: Exception, user: Optional["User"], actions, resource_type: str) -> None:
+        if isinstance(error, CircuitOpenError):
+            logger.debug("Cerbos circuit open, using %s fallback for %s on %s",
+                         self.failure_mode, actions, resource_type)
+        else:
+            logger.warning("Cerbos error: %s. Using %s fallback for user %s, %s on %s",
+                           error, self.failure_mode, getattr(user, "id", None), actions, resource_type)
+
+    def _build_user_principal(self, user: "User", roles: Optional[Iterable[str]] = None) -> Principal:
+        """
+        Build the Cerbos principal for a Django user.
+
+        Args:
+            user: User object from Django
+            roles: Cerbos roles of the user's active role assignments; defaults
+                to the principal attached by CachedJWTAuthentication
+        """
+        if roles is None:
+            auth_principal = getattr(user, 'auth_principal', None)
+            if auth_principal is not None and auth_principal.id == user.id:
+                roles = auth_principal.cerbos_roles
+        return Principal(
+            id=str(user.id),
+            roles=set(roles or []) or {DEFAULT_PRINCIPAL_ROLE},
+            attr={
+                "is_superuser": user.is_superuser,
+                "is_staff": user.is_staff,
+                "user_type": user.user_type,
+                "email": user.email
+            }
         )
 
+    def _check_resources(
+        self,
+        principal: Principal,
+        resource_type: str,
+        resources: Dict[str, Dict[str, Any]],
+        actions: List[str]
+    ) -> Dict[str, Dict[str, bool]]:
+        """
+        Send every resource and action to Cerbos in a single CheckResources request.
+        Decisions found in the decision cache are not sent to the PDP again.
+
+        Args:
+            principal: Cerbos principal performing the actions
+            resource_type: Resource kind (e.g., 'user')
+            resources: Mapping of resource ID to resource attributes
+            actions: Actions to verify on every resource
+
+        Returns:
+            Dict[str, Dict[str, bool]]: {resource_id: {action: allowed}}
+
+        Raises:
+            Exception: if the PDP request fails, so callers can apply their fallback
+        """
+        resources, results, pending = self._cached_decisions(principal, resource_type, resources, actions)
+        if not pending:
+            return results
+
+        response = self._call(
+            self.client.check_resources,
+            principal=principal,
+            resources=self._build_resource_list(resource_type, resources, pending)
+        )
+        self._store_decisions(principal, resource_type, resources, pending, response, results)
+        return results
+
+    async def _acheck_resources(
+        self,
+        principal: Principal,
+        resource_type: str,
+        resources: Dict[str, Dict[str, Any]],
+        actions: List[str]
+    ) -> Dict[str, Dict[str, bool]]:
+        """Async counterpart of _check_resources"""
+        resources, results, pending = self._cached_decisions(principal, resource_type, resources, actions)
+        if not pending:
+            return results
+
+        response = await self._acall(
+            self.async_client.check_resources,
+            principal=principal,
+            resources=self._build_resource_list(resource_type, resources, pending)
+        )
+        self._store_decisions(principal, resource_type, resources, pending, response, results)
+        return results
+
+    def _cached_decisions(self, principal, resource_type, resources, actions):
+        """
+        Split the requested decisions into cached results and pending actions.
+
+        Returns:
+            (normalized resources, {resource_id: {action: allowed}}, {resource_id: {pending actions}})
+        """
+        resources = {str(resource_id): attr or {} for resource_id, attr in resources.items()}
+        results = {}
+        pending = {}
+        for resource_id, attr in resources.items():
+            results[resource_id] = {}
+            for action in actions:
+                key = self.decision_cache.make_key(principal, resource_type, resource_id, attr, action)
+                allowed = self.decision_cache.get(key)
+                if allowed is None:
+                    pending.setdefault(resource_id, set()).add(action)
+                else:
+                    results[resource_id][action] = allowed
+        return resources, results, pending
+
+    def _build_resource_list(self, resource_type, resources, pending) -> ResourceList:
+        resource_list = ResourceList()
+        for resource_id, missing_actions in pending.items():
+            resource_list.add(
+                Resource(id=resource_id, kind=resource_type, attr=resources[resource_id]),
+                missing_actions
+            )
+        return resource_list
+
+    def _store_decisions(self, principal, resource_type, resources, pending, response, results) -> None:
+        """Copy the PDP answers into the results and the decision cache"""
+        for resource_id, missing_actions in pending.items():
+            result = response.get_resource(resource_id)
+            for action in missing_actions:
+                allowed = result is not None and result.is_allowed(action)
+                key = self.decision_cache.make_key(
+                    principal, resource_type, resource_id, resources[resource_id], action
+                )
+                self.decision_cache.set(key, allowed)
+                results[resource_id][action] = allowed
+
+    def check_user_permissions_batch(
+        self,
+        user: "User",
+        resource_type: str,
+        resources: Dict[str, Dict[str, Any]],
+        actions: List[str],
+        roles: Optional[Iterable[str]] = None
+    ) -> Dict[str, Dict[str, bool]]:
+        """
+        Check several actions on several resources with one PDP round trip.
+
+        Args:
+            user: User object from Django
+            resource_type: Resource type (e.g., 'user')
+            resources: Mapping of resource ID to resource attributes
+            actions: Actions to verify (e.g., ['read', 'update'])
+            roles: Cerbos roles of the user (see AuthorizationContext)
+
+        Returns:
+            Dict[str, Dict[str, bool]]: {resource_id: {action: allowed}}
+        """
+        try:
+            return self._check_resources(
+                principal=self._build_user_principal(user, roles),
+                resource_type=resource_type,
+                resources=resources,
+                actions=actions
+            )
+        except Exception as e:
+            # FALLBACK: Si Cerbos falla, aplicar CERBOS_FAILURE_MODE
+            self._log_failure(e, user, actions, resource_type)
+            allowed = self._fallback_decision(user)
+            return {
+                str(resource_id): {action: allowed for action in actions}
+                for resource_id in resources
+            }
+
+    async def acheck_user_permissions_batch(
+        self,
+        user: "User",
+        resource_type: str,
+        resources: Dict[str, Dict[str, Any]],
+        actions: List[str],
+        roles: Optional[Iterable[str]] = None
+    ) -> Dict[str, Dict[str, bool]]:
+        """Async variant of check_user_permissions_batch for ASGI views"""
+        try:
+            return await self._acheck_resources(
+                principal=self._build_user_principal(user, roles),
+                resource_type=resource_type,
+                resources=resources,
+                actions=actions
+            )
+        except Exception as e:
+            self._log_failure(e, user, actions, resource_type)
+            allowed = self._fallback_decision(user)
+            return {
+                str(resource_id): {action: allowed for action in actions}
+                for resource_id in resources
+            }
+
     def check_user_permission(
         self,
         user: "User",
         resource_type: str,
         resource_id: str,
         action: str,
-        resource_attr: Dict[str, Any] = None
+        resource_attr: Dict[str, Any] = None,
+        roles: Optional[Iterable[str]] = None
     ) -> bool:
         """
         Check permissions using a User object directly.
@@ -42,72 +380,129 @@ class CerbosService:
             resource_id: Resource ID
             action: Action to verify (e.g., 'read', 'update', 'delete')
             resource_attr: Additional resource attributes
+            roles: Cerbos roles of the user (see AuthorizationContext)
 
         Returns:
             bool: True if has permission, False otherwise
         """
-        principal = Principal(
-            id=str(user.id),
-            roles=set(),  # Don't use roles, only is_superuser
-            attr={
-                "is_superuser": user.is_superuser,
-                "email": user.email
-            }
+        results = self.check_user_permissions_batch(
+            user=user,
+            resource_type=resource_type,
+            resources={str(resource_id): resource_attr or {}},
+            actions=[action],
+            roles=roles
         )
+        return results[str(resource_id)][action]
 
-        resource = Resource(
-            id=str(resource_id),
-            kind=resource_type,
-            attr=resource_attr or {}
+    async def acheck_user_permission(
+        self,
+        user: "User",
+        resource_type: str,
+        resource_id: str,
+        action: str,
+        resource_attr: Dict[str, Any] = None,
+        roles: Optional[Iterable[str]] = None
+    ) -> bool:
+        """Async variant of check_user_permission for ASGI views"""
+        results = await self.acheck_user_permissions_batch(
+            user=user,
+            resource_type=resource_type,
+            resources={str(resource_id): resource_attr or {}},
+            actions=[action],
+            roles=roles
         )
-
-        try:
-            result = self.client.is_allowed(
-                action=action,
-                principal=principal,
-                resource=resource
-            )
-            return result
-        except Exception as e:
-            print(f"⚠️ Cerbos Error: {e}")
-            print(f"🔄 Fallback: Using is_superuser={user.is_superuser} for {action} on {resource_type}")
-            # FALLBACK: Si Cerbos falla, usar is_superuser para desarrollo
-            # En producción, esto debería ser más restrictivo
-            return user.is_superuser
+        return results[str(resource_id)][action]
 
     def get_user_permissions_for_resource(
         self,
         user: "User",
         resource_type: str,
         resource_id: str = "generic",
-        resource_attr: Dict[str, Any] = None
+        resource_attr: Dict[str, Any] = None,
+        actions: Optional[List[str]] = None,
+        roles: Optional[Iterable[str]] = None
     ) -> Dict[str, bool]:
         """
         Get all CRUD permissions for a user on a resource.
         Compatible with FastAPI implementation.
+        All actions are resolved in a single CheckResources request.
 
         Args:
             user: User object from Django
             resource_type: Resource type (e.g., 'user')
             resource_id: Resource ID (default: 'generic')
             resource_attr: Additional resource attributes
+            actions: Actions to verify (default: all CRUD actions plus 'list')
+            roles: Cerbos roles of the user (see AuthorizationContext)
 
         Returns:
             Dict with permissions: {"create": bool, "read": bool, "update": bool, "delete": bool, "list": bool}
         """
-        actions = ["create", "read", "update", "delete", "list"]
-        permissions = {}
+        results = self.check_user_permissions_batch(
+            user=user,
+            resource_type=resource_type,
+            resources={str(resource_id): resource_attr or {}},
+            actions=actions or CRUD_ACTIONS,
+            roles=roles
+        )
+        return results[str(resource_id)]
 
-        for action in actions:
-            permissions[action] = self.check_user_permission(
-                user=user,
-                resource_type=resource_type,
-                resource_id=resource_id,
-                action=action,
-                resource_attr=resource_attr
-            )
+    async def aget_user_permissions_for_resource(
+        self,
+        user: "User",
+        resource_type: str,
+        resource_id: str = "generic",
+        resource_attr: Dict[str, Any] = None,
+        actions: Optional[List[str]] = None,
+        roles: Optional[Iterable[str]] = None
+    ) -> Dict[str, bool]:
+        """Async variant of get_user_permissions_for_resource for ASGI views"""
+        results = await self.acheck_user_permissions_batch(
+            user=user,
+            resource_type=resource_type,
+            resources={str(resource_id): resource_attr or {}},
+            actions=actions or CRUD_ACTIONS,
+            roles=roles
+        )
+        return results[str(resource_id)]
 
-        return permissions
+    def plan_user_resources(
+        self,
+        user: "User",
+        resource_type: str,
+        action: str,
+        roles: Optional[Iterable[str]] = None
+    ) -> PlanResourcesFilter:
+        """
+        Ask Cerbos which resources of a kind the user may perform an action on.
+        The returned filter is meant to be translated into a queryset filter,
+        so a whole list is authorized with a single PDP call.
+
+        Args:
+            user: User object from Django
+            resource_type: Resource type (e.g., 'customer')
+            action: Action to verify (e.g., 'list')
+            roles: Cerbos roles of the user (see AuthorizationContext)
+
+        Returns:
+            PlanResourcesFilter: ALWAYS_ALLOWED, ALWAYS_DENIED or CONDITIONAL with the condition tree
+        """
+        try:
+            response = self._call(
+                self.client.plan_resources,
+                actions=action,
+                principal=self._build_user_principal(user, roles),
+                resource=ResourceDesc(kind=resource_type)
+            )
+            return response.filter
+        except Exception as e:
+            # FALLBACK: Si Cerbos falla, aplicar CERBOS_FAILURE_MODE a toda la lista
+            self._log_failure(e, user, [action], resource_type)
+            kind = (
+                PlanResourcesFilterKind.ALWAYS_ALLOWED if self._fallback_decision(user)
+                else PlanResourcesFilterKind.ALWAYS_DENIED
+            )
+            return PlanResourcesFilter(kind=kind)
 
     def check_permission(
         self,
@@ -133,28 +528,14 @@ class CerbosService:
         Returns:
             bool: True if has permission, False otherwise
         """
-        principal = Principal(
-            id=user_id,
-            roles=set(roles),
-            attr={}
-        )
-
-        resource = Resource(
-            id=resource_id,
-            kind=resource_type,
-            attr=attributes or {}
-        )
-
-        try:
-            result = self.client.is_allowed(
-                action=action,
-                principal=principal,
-                resource=resource
-            )
-            return result
-        except Exception as e:
-            print(f"Error verifying permissions with Cerbos: {e}")
-            return False
+        return self.check_multiple_permissions(
+            user_id=user_id,
+            roles=roles,
+            resource_type=resource_type,
+            resource_id=resource_id,
+            actions=[action],
+            attributes=attributes
+        )[action]
 
     def check_multiple_permissions(
         self,
@@ -168,34 +549,29 @@ class CerbosService:
         """
         Check multiple permissions at once.
         Compatible with FastAPI implementation.
+        All actions are resolved in a single CheckResources request.
 
         Returns:
             Dict[str, bool]: Dictionary with actions and whether they are allowed
         """
         principal = Principal(
             id=user_id,
-            roles=set(roles),
+            roles=set(roles) or {DEFAULT_PRINCIPAL_ROLE},
             attr={}
         )
 
-        resource = Resource(
-            id=resource_id,
-            kind=resource_type,
-            attr=attributes or {}
-        )
-
         try:
-            results = {}
-            for action in actions:
-                results[action] = self.client.is_allowed(
-                    action=action,
-                    principal=principal,
-                    resource=resource
-                )
-            return results
+            results = self._check_resources(
+                principal=principal,
+                resource_type=resource_type,
+                resources={str(resource_id): attributes or {}},
+                actions=actions
+            )
+            return results[str(resource_id)]
         except Exception as e:
-            print(f"Error verifying multiple permissions with Cerbos: {e}")
-            return {action: False for action in actions}
+            self._log_failure(e, None, actions, resource_type)
+            allowed = self._fallback_decision()
+            return {action: allowed for action in actions}
 
 
 # Global service instance
@@ -0,0 +1,106 @@
+"""
+In-process cache for Cerbos authorization decisions.
+Bounded LRU with a per-entry TTL, shared by all threads of a worker.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from cerbos.sdk.model import Principal
+
+
+def _freeze(value: Any) -> Hashable:
+    """Turn attribute values (dicts, lists, sets) into hashable equivalents"""
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    return value
+
+
+class DecisionCache:
+    """
+    Thread-safe TTL/LRU cache of allow/deny decisions.
+
+    Keys combine the principal (id, roles and attributes), the resource
+    (kind, id and attributes) and the action, so any change in the inputs
+    of a decision produces a different key.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, bool]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    @staticmethod
+    def make_key(
+        principal: Principal,
+        resource_type: str,
+        resource_id: str,
+        resource_attr: Dict[str, Any],
+        action: str
+    ) -> Hashable:
+        """Build the cache key for a single decision"""
+        return (
+            principal.id,
+            frozenset(principal.roles),
+            _freeze(principal.attr),
+            resource_type,
+            str(resource_id),
+            _freeze(resource_attr or {}),
+            action,
+        )
+
+    def get(self, key: Hashable) -> Optional[bool]:
+        """Return the cached decision, or None on a miss or expired entry"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, allowed: bool) -> None:
+        """Store a decision, evicting the least recently used entries"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, allowed)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached decision (e.g. after a role change)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current occupancy"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+            }
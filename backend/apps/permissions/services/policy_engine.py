@@ -0,0 +1,736 @@
+"""
+Embedded Cerbos policy evaluator
+Loads the YAML resource policies from cerbos/policies and answers
+CheckResources requests in-process, without a round trip to the PDP.
+
+Only the subset of Cerbos used by this project is supported: resource
+policies with role/action rules and CEL conditions made of attribute
+paths, literals, comparisons, `in`, `!`, `&&` and `||`. Anything else
+raises PolicyCompileError when the policies are loaded.
+
+PlanResources is supported by partially evaluating the conditions: the
+principal is known, resource attributes are left as variables in the
+returned query plan.
+"""
+import ast
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional
+
+import yaml
+from cerbos.sdk.model import (
+    CheckResourcesResponse,
+    CheckResourcesResult,
+    Effect,
+    PlanResourcesExpression,
+    PlanResourcesFilter,
+    PlanResourcesFilterKind,
+    PlanResourcesResponse,
+    PlanResourcesValue,
+    PlanResourcesVariable,
+    Principal,
+    Resource,
+    ResourceDesc,
+    ResourceList,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PolicyCompileError(Exception):
+    """Raised when a policy or condition uses unsupported Cerbos features"""
+
+
+class _EvaluationError(Exception):
+    """Raised when a condition cannot be evaluated (e.g. missing attribute)"""
+
+
+# ---------------------------------------------------------------------------
+# Condition expressions
+# ---------------------------------------------------------------------------
+
+_TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<number>\d+(?:\.\d+)?)
+      | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<op>==|!=|<=|>=|&&|\|\||[<>!()\[\],.])
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+    )''', re.VERBOSE)
+
+_KEYWORDS = {'true': True, 'false': False, 'null': None}
+
+# CEL aliases: P -> request.principal, R -> request.resource
+_ROOT_ALIASES = {'P': 'principal', 'R': 'resource'}
+
+_COMPARISONS = {
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    'in': lambda a, b: a in b,
+}
+
+# CEL operators as named in Cerbos query plans
+_PLAN_OPERATORS = {
+    '==': 'eq',
+    '!=': 'ne',
+    '<': 'lt',
+    '<=': 'le',
+    '>': 'gt',
+    '>=': 'ge',
+    'in': 'in',
+    '&&': 'and',
+    '||': 'or',
+    '!': 'not',
+}
+
+
+class Literal:
+    def __init__(self, value: Any):
+        self.value = value
+
+    def evaluate(self, ctx: Dict[str, Any]) -> Any:
+        return self.value
+
+    def plan(self, ctx: Dict[str, Any]):
+        return self
+
+
+class ListLiteral:
+    def __init__(self, items: List[Any]):
+        self.items = items
+
+    def evaluate(self, ctx: Dict[str, Any]) -> Any:
+        return [item.evaluate(ctx) for item in self.items]
+
+    def plan(self, ctx: Dict[str, Any]):
+        items = [item.plan(ctx) for item in self.items]
+        if not all(isinstance(item, Literal) for item in items):
+            raise _EvaluationError("lists with resource attributes are not supported in plans")
+        return Literal([item.value for item in items])
+
+
+class Attribute:
+    """Path into the request, e.g. ('principal', 'attr', 'is_superuser')"""
+
+    def __init__(self, path: tuple):
+        self.path = path
+
+    def evaluate(self, ctx: Dict[str, Any]) -> Any:
+        value = ctx
+        for part in self.path:
+            if not isinstance(value, dict) or part not in value:
+                raise _EvaluationError(f"no such key: {'.'.join(self.path)}")
+            value = value[part]
+        return value
+
+    def plan(self, ctx: Dict[str, Any]):
+        if self.path[0] == 'resource':
+            return PlanResourcesVariable(variable='request.' + '.'.join(self.path))
+        return Literal(self.evaluate(ctx))
+
+
+class Not:
+    def __init__(self, operand):
+        self.operand = operand
+
+    def evaluate(self, ctx: Dict[str, Any]) -> Any:
+        return not _as_bool(self.operand.evaluate(ctx))
+
+    def plan(self, ctx: Dict[str, Any]):
+        operand = self.operand.plan(ctx)
+        if isinstance(operand, Literal):
+            return Literal(not _as_bool(operand.value))
+        return _plan_expression('!', [operand])
+
+
+class Comparison:
+    def __init__(self, op: str, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def evaluate(self, ctx: Dict[str, Any]) -> Any:
+        left = self.left.evaluate(ctx)
+        right = self.right.evaluate(ctx)
+        try:
+            return _COMPARISONS[self.op](left, right)
+        except TypeError as e:
+            raise _EvaluationError(str(e))
+
+    def plan(self, ctx: Dict[str, Any]):
+        left = self.left.plan(ctx)
+        right = self.right.plan(ctx)
+        if isinstance(left, Literal) and isinstance(right, Literal):
+            try:
+                return Literal(_COMPARISONS[self.op](left.value, right.value))
+            except TypeError as e:
+                raise _EvaluationError(str(e))
+        return _plan_expression(self.op, [_plan_operand(left), _plan_operand(right)])
+
+
+class BoolGroup:
+    """
+    Conjunction ('&&') or disjunction ('||') of operands, commutative as in
+    CEL: an operand that fails to evaluate (e.g. a missing attribute) is an
+    error only when no other operand decides the result (false for '&&',
+    true for '||').
+    """
+
+    def __init__(self, op: str, operands: list):
+        self.op = op
+        self.operands = operands
+
+    def evaluate(self, ctx: Dict[str, Any]) -> Any:
+        decisive = self.op == '||'
+        error = None
+        for operand in self.operands:
+            try:
+                if _as_bool(operand.evaluate(ctx)) == decisive:
+                    return decisive
+            except _EvaluationError as e:
+                error = error or e
+        if error is not None:
+            raise error
+        return not decisive
+
+    def plan(self, ctx: Dict[str, Any]):
+        decisive = self.op == '||'
+        planned = []
+        error = None
+        for operand in self.operands:
+            try:
+                planned.append(operand.plan(ctx))
+            except _EvaluationError as e:
+                error = error or e
+        result = _plan_bool(self.op, planned)
+        # The error stands unless a known operand decided the result
+        if error is not None and not (isinstance(result, Literal) and result.value == decisive):
+            raise error
+        return result
+
+
+def _plan_operand(node):
+    """Known values become PlanResourcesValue, residual expressions are kept"""
+    if isinstance(node, Literal):
+        return PlanResourcesValue(value=node.value)
+    return node
+
+
+def _plan_expression(op: str, operands: list) -> PlanResourcesExpression:
+    return PlanResourcesExpression(
+        expression=PlanResourcesExpression.Expr(operator=_PLAN_OPERATORS[op], operands=operands)
+    )
+
+
+def _plan_bool(op: str, operands: list):
+    """
+    Simplify a partially evaluated '&&'/'||': known operands either decide
+    the result or are dropped, the residual ones are combined in the plan.
+    """
+    short_circuit = op == '||'
+    residual = []
+    for operand in operands:
+        if isinstance(operand, Literal):
+            if _as_bool(operand.value) == short_circuit:
+                return Literal(short_circuit)
+        else:
+            residual.append(operand)
+
+    if not residual:
+        return Literal(not short_circuit)
+    if len(residual) == 1:
+        return residual[0]
+    return _plan_expression(op, residual)
+
+
+def _as_bool(value: Any) -> bool:
+    if not isinstance(value, bool):
+        raise _EvaluationError(f"expected bool, got {value!r}")
+    return value
+
+
+class _Parser:
+    """Recursive descent parser for the supported CEL subset"""
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        self.tokens = self._tokenize(expr)
+        self.pos = 0
+
+    def _tokenize(self, expr: str) -> List[tuple]:
+        tokens = []
+        pos = 0
+        expr = expr.strip()
+        while pos < len(expr):
+            match = _TOKEN_RE.match(expr, pos)
+            if not match or match.end() == pos:
+                raise PolicyCompileError(f"Unsupported syntax at {expr[pos:]!r} in {self.expr!r}")
+            kind = match.lastgroup
+            tokens.append((kind, match.group(kind)))
+            pos = match.end()
+        return tokens
+
+    def _peek(self) -> Optional[tuple]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _next(self) -> tuple:
+        token = self._peek()
+        if token is None:
+            raise PolicyCompileError(f"Unexpected end of expression {self.expr!r}")
+        self.pos += 1
+        return token
+
+    def _accept(self, value: str) -> bool:
+        token = self._peek()
+        if token is not None and token[1] == value and token[0] in ('op', 'name'):
+            self.pos += 1
+            return True
+        return False
+
+    def _expect(self, value: str) -> None:
+        if not self._accept(value):
+            raise PolicyCompileError(f"Expected {value!r} in {self.expr!r}")
+
+    def parse(self):
+        node = self._parse_or()
+        if self._peek() is not None:
+            raise PolicyCompileError(f"Unexpected token {self._peek()[1]!r} in {self.expr!r}")
+        return node
+
+    def _parse_or(self):
+        operands = [self._parse_and()]
+        while self._accept('||'):
+            operands.append(self._parse_and())
+        return operands[0] if len(operands) == 1 else BoolGroup('||', operands)
+
+    def _parse_and(self):
+        operands = [self._parse_comparison()]
+        while self._accept('&&'):
+            operands.append(self._parse_comparison())
+        return operands[0] if len(operands) == 1 else BoolGroup('&&', operands)
+
+    def _parse_comparison(self):
+        left = self._parse_unary()
+        token = self._peek()
+        if token is not None and token[1] in _COMPARISONS:
+            self.pos += 1
+            return Comparison(token[1], left, self._parse_unary())
+        return left
+
+    def _parse_unary(self):
+        if self._accept('!'):
+            return Not(self._parse_unary())
+        return self._parse_primary()
+
+    def _parse_primary(self):
+        kind, value = self._next()
+
+        if kind == 'number':
+            return Literal(float(value) if '.' in value else int(value))
+        if kind == 'string':
+            # Same quoting and escapes as Python; non-ASCII text is kept as is
+            try:
+                return Literal(ast.literal_eval(value))
+            except (SyntaxError, ValueError):
+                raise PolicyCompileError(f"Invalid string literal {value} in {self.expr!r}")
+        if value == '(':
+            node = self._parse_or()
+            self._expect(')')
+            return node
+        if value == '[':
+            items = []
+            if not self._accept(']'):
+                items.append(self._parse_or())
+                while self._accept(','):
+                    items.append(self._parse_or())
+                self._expect(']')
+            return ListLiteral(items)
+        if kind == 'name':
+            if value in _KEYWORDS:
+                return Literal(_KEYWORDS[value])
+            return self._parse_path(value)
+
+        raise PolicyCompileError(f"Unexpected token {value!r} in {self.expr!r}")
+
+    def _parse_path(self, root: str):
+        parts = [root]
+        while self._accept('.'):
+            kind, value = self._next()
+            if kind != 'name':
+                raise PolicyCompileError(f"Invalid attribute path in {self.expr!r}")
+            parts.append(value)
+
+        if self._peek() is not None and self._peek()[1] == '(':
+            raise PolicyCompileError(f"Function calls are not supported: {self.expr!r}")
+
+        if parts[0] in _ROOT_ALIASES:
+            parts = [_ROOT_ALIASES[parts[0]]] + parts[1:]
+        elif parts[0] == 'request' and len(parts) > 1 and parts[1] in ('principal', 'resource'):
+            parts = parts[1:]
+        else:
+            raise PolicyCompileError(f"Unsupported variable {'.'.join(parts)!r} in {self.expr!r}")
+
+        return Attribute(tuple(parts))
+
+
+def compile_expression(expr: str):
+    """Compile a CEL condition into an evaluable expression tree"""
+    return _Parser(str(expr)).parse()
+
+
+def _compile_match(match: Dict[str, Any]):
+    if 'expr' in match:
+        return compile_expression(match['expr'])
+    if 'all' in match:
+        return BoolGroup('&&', [_compile_match(m) for m in match['all']['of']])
+    if 'any' in match:
+        return BoolGroup('||', [_compile_match(m) for m in match['any']['of']])
+    if 'none' in match:
+        return Not(BoolGroup('||', [_compile_match(m) for m in match['none']['of']]))
+    raise PolicyCompileError(f"Unsupported match block: {match}")
+
+
+# ---------------------------------------------------------------------------
+# Policies
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class CompiledRule:
+    actions: FrozenSet[str]
+    roles: FrozenSet[str]
+    effect: Effect
+    condition: Any = None
+
+    def applies_to(self, action: str, roles: FrozenSet[str]) -> bool:
+        """Whether the rule targets this action for any of the given roles"""
+        if '*' not in self.actions and action not in self.actions:
+            return False
+        return '*' in self.roles or bool(self.roles & roles)
+
+    def matches(self, ctx: Dict[str, Any]) -> bool:
+        """Evaluate the rule condition; evaluation errors never match"""
+        if self.condition is None:
+            return True
+        try:
+            return _as_bool(self.condition.evaluate(ctx))
+        except _EvaluationError:
+            return False
+
+    def plan(self, ctx: Dict[str, Any]):
+        """Partially evaluate the condition; evaluation errors never match"""
+        if self.condition is None:
+            return Literal(True)
+        try:
+            return self.condition.plan(ctx)
+        except _EvaluationError:
+            return Literal(False)
+
+
+def _compile_rule(rule: Dict[str, Any], source: str) -> CompiledRule:
+    if rule.get('derivedRoles'):
+        raise PolicyCompileError(f"Derived roles are not supported ({source})")
+
+    condition = rule.get('condition')
+    try:
+        effect = Effect(rule['effect'])
+    except ValueError:
+        raise PolicyCompileError(f"Invalid effect {rule.get('effect')!r} ({source})")
+
+    return CompiledRule(
+        actions=frozenset(rule.get('actions', [])),
+        roles=frozenset(rule.get('roles', [])),
+        effect=effect,
+        condition=_compile_match(condition['match']) if condition else None
+    )
+
+
+def _request_context(principal: Principal, resource: Resource) -> Dict[str, Any]:
+    return {
+        'principal': {
+            'id': principal.id,
+            'roles': sorted(principal.roles),
+            'attr': principal.attr or {},
+        },
+        'resource': {
+            'id': resource.id,
+            'kind': resource.kind,
+            'attr': resource.attr or {},
+        },
+    }
+
+
+class EmbeddedPolicyEngine:
+    """
+    In-process replacement for the Cerbos PDP.
+    Exposes the same check_resources/is_allowed API as the SDK client so
+    CerbosService can use either one transparently.
+    """
+
+    def __init__(self, policy_dir):
+        self.policy_dir = Path(policy_dir)
+        self.policies: Dict[tuple, List[CompiledRule]] = {}
+        self.load()
+
+    def load(self) -> None:
+        """(Re)load and compile every resource policy under policy_dir"""
+        policies = {}
+        paths = sorted(self.policy_dir.rglob('*.yaml')) + sorted(self.policy_dir.rglob('*.yml'))
+
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                documents = [doc for doc in yaml.safe_load_all(f) if doc]
+
+            for doc in documents:
+                if 'resourcePolicy' not in doc:
+                    raise PolicyCompileError(f"Only resource policies are supported ({path.name})")
+
+                policy = doc['resourcePolicy']
+                if policy.get('importDerivedRoles'):
+                    raise PolicyCompileError(f"Derived roles are not supported ({path.name})")
+
+                key = (policy['resource'], policy.get('version', 'default'))
+                policies[key] = [_compile_rule(rule, path.name) for rule in policy.get('rules', [])]
+
+        self.policies = policies
+        logger.info("Loaded %d Cerbos resource policies from %s", len(policies), self.policy_dir)
+
+    def decide(self, action: str, principal: Principal, resource: Resource) -> Effect:
+        """Cerbos semantics: an explicit DENY wins, otherwise ALLOW if any rule allows"""
+        rules = self.policies.get((resource.kind, resource.policy_version or 'default'), [])
+        roles = frozenset(principal.roles)
+        ctx = _request_context(principal, resource)
+
+        allowed = False
+        for rule in rules:
+            if not rule.applies_to(action, roles) or not rule.matches(ctx):
+                continue
+            if rule.effect == Effect.DENY:
+                return Effect.DENY
+            allowed = True
+
+        return Effect.ALLOW if allowed else Effect.DENY
+
+    def check_resources(
+        self,
+        principal: Principal,
+        resources: ResourceList,
+        request_id: Optional[str] = None,
+        aux_data: Any = None,
+    ) -> CheckResourcesResponse:
+        """Evaluate every resource/action pair locally"""
+        results = [
+            CheckResourcesResult(
+                resource=entry.resource,
+                actions={
+                    action: self.decide(action, principal, entry.resource)
+                    for action in entry.actions
+                }
+            )
+            for entry in resources.resources
+        ]
+        return CheckResourcesResponse(request_id=request_id or 'embedded', results=results)
+
+    def is_allowed(
+        self,
+        action: str,
+        principal: Principal,
+        resource: Resource,
+        request_id: Optional[str] = None,
+        aux_data: Any = None,
+    ) -> bool:
+        return self.decide(action, principal, resource) == Effect.ALLOW
+
+    def plan_resources(
+        self,
+        actions,
+        principal: Principal,
+        resource: ResourceDesc,
+        request_id: Optional[str] = None,
+        aux_data: Any = None,
+    ) -> PlanResourcesResponse:
+        """
+        Build the query plan of resources of `resource.kind` the principal
+        may perform the action on: (any ALLOW condition) and not (any DENY).
+        """
+        action = actions if isinstance(actions, str) else actions[0]
+        rules = self.policies.get((resource.kind, resource.policy_version or 'default'), [])
+        roles = frozenset(principal.roles)
+        ctx = {
+            'principal': {
+                'id': principal.id,
+                'roles': sorted(principal.roles),
+                'attr': principal.attr or {},
+            },
+        }
+
+        allow, deny = [], []
+        for rule in rules:
+            if rule.applies_to(action, roles):
+                (deny if rule.effect == Effect.DENY else allow).append(rule.plan(ctx))
+
+        condition = _plan_bool('&&', [_plan_bool('||', allow), _negate(_plan_bool('||', deny))])
+
+        if isinstance(condition, Literal):
+            kind = (
+                PlanResourcesFilterKind.ALWAYS_ALLOWED if condition.value
+                else PlanResourcesFilterKind.ALWAYS_DENIED
+            )
+            plan_filter = PlanResourcesFilter(kind=kind)
+        else:
+            plan_filter = PlanResourcesFilter(
+                kind=PlanResourcesFilterKind.CONDITIONAL,
+                condition=condition
+            )
+
+        return PlanResourcesResponse(
+            request_id=request_id or 'embedded',
+            action=action,
+            resource_kind=resource.kind,
+            policy_version=resource.policy_version or 'default',
+            filter=plan_filter
+        )
+
+
+def _negate(node):
+    if isinstance(node, Literal):
+        return Literal(not node.value)
+    return _plan_expression('!', [node])
+
+
+class ShadowPolicyClient:
+    """
+    Runs the remote PDP and the embedded engine side by side.
+    The remote answer is authoritative; disagreements are logged so the
+    embedded engine can be validated against production traffic.
+    """
+
+    def __init__(self, primary, shadow):
+        self.primary = primary
+        self.shadow = shadow
+
+    def check_resources(
+        self,
+        principal: Principal,
+        resources: ResourceList,
+        request_id: Optional[str] = None,
+        aux_data: Any = None,
+    ) -> CheckResourcesResponse:
+        response = self.primary.check_resources(
+            principal=principal,
+            resources=resources,
+            request_id=request_id,
+            aux_data=aux_data
+        )
+        self.compare(principal, resources, response)
+        return response
+
+    def compare(self, principal: Principal, resources: ResourceList, response: CheckResourcesResponse) -> None:
+        """Evaluate the request with the embedded engine and log disagreements"""
+        if response.failed():
+            return
+
+        try:
+            shadow_response = self.shadow.check_resources(principal=principal, resources=resources)
+            self._compare(principal, resources, response, shadow_response)
+        except Exception as e:
+            logger.warning("Embedded policy engine failed in shadow mode: %s", e)
+
+    def is_allowed(
+        self,
+        action: str,
+        principal: Principal,
+        resource: Resource,
+        request_id: Optional[str] = None,
+        aux_data: Any = None,
+    ) -> bool:
+        response = self.check_resources(
+            principal=principal,
+            resources=ResourceList().add(resource, {action}),
+            request_id=request_id,
+            aux_data=aux_data
+        )
+        result = response.get_resource(resource.id)
+        return result is not None and result.is_allowed(action)
+
+    def plan_resources(self, *args, **kwargs) -> PlanResourcesResponse:
+        """Query plans are always served by the remote PDP"""
+        return self.primary.plan_resources(*args, **kwargs)
+
+    def _compare(self, principal, resources, response, shadow_response) -> None:
+        for entry in resources.resources:
+            remote = response.get_resource(entry.resource.id)
+            local = shadow_response.get_resource(entry.resource.id)
+            for action in entry.actions:
+                remote_allowed = remote is not None and remote.is_allowed(action)
+                local_allowed = local is not None and local.is_allowed(action)
+                if remote_allowed != local_allowed:
+                    logger.warning(
+                        "Cerbos shadow disagreement: principal=%s roles=%s resource=%s:%s "
+                        "action=%s remote=%s embedded=%s",
+                        principal.id, sorted(principal.roles), entry.resource.kind,
+                        entry.resource.id, action, remote_allowed, local_allowed
+                    )
+
+
+class AsyncEmbeddedPolicyEngine:
+    """
+    Async facade over EmbeddedPolicyEngine, matching AsyncCerbosClient.
+    Evaluation is CPU-only and fast, so it runs directly on the event loop.
+    """
+
+    def __init__(self, engine: EmbeddedPolicyEngine):
+        self.engine = engine
+
+    async def check_resources(self, *args, **kwargs) -> CheckResourcesResponse:
+        return self.engine.check_resources(*args, **kwargs)
+
+    async def is_allowed(self, *args, **kwargs) -> bool:
+        return self.engine.is_allowed(*args, **kwargs)
+
+    async def plan_resources(self, *args, **kwargs) -> PlanResourcesResponse:
+        return self.engine.plan_resources(*args, **kwargs)
+
+
+class AsyncShadowPolicyClient(ShadowPolicyClient):
+    """Shadow mode on top of AsyncCerbosClient"""
+
+    async def check_resources(
+        self,
+        principal: Principal,
+        resources: ResourceList,
+        request_id: Optional[str] = None,
+        aux_data: Any = None,
+    ) -> CheckResourcesResponse:
+        response = await self.primary.check_resources(
+            principal=principal,
+            resources=resources,
+            request_id=request_id,
+            aux_data=aux_data
+        )
+        self.compare(principal, resources, response)
+        return response
+
+    async def is_allowed(
+        self,
+        action: str,
+        principal: Principal,
+        resource: Resource,
+        request_id: Optional[str] = None,
+        aux_data: Any = None,
+    ) -> bool:
+        response = await self.check_resources(
+            principal=principal,
+            resources=ResourceList().add(resource, {action}),
+            request_id=request_id,
+            aux_data=aux_data
+        )
+        result = response.get_resource(resource.id)
+        return result is not None and result.is_allowed(action)
+
+    async def plan_resources(self, *args, **kwargs) -> PlanResourcesResponse:
+        return await self.primary.plan_resources(*args, **kwargs)
@@ -0,0 +1,23 @@
+"""
+Signal handlers for the permissions app
+Keep authorization caches consistent with role data stored in Django
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from apps.permissions.models import Role, RoleAssignment
+from apps.permissions.services import cerbos_service
+
+# Sent once after role assignments were changed in bulk (bulk_create/update
+# send no post_save). Arguments: user_ids - users whose assignments changed
+role_assignments_changed = Signal()
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=RoleAssignment)
+@receiver(post_delete, sender=RoleAssignment)
+@receiver(role_assignments_changed)
+def invalidate_decision_cache(sender, **kwargs):
+    """Drop cached Cerbos decisions whenever roles or assignments change"""
+    cerbos_service.decision_cache.clear()
@@ -0,0 +1,38 @@
+"""
+Tests for the request-scoped authorization context
+"""
+from unittest import mock
+
+import pytest
+from django.test import RequestFactory
+
+from apps.permissions.services import AuthorizationContext
+from apps.users.models import User
+
+
+def allow_all(user, resource_type, resources, actions, roles):
+    return {resource_id: {action: True for action in actions} for resource_id in resources}
+
+
+@pytest.mark.django_db
+def test_check_batch_only_sends_undecided_pairs():
+    request = RequestFactory().get('/')
+    request.user = User.objects.create_user(email='ana@example.com')
+    context = AuthorizationContext(request)
+
+    with mock.patch(
+        'apps.permissions.services.authorization_context.cerbos_service'
+    ) as cerbos:
+        cerbos.check_user_permissions_batch.side_effect = allow_all
+        context.check_batch('user', {'1': {}}, ['read'])
+        context.check_batch('user', {'2': {}}, ['read', 'update'])
+        cerbos.check_user_permissions_batch.reset_mock()
+
+        results = context.check_batch('user', {'1': {}, '2': {}, '3': {}}, ['read', 'update'])
+
+    calls = sorted(
+        (sorted(call.kwargs['resources']), call.kwargs['actions'])
+        for call in cerbos.check_user_permissions_batch.call_args_list
+    )
+    assert calls == [(['1'], ['update']), (['3'], ['read', 'update'])]
+    assert all(results[resource_id] == {'read': True, 'update': True} for resource_id in '123')
@@ -0,0 +1,136 @@
+"""
+Tests for the embedded Cerbos policy engine and query plan filtering
+"""
+from decimal import Decimal
+
+import pytest
+from cerbos.sdk.model import PlanResourcesFilterKind, Principal, Resource, ResourceDesc
+from django.conf import settings
+from django.db.models import Q
+
+from apps.permissions.filters import plan_condition_to_q
+from apps.permissions.services.policy_engine import (
+    EmbeddedPolicyEngine,
+    PolicyCompileError,
+    compile_expression,
+)
+from apps.users.models import Customer
+
+CUSTOMER_POLICY = '''
+apiVersion: api.cerbos.dev/v1
+resourcePolicy:
+  version: "default"
+  resource: "customer"
+  rules:
+    - actions: ['list']
+      effect: EFFECT_ALLOW
+      roles: ["sales"]
+      condition:
+        match:
+          all:
+            of:
+              - expr: request.resource.attr.city == "Málaga"
+              - any:
+                  of:
+                    - expr: request.resource.attr.credit_limit >= 100
+                    - expr: request.principal.attr.vip == true
+    - actions: ['list']
+      effect: EFFECT_DENY
+      roles: ["sales"]
+      condition:
+        match:
+          expr: request.resource.attr.is_active_customer == false
+'''
+
+
+def principal(user_id='7', roles=('customer',), **attr):
+    attr = {'is_superuser': False, 'is_staff': False, 'user_type': 'CUSTOMER', **attr}
+    return Principal(id=user_id, roles=set(roles), attr=attr)
+
+
+def plan(engine, user):
+    return engine.plan_resources('list', user, ResourceDesc('customer')).filter
+
+
+@pytest.fixture
+def engine():
+    return EmbeddedPolicyEngine(settings.CERBOS_POLICY_DIR)
+
+
+@pytest.fixture
+def sales_engine(tmp_path):
+    (tmp_path / 'customer.yaml').write_text(CUSTOMER_POLICY, encoding='utf-8')
+    return EmbeddedPolicyEngine(tmp_path)
+
+
+def test_customer_list_plan_is_the_own_record(engine):
+    plan_filter = plan(engine, principal('7'))
+
+    assert plan_filter.kind == PlanResourcesFilterKind.CONDITIONAL
+    assert plan_condition_to_q(plan_filter.condition) == Q(pk__exact='7')
+
+
+def test_customer_list_plan_for_staff_and_other_roles(engine):
+    assert plan(engine, principal(is_staff=True)).kind == PlanResourcesFilterKind.ALWAYS_ALLOWED
+    assert plan(engine, principal(roles=('sales',))).kind == PlanResourcesFilterKind.ALWAYS_DENIED
+
+
+@pytest.mark.django_db
+def test_conditional_plan_translates_to_an_equivalent_filter(sales_engine):
+    def customer(email, city, credit_limit, active=True):
+        return Customer.objects.create(
+            email=email, first_name='A', last_name='B', city=city,
+            credit_limit=Decimal(credit_limit), is_active_customer=active
+        )
+
+    visible = customer('a@example.com', 'Málaga', 500)
+    customer('b@example.com', 'Málaga', 10)
+    customer('c@example.com', 'Quito', 500)
+    customer('d@example.com', 'Málaga', 500, active=False)
+
+    condition = plan(sales_engine, principal(roles=('sales',), vip=False)).condition
+    q = plan_condition_to_q(condition)
+    assert q == (
+        Q(city__exact='Málaga') & Q(credit_limit__gte=100) & ~Q(is_active_customer__exact=False)
+    )
+    assert list(Customer.objects.filter(q)) == [visible]
+
+    # A known operand decides the '||': only the city is left in the plan
+    condition = plan(sales_engine, principal(roles=('sales',), vip=True)).condition
+    assert plan_condition_to_q(condition) == (
+        Q(city__exact='Málaga') & ~Q(is_active_customer__exact=False)
+    )
+
+
+def test_string_literals_keep_non_ascii_text_and_escapes():
+    assert compile_expression('"Málaga"').evaluate({}) == 'Málaga'
+    assert compile_expression("'Peñón \\'B\\''").evaluate({}) == "Peñón 'B'"
+    assert compile_expression('"a\\tb"').evaluate({}) == 'a\tb'
+    with pytest.raises(PolicyCompileError):
+        compile_expression('"\\N{no existe}"')
+
+
+def test_bool_operands_are_evaluated_independently(sales_engine):
+    def allowed(expr, **attr):
+        (sales_engine.policy_dir / 'customer.yaml').write_text(f'''
+apiVersion: api.cerbos.dev/v1
+resourcePolicy:
+  resource: "customer"
+  rules:
+    - actions: ['read']
+      effect: EFFECT_ALLOW
+      roles: ["*"]
+      condition:
+        match:
+          expr: '{expr}'
+''', encoding='utf-8')
+        sales_engine.load()
+        resource = Resource(id='1', kind='customer', attr=attr)
+        return sales_engine.is_allowed('read', principal(), resource)
+
+    # The missing attribute does not matter once another operand decides
+    assert allowed('R.attr.missing == 1 || R.attr.open == true', open=True)
+    assert not allowed('R.attr.missing == 1 || R.attr.open == true', open=False)
+    assert not allowed('R.attr.open == true && R.attr.missing == 1', open=False)
+    assert not allowed('!(R.attr.open == true && R.attr.missing == 1)', open=True)
+    assert allowed('!(R.attr.open == true && R.attr.missing == 1)', open=False)
@@ -0,0 +1,101 @@
+"""
+Tests for bulk role assignment (POST /api/permissions/role-assignments/bulk/)
+"""
+import pytest
+from rest_framework.test import APIClient
+
+from apps.permissions.models import Role, RoleAssignment
+from apps.users.models import User
+
+BULK_URL = '/api/permissions/role-assignments/bulk/'
+
+
+@pytest.fixture
+def roles():
+    return [
+        Role.objects.create(code='vendedor', name='Vendedor'),
+        Role.objects.create(code='bodega', name='Bodega'),
+    ]
+
+
+@pytest.fixture
+def users():
+    return [User.objects.create_user(email=f'usuario{i}@example.com') for i in range(5)]
+
+
+def counts(response):
+    return response.data['created'], response.data['reactivated'], response.data['skipped']
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.mark.django_db
+def test_user_without_permission_cannot_assign_roles(roles, users):
+    response = client_for(users[0]).post(
+        BULK_URL,
+        {'role_ids': [role.id for role in roles], 'user_ids': [users[0].id]},
+        format='json'
+    )
+
+    assert response.status_code == 403
+    assert not RoleAssignment.objects.exists()
+
+
+@pytest.mark.django_db
+def test_admin_cannot_assign_system_roles(roles, users):
+    admin_role = Role.objects.create(code='admin', name='Administrador', cerbos_role='admin')
+    system_role = Role.objects.create(code='sistema', name='Sistema', is_system=True)
+    admin = User.objects.create_user(email='admin@example.com', is_staff=True)
+    RoleAssignment.objects.create(user=admin, role=admin_role)
+    client = client_for(admin)
+
+    response = client.post(
+        BULK_URL,
+        {'role_ids': [roles[0].id, system_role.id], 'user_ids': [users[0].id]},
+        format='json'
+    )
+    assert response.status_code == 403
+    assert not RoleAssignment.objects.filter(user=users[0]).exists()
+
+    response = client.post(
+        BULK_URL, {'role_ids': [roles[0].id], 'user_ids': [users[0].id]}, format='json'
+    )
+    assert response.status_code == 200
+    assert response.data['created'] == 1
+
+
+@pytest.mark.django_db
+def test_single_assignment_requires_permission(roles, users):
+    response = client_for(users[0]).post(
+        '/api/permissions/role-assignments/',
+        {'user': users[0].id, 'role': roles[0].id},
+        format='json'
+    )
+
+    assert response.status_code == 403
+    assert not RoleAssignment.objects.exists()
+
+
+@pytest.mark.django_db
+def test_superuser_counts_created_reactivated_and_skipped(roles, users):
+    superuser = User.objects.create_superuser(email='root@example.com', password='secreto')
+    RoleAssignment.objects.create(user=users[0], role=roles[0])
+    RoleAssignment.objects.create(user=users[1], role=roles[0], is_active=False)
+    payload = {'role_ids': [role.id for role in roles], 'user_ids': [user.id for user in users]}
+    client = client_for(superuser)
+
+    response = client.post(BULK_URL, payload, format='json')
+    assert response.status_code == 200
+    assert counts(response) == (8, 1, 1)
+
+    # Assignments without scope are not deduplicated by the unique constraint
+    response = client.post(BULK_URL, payload, format='json')
+    assert counts(response) == (0, 0, 10)
+    assert RoleAssignment.objects.filter(scope_type__isnull=True).count() == 10
+    assert set(
+        RoleAssignment.objects.filter(user=users[4]).values_list('assigned_by_id', flat=True)
+    ) == {superuser.id}
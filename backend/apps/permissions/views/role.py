@@ -2,15 +2,19 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import PermissionDenied
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from django.db.models import Count, Q
 
 from apps.permissions.models import Role, RoleAssignment
+from apps.permissions.services.authorization_context import get_authorization_context
 from apps.permissions.serializers import (
     RoleSerializer,
     RoleListSerializer,
     RoleCreateUpdateSerializer,
-    RoleAssignmentSerializer
+    RoleAssignmentSerializer,
+    RoleAssignmentBulkSerializer
 )
 
 
@@ -39,7 +43,25 @@ class RoleViewSet(viewsets.ModelViewSet):
         if is_system is not None:
             queryset = queryset.filter(is_system=is_system.lower() == 'true')
 
-        return queryset.prefetch_related('functions').select_related('created_by')
+        # Counts are computed in the same query instead of one COUNT(*) per row
+        queryset = queryset.select_related('created_by').annotate(
+            users_count=Count(
+                'role_assignments',
+                filter=Q(role_assignments__is_active=True),
+                distinct=True
+            ),
+            functions_count=Count(
+                'functions',
+                filter=Q(functions__is_active=True),
+                distinct=True
+            )
+        )
+
+        # The list serializer does not render nested functions
+        if self.action != 'list':
+            queryset = queryset.prefetch_related('functions')
+
+        return queryset
 
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -157,6 +179,9 @@ class RoleAssignmentViewSet(viewsets.ModelViewSet):
     queryset = RoleAssignment.objects.all()
     serializer_class = RoleAssignmentSerializer
     permission_classes = [IsAuthenticated]
+    # Cursor pagination unless ?page= is given
+    keyset_ordering = ('-assigned_at', '-id')
+    keyset_by_default = True
 
     def get_queryset(self):
         """Filter queryset based on query params"""
@@ -182,10 +207,70 @@ class RoleAssignmentViewSet(viewsets.ModelViewSet):
 
         return queryset.select_related('user', 'role', 'assigned_by')
 
+    def _denied_roles(self, roles):
+        """Roles the current user may not assign (Cerbos 'create' on role_assignment)"""
+        decisions = get_authorization_context(self.request).check_batch(
+            resource_type='role_assignment',
+            resources={
+                str(role.id): {'code': role.code, 'is_system': role.is_system, 'level': role.level}
+                for role in roles
+            },
+            actions=['create']
+        )
+        return [role for role in roles if not decisions[str(role.id)]['create']]
+
     def perform_create(self, serializer):
-        """Set assigned_by when creating an assignment"""
+        """Check the user may assign the role and set assigned_by"""
+        role = serializer.validated_data['role']
+        if self._denied_roles([role]):
+            raise PermissionDenied(f"No tienes permiso para asignar el rol {role.name}")
         serializer.save(assigned_by=self.request.user)
 
+    @swagger_auto_schema(
+        tags=['Asignación de roles'],
+        operation_description="Asignar varios roles a varios usuarios en una sola operación",
+        request_body=RoleAssignmentBulkSerializer,
+        responses={
+            200: openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'created': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    'reactivated': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    'skipped': openapi.Schema(type=openapi.TYPE_INTEGER)
+                }
+            ),
+            400: "Datos inválidos (usuarios o roles no encontrados)",
+            403: "Sin permiso para asignar alguno de los roles"
+        }
+    )
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        POST /api/permissions/role-assignments/bulk/
+        Expects: { "role_ids": [1, 2], "user_ids": [10, 11, ...],
+                   "expires_at": null, "scope": null }
+        """
+        serializer = RoleAssignmentBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # Every role is authorized before anything is inserted
+        denied = self._denied_roles(serializer.roles)
+        if denied:
+            codes = sorted(role.code for role in denied)
+            return Response(
+                {'detail': f"No tienes permiso para asignar los roles: {codes}"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        result = serializer.save(assigned_by=request.user)
+
+        return Response({
+            'message': f"{result['created']} asignaciones creadas, "
+                       f"{result['reactivated']} reactivadas, "
+                       f"{result['skipped']} ya existentes",
+            **result
+        })
+
     @swagger_auto_schema(
         tags=['Asignación de roles'],
         operation_description="Listar todas las asignaciones de roles",
@@ -207,6 +292,12 @@ class RoleAssignmentViewSet(viewsets.ModelViewSet):
                 openapi.IN_QUERY,
                 description="Filtrar por estado activo (true/false)",
                 type=openapi.TYPE_BOOLEAN
+            ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Paginación por cursor (vacío para la primera página)",
+                type=openapi.TYPE_STRING
             )
         ]
     )
@@ -0,0 +1,45 @@
+"""
+Authentication classes for the API
+"""
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from apps.users.services.auth_cache import get_auth_user
+from apps.users.services.token_claims import roles_from_token
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves the user through the authenticated user cache.
+
+    Same checks as JWTAuthentication, but the user (and its principal with
+    flags and active role codes, in `request.user.auth_principal`) comes from
+    a short-lived cache entry invalidated when the user or its role
+    assignments change, instead of a query on every request.
+
+    With AUTH_ROLE_CLAIMS, roles come from the token claims while the token's
+    role set version is current; otherwise they are loaded as usual.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user = get_auth_user(user_id, roles=roles_from_token(validated_token, user_id))
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # The password hash is not cached: this loads it from the database
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
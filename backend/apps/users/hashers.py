@@ -0,0 +1,40 @@
+"""
+Password hashers with costs taken from settings
+Same algorithm names as Django's hashers, so existing hashes keep verifying;
+when a cost setting changes, hashes are upgraded on the next successful login
+(Django rehashes when must_update() is true).
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2id; requires argon2-cffi"""
+
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    """bcrypt over a SHA256 digest of the password; requires bcrypt"""
+
+    @property
+    def rounds(self):
+        return settings.BCRYPT_ROUNDS
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 (Django's default algorithm)"""
+
+    @property
+    def iterations(self):
+        return settings.PBKDF2_ITERATIONS
@@ -0,0 +1,100 @@
+"""
+Management command to benchmark login throughput per password hasher
+For each hasher configuration, runs --logins authentications of a temporary
+user from --concurrency threads (password verification goes through the
+password thread pool) and reports logins/sec and logins/sec per core.
+Usage: python manage.py benchmark_login [--hashers argon2 bcrypt pbkdf2] [--logins 200]
+       [--concurrency 8]
+"""
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from apps.users.models import User
+
+BENCH_EMAIL = 'benchmark.login@example.com'
+BENCH_PASSWORD = 'Benchmark-Login-2024'
+HASHERS = {
+    'argon2': 'apps.users.hashers.Argon2PasswordHasher',
+    'bcrypt': 'apps.users.hashers.BCryptSHA256PasswordHasher',
+    'pbkdf2': 'apps.users.hashers.PBKDF2PasswordHasher',
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark logins/sec per core for each password hasher configuration'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hashers', nargs='+', choices=list(HASHERS), default=list(HASHERS))
+        parser.add_argument('--logins', type=int, default=200)
+        parser.add_argument(
+            '--concurrency', type=int, default=os.cpu_count() or 1, help='Concurrent login threads'
+        )
+
+    def handle(self, *args, **options):
+        workers = settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+        cores = max(1, min(workers, options['concurrency'], os.cpu_count() or 1))
+        self.stdout.write(
+            f"{options['logins']} logins, {options['concurrency']} threads, "
+            f"{workers} hashing workers, {cores} cores used"
+        )
+        self.stdout.write(f"{'hasher':>8} {'ms/login':>9} {'logins/s':>9} {'per core':>9}")
+
+        for name in options['hashers']:
+            with override_settings(PASSWORD_HASHERS=[HASHERS[name]]):
+                hasher = get_hasher('default')
+                try:
+                    if hasher.library:
+                        hasher._load_library()
+                except ValueError as e:
+                    self.stdout.write(self.style.WARNING(f'{name:>8} skipped: {e}'))
+                    continue
+
+                user = User.objects.create_user(email=BENCH_EMAIL, password=BENCH_PASSWORD)
+                try:
+                    single = self._run(1, 1)
+                    elapsed = self._run(options['logins'], options['concurrency'])
+                finally:
+                    user.delete()
+
+            rate = options['logins'] / elapsed
+            self.stdout.write(f'{name:>8} {single * 1000:>9.1f} {rate:>9.1f} {rate / cores:>9.1f}')
+
+        self.stdout.write(self.style.SUCCESS('\n[SUCCESS] Benchmark finished'))
+
+    @staticmethod
+    def _run(logins: int, concurrency: int) -> float:
+        remaining = [logins]
+        lock = threading.Lock()
+        failures = []
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        if remaining[0] <= 0:
+                            return
+                        remaining[0] -= 1
+                    if authenticate(username=BENCH_EMAIL, password=BENCH_PASSWORD) is None:
+                        failures.append(1)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        if failures:
+            raise RuntimeError(f'{len(failures)} logins failed')
+        return elapsed
@@ -0,0 +1,57 @@
+"""
+Management command to benchmark username generation in UserManager.create_user
+Creates users sharing one email local part inside a transaction that is rolled back.
+Usage: python manage.py benchmark_usernames [--users 10000] [--local-part ventas]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.users.models import User
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark create_user with many users sharing the same email local part'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--local-part', default='ventas')
+        parser.add_argument('--keep', action='store_true', help='Keep the created users')
+
+    def handle(self, *args, **options):
+        total = options['users']
+        local_part = options['local_part']
+        queries = []
+
+        def count_queries(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        self.stdout.write(f'Creating {total} users with local part "{local_part}"...')
+        started = time.perf_counter()
+        try:
+            with transaction.atomic(), connection.execute_wrapper(count_queries):
+                for number in range(total):
+                    # No password: hashing would dominate the measurement
+                    User.objects.create_user(email=f'{local_part}@bench{number}.example.com')
+                    if (number + 1) % 1000 == 0:
+                        elapsed = time.perf_counter() - started
+                        self.stdout.write(f'  ... {number + 1} users, {elapsed:.1f}s')
+                if not options['keep']:
+                    raise _Rollback
+        except _Rollback:
+            pass
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'  [OK] {total} users in {elapsed:.2f}s '
+            f'({elapsed / total * 1000:.2f} ms/user, {len(queries) / total:.1f} queries/user)'
+        )
+        if not options['keep']:
+            self.stdout.write('  [OK] Rolled back')
+        self.stdout.write(self.style.SUCCESS('\n[SUCCESS] Benchmark finished'))
@@ -0,0 +1,69 @@
+"""
+Management command to bulk import customers from a CSV or JSONL file
+Usage: python manage.py import_customers clientes.csv [--batch-size 1000] [--errors errores.json]
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users.models import User
+from apps.users.services.customer_import import (
+    IMPORT_BATCH_SIZE,
+    IMPORT_FORMATS,
+    CustomerImporter,
+    detect_import_format,
+    read_import_rows
+)
+
+
+class Command(BaseCommand):
+    help = 'Bulk import customers from a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with header) or JSONL file')
+        parser.add_argument('--file-format', choices=IMPORT_FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--assigned-by', help='Email of the user recorded as assigner of the customer role')
+        parser.add_argument('--errors', help='Write the per-row errors to this JSON file')
+
+    def handle(self, *args, **options):
+        file_format = options['file_format'] or detect_import_format(options['path'])
+        if file_format is None:
+            raise CommandError('Unknown file format, use --file-format csv|jsonl')
+
+        assigned_by = None
+        if options['assigned_by']:
+            assigned_by = User.objects.filter(email=options['assigned_by']).first()
+            if assigned_by is None:
+                raise CommandError(f"User not found: {options['assigned_by']}")
+
+        importer = CustomerImporter(assigned_by=assigned_by, batch_size=options['batch_size'])
+        started = time.perf_counter()
+
+        with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+            result = importer.run(self._progress(read_import_rows(stream, file_format), options['batch_size']))
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"  [OK] {result['created']} customers created, {result['failed']} rows failed "
+            f"of {result['total']} ({elapsed:.1f}s)"
+        )
+
+        if options['errors']:
+            with open(options['errors'], 'w', encoding='utf-8') as errors_file:
+                json.dump(result['errors'], errors_file, ensure_ascii=False, indent=2, default=str)
+            self.stdout.write(f"  [OK] Errors written to {options['errors']}")
+        else:
+            for error in result['errors'][:20]:
+                self.stdout.write(self.style.WARNING(f"  Row {error['row']}: {error['errors']}"))
+            if result['failed'] > 20:
+                self.stdout.write(self.style.WARNING(f"  ... {result['failed'] - 20} more (use --errors)"))
+
+        self.stdout.write(self.style.SUCCESS('\n[SUCCESS] Import finished'))
+
+    def _progress(self, rows, batch_size):
+        for count, row in enumerate(rows, start=1):
+            yield row
+            if count % (batch_size * 10) == 0:
+                self.stdout.write(f'  ... {count} rows read')
@@ -0,0 +1,44 @@
+"""
+Management command to delete expired refresh tokens from the token blacklist tables
+Meant to run on a schedule (cron). Unlike simplejwt's flushexpiredtokens, rows
+are deleted in small batches, each in its own transaction.
+Usage: python manage.py prune_token_blacklist [--batch-size 5000] [--pause 0.1] [--dry-run]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from apps.users.services.token_revocation import PRUNE_BATCH_SIZE, prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted refresh tokens in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PRUNE_BATCH_SIZE)
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the expired tokens')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = OutstandingToken.objects.filter(expires_at__lte=now)
+
+        if options['dry_run']:
+            self.stdout.write(
+                f'  {expired.count()} expired tokens '
+                f'({BlacklistedToken.objects.filter(token__expires_at__lte=now).count()} blacklisted)'
+            )
+            return
+
+        started = time.perf_counter()
+        total = 0
+        for deleted in prune_expired_tokens(batch_size=options['batch_size'], pause=options['pause'], now=now):
+            total += deleted
+            if total % (options['batch_size'] * 20) == 0:
+                self.stdout.write(f'  ... {total} tokens deleted')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'  [OK] {total} expired tokens deleted ({elapsed:.1f}s)')
+        self.stdout.write(self.style.SUCCESS('\n[SUCCESS] Token blacklist pruned'))
@@ -0,0 +1,55 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:16
+
+from django.db import migrations, models
+
+CUSTOMER_CODE_SEQUENCE = 'users_customer_code_seq'
+
+
+def create_customer_code_sequence(apps, schema_editor):
+    """PostgreSQL sequence for customer codes, starting after the highest existing code"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f"CREATE SEQUENCE IF NOT EXISTS {CUSTOMER_CODE_SEQUENCE}")
+    schema_editor.execute(
+        f"""
+        SELECT setval(
+            '{CUSTOMER_CODE_SEQUENCE}',
+            COALESCE((
+                SELECT MAX(CAST(SUBSTRING(customer_code FROM 4) AS BIGINT))
+                FROM users_customer
+                WHERE customer_code ~ '^CLI[0-9]+$'
+            ), 0) + 1,
+            false
+        )
+        """
+    )
+
+
+def drop_customer_code_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f"DROP SEQUENCE IF EXISTS {CUSTOMER_CODE_SEQUENCE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Nombre')),
+                ('last_value', models.BigIntegerField(default=0, verbose_name='Último valor')),
+            ],
+            options={
+                'verbose_name': 'Secuencia de códigos',
+                'verbose_name_plural': 'Secuencias de códigos',
+                'db_table': 'users_codesequence',
+            },
+        ),
+        migrations.RunPython(create_customer_code_sequence, drop_customer_code_sequence),
+    ]
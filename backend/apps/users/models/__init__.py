@@ -1,5 +1,6 @@
 from .user import User
 from .profile import UserProfile
 from .customer import Customer
+from .sequence import CodeSequence
 
-__all__ = ['User', 'UserProfile', 'Customer']
+__all__ = ['User', 'UserProfile', 'Customer', 'CodeSequence']
@@ -141,20 +141,12 @@ class Customer(User):
         if not self.pk:  # Only on creation
             self.is_staff = False
 
-        # Generate customer_code if not provided
+        # Generate customer_code if not provided (one sequence call, safe under concurrency)
         if not self.customer_code:
-            # Get the last customer code
-            last_customer = Customer.objects.all().order_by('-id').first()
-            if last_customer and last_customer.customer_code.startswith('CLI'):
-                try:
-                    last_number = int(last_customer.customer_code[3:])
-                    new_number = last_number + 1
-                except (ValueError, IndexError):
-                    new_number = 1
-            else:
-                new_number = 1
-
-            self.customer_code = f"CLI{new_number:06d}"
+            # Import here to avoid circular imports
+            from apps.users.services.customer_codes import next_customer_code
+
+            self.customer_code = next_customer_code()
 
         super().save(*args, **kwargs)
 
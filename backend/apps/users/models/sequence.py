@@ -0,0 +1,30 @@
+"""
+CodeSequence model
+Named counters used to allocate codes on databases without native sequences
+"""
+from django.db import models
+
+
+class CodeSequence(models.Model):
+    """
+    Named counter, fallback for databases without sequences (SQLite in tests).
+    On PostgreSQL codes come from real sequences and this table stays empty.
+    """
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name='Nombre'
+    )
+
+    last_value = models.BigIntegerField(
+        default=0,
+        verbose_name='Último valor'
+    )
+
+    class Meta:
+        db_table = 'users_codesequence'
+        verbose_name = 'Secuencia de códigos'
+        verbose_name_plural = 'Secuencias de códigos'
+
+    def __str__(self):
+        return f"{self.name}: {self.last_value}"
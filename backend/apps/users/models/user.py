@@ -2,10 +2,18 @@
 User model based on UML diagram
 User = Persona (todos son usuarios: empleados, clientes, proveedores, etc.)
 """
+import re
+
 from django.contrib.auth.models import AbstractUser, BaseUserManager
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, Max, Q
+from django.db.models.functions import Cast, Substr
 from apps.core.models import TimeStampedModel
 
+USERNAME_RETRIES = 5
+# Longest numeric username suffix considered, so that it fits a BigInteger
+USERNAME_SUFFIX_DIGITS = 18
+
 
 class UserManager(BaseUserManager):
     """
@@ -18,20 +26,51 @@ class UserManager(BaseUserManager):
         if not email:
             raise ValueError('The Email must be set')
         email = self.normalize_email(email)
-        
+
         # Use email part as username, ensuring uniqueness
-        username = email.split('@')[0]
-        counter = 1
-        temp_username = username
-        while self.model.objects.filter(username=temp_username).exists():
-            temp_username = f"{username}{counter}"
-            counter += 1
-        username = temp_username
-
-        user = self.model(username=username, email=email, **extra_fields)
+        base = email.split('@')[0]
+        user = self.model(username=self.generate_username(base), email=email, **extra_fields)
         user.set_password(password)
-        user.save(using=self._db)
-        return user
+
+        for attempt in range(USERNAME_RETRIES):
+            try:
+                with transaction.atomic(using=self._db):
+                    user.save(using=self._db)
+                return user
+            except IntegrityError:
+                # Lost a race for the username: pick the next free one and retry
+                if attempt == USERNAME_RETRIES - 1:
+                    raise
+                if not self._usernames().filter(username=user.username).exists():
+                    raise
+                user.username = self.generate_username(base)
+
+    def _usernames(self):
+        """All users (usernames live in users_user, also for Customer's manager)"""
+        return self.model._meta.get_field('username').model._base_manager.db_manager(self._db).all()
+
+    def generate_username(self, base):
+        """
+        Return `base`, or `base` followed by the next free number, with one query.
+        Existing `base<digits>` usernames are aggregated in the database instead
+        of probing base1, base2, ... one query at a time.
+        """
+        candidates = self._usernames().filter(
+            # Index range scan first, the regex only checks the rows in range
+            username__gte=base,
+            username__lte=base + '9' * USERNAME_SUFFIX_DIGITS,
+            username__regex=rf'^{re.escape(base)}[0-9]{{0,{USERNAME_SUFFIX_DIGITS}}}$'
+        )
+        taken = candidates.aggregate(
+            base_taken=Count('pk', filter=Q(username=base)),
+            max_suffix=Max(
+                Cast(Substr('username', len(base) + 1), models.BigIntegerField()),
+                filter=~Q(username=base)
+            )
+        )
+        if not taken['base_taken'] and taken['max_suffix'] is None:
+            return base
+        return f"{base}{(taken['max_suffix'] or 0) + 1}"
 
     def create_superuser(self, email, password=None, **extra_fields):
         """
@@ -151,6 +190,9 @@ class User(AbstractUser, TimeStampedModel):
             models.Index(fields=['is_active']),
             models.Index(fields=['ci']),
             models.Index(fields=['user_type']),
+            # Keyset pagination of users and customers
+            models.Index(fields=['date_joined', 'id']),
+            models.Index(fields=['created_at', 'id']),
         ]
 
     def __str__(self):
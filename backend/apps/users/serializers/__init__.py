@@ -1,7 +1,13 @@
 from .user import UserSerializer, UserCreateSerializer, UserUpdateSerializer, ProfileUpdateSerializer
 from .auth import LoginSerializer, RegisterSerializer, TokenSerializer, CustomTokenObtainPairSerializer
 from .profile import UserProfileSerializer
-from .customer import CustomerSerializer, CustomerCreateSerializer, CustomerUpdateSerializer, CustomerProfileUpdateSerializer
+from .customer import (
+    CustomerSerializer,
+    CustomerCreateSerializer,
+    CustomerUpdateSerializer,
+    CustomerProfileUpdateSerializer,
+    CustomerImportSerializer
+)
 
 __all__ = [
     'UserSerializer',
@@ -17,4 +23,5 @@ __all__ = [
     'CustomerCreateSerializer',
     'CustomerUpdateSerializer',
     'CustomerProfileUpdateSerializer',
+    'CustomerImportSerializer',
 ]
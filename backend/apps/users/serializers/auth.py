@@ -5,6 +5,8 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from apps.users.tokens import IndexedRefreshToken
+
 
 class LoginSerializer(serializers.Serializer):
     """
@@ -41,6 +43,17 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     Custom token serializer to use email and add user data to the response.
     """
     username_field = 'email'
+    token_class = IndexedRefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        # Import here to avoid circular imports
+        from apps.users.services import add_role_claims
+
+        # Copied to the access token (no-op unless AUTH_ROLE_CLAIMS)
+        add_role_claims(token, user)
+        return token
 
     def validate(self, attrs):
         # The default result is `{'access': ..., 'refresh': ...}`
@@ -4,6 +4,7 @@ Customer serializers
 from rest_framework import serializers
 from apps.users.models import Customer, User
 from apps.permissions.models import RoleAssignment, Role
+from apps.permissions.services.authorization_context import get_authorization_context
 
 
 class CustomerSerializer(serializers.ModelSerializer):
@@ -80,7 +81,15 @@ class CustomerSerializer(serializers.ModelSerializer):
 
     def get_roles(self, obj):
         """Get active roles assigned to the customer"""
-        active_assignments = obj.role_assignments.filter(is_active=True).select_related('role')
+        request = self.context.get('request')
+        if hasattr(obj, 'active_role_assignments'):
+            # Prefetched by the list queryset (RoleAssignment.prefetch_active)
+            active_assignments = obj.active_role_assignments
+        elif request is not None and obj.pk == request.user.pk:
+            # The requesting user's roles are already loaded by the authorization context
+            active_assignments = get_authorization_context(request).role_assignments
+        else:
+            active_assignments = obj.role_assignments.filter(is_active=True).select_related('role')
         return [
             {
                 'id': assignment.role.id,
@@ -184,6 +193,40 @@ class CustomerCreateSerializer(serializers.ModelSerializer):
         return customer
 
 
+class CustomerImportSerializer(CustomerCreateSerializer):
+    """
+    Row validation for bulk customer imports.
+    Uniqueness of email, ci and tax_id is checked for the whole batch by the
+    importer (apps.users.services.customer_import), not per row. Customer
+    codes are always assigned by the importer.
+    """
+    password = serializers.CharField(write_only=True, min_length=8, required=False)
+
+    class Meta(CustomerCreateSerializer.Meta):
+        fields = [field for field in CustomerCreateSerializer.Meta.fields if field != 'username']
+        extra_kwargs = {
+            'email': {'validators': []},
+            'ci': {'validators': []},
+        }
+
+    def validate_email(self, value):
+        return value
+
+    def validate_ci(self, value):
+        return value
+
+    def validate_tax_id(self, value):
+        return value
+
+    def validate(self, attrs):
+        """Reject customer codes in the file instead of silently replacing them"""
+        if self.initial_data.get('customer_code'):
+            raise serializers.ValidationError({
+                'customer_code': ['El código de cliente se asigna automáticamente']
+            })
+        return attrs
+
+
 class CustomerUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer for updating customers by admin.
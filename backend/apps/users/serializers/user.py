@@ -1,9 +1,13 @@
 """
 User serializers
 """
+from django.db import transaction
+from django.db.models import Q
 from rest_framework import serializers
 from apps.users.models import User
 from apps.permissions.models import RoleAssignment, Role
+from apps.permissions.services.authorization_context import get_authorization_context
+from apps.permissions.signals import role_assignments_changed
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -57,7 +61,15 @@ class UserSerializer(serializers.ModelSerializer):
 
     def get_roles(self, obj):
         """Get active roles assigned to the user"""
-        active_assignments = obj.role_assignments.filter(is_active=True).select_related('role')
+        request = self.context.get('request')
+        if hasattr(obj, 'active_role_assignments'):
+            # Prefetched by the list queryset (RoleAssignment.prefetch_active)
+            active_assignments = obj.active_role_assignments
+        elif request is not None and obj.pk == request.user.pk:
+            # The requesting user's roles are already loaded by the authorization context
+            active_assignments = get_authorization_context(request).role_assignments
+        else:
+            active_assignments = obj.role_assignments.filter(is_active=True).select_related('role')
         return [
             {
                 'id': assignment.role.id,
@@ -172,69 +184,79 @@ class UserUpdateSerializer(serializers.ModelSerializer):
             'role_ids',
         ]
 
+    def _sync_roles(self, instance, role_ids, assigned_by):
+        """
+        Make the user's active unscoped assignments match role_ids (plus the
+        system basic_user role, which is always kept). Desired and current
+        assignments are compared in memory from two queries; changes are one
+        bulk insert and two UPDATEs.
+
+        Returns:
+            bool: whether any assignment changed
+        """
+        roles = Role.objects.filter(
+            Q(id__in=set(role_ids)) | Q(code='basic_user', is_system=True)
+        ).values_list('id', 'code', 'is_system')
+        desired = {role_id for role_id, _, _ in roles}
+        basic_role_ids = {role_id for role_id, code, is_system in roles if code == 'basic_user' and is_system}
+
+        current = list(instance.role_assignments.values_list(
+            'id', 'role_id', 'scope_type', 'scope_id', 'is_active'
+        ))
+        unscoped = {
+            role_id: (assignment_id, is_active)
+            for assignment_id, role_id, scope_type, scope_id, is_active in current
+            if scope_type is None and scope_id is None
+        }
+
+        to_deactivate = [
+            assignment_id
+            for assignment_id, role_id, scope_type, scope_id, is_active in current
+            if is_active and role_id not in basic_role_ids
+            and not (role_id in desired and scope_type is None and scope_id is None)
+        ]
+        to_reactivate = [
+            assignment_id
+            for role_id, (assignment_id, is_active) in unscoped.items()
+            if role_id in desired and not is_active
+        ]
+        to_create = [
+            RoleAssignment(user=instance, role_id=role_id, assigned_by=assigned_by, is_active=True)
+            for role_id in desired - unscoped.keys()
+        ]
+
+        if to_deactivate:
+            RoleAssignment.objects.filter(id__in=to_deactivate).update(is_active=False)
+        if to_reactivate:
+            RoleAssignment.objects.filter(id__in=to_reactivate).update(is_active=True, assigned_by=assigned_by)
+        if to_create:
+            RoleAssignment.objects.bulk_create(to_create, ignore_conflicts=True)
+
+        changed = bool(to_deactivate or to_reactivate or to_create)
+        if changed:
+            # Roles prefetched by the view's queryset are stale now
+            instance.__dict__.pop('active_role_assignments', None)
+        return changed
+
     def update(self, instance, validated_data):
         """Update user instance and handle role assignments"""
         role_ids = validated_data.pop('role_ids', None)
 
-        # Debug logging
-        print(f"\n[DEBUG] Updating user {instance.username}")
-        print(f"[DEBUG] Received role_ids: {role_ids}")
-        print(f"[DEBUG] Type of role_ids: {type(role_ids)}")
+        with transaction.atomic():
+            # Update user fields
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
 
-        # Update user fields
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-
-        # Update role assignments if role_ids were provided
-        if role_ids is not None:
-            request = self.context.get('request')
-            assigned_by = request.user if request else None
-
-            # Deactivate all current role assignments EXCEPT the basic_user role
-            instance.role_assignments.filter(
-                is_active=True
-            ).exclude(
-                role__code='basic_user',
-                role__is_system=True
-            ).update(is_active=False)
-
-            # Create new role assignments
-            for role_id in role_ids:
-                try:
-                    role = Role.objects.get(id=role_id)
-                    # Check if assignment already exists (was deactivated)
-                    assignment, created = RoleAssignment.objects.get_or_create(
-                        user=instance,
-                        role=role,
-                        scope_type=None,
-                        scope_id=None,
-                        defaults={'assigned_by': assigned_by, 'is_active': True}
-                    )
-                    if not created:
-                        # Reactivate existing assignment
-                        assignment.is_active = True
-                        assignment.assigned_by = assigned_by
-                        assignment.save()
-                except Role.DoesNotExist:
-                    pass  # Skip invalid role IDs
-
-            # ALWAYS ensure the basic_user role is active
-            try:
-                basic_role = Role.objects.get(code='basic_user', is_system=True)
-                assignment, created = RoleAssignment.objects.get_or_create(
-                    user=instance,
-                    role=basic_role,
-                    scope_type=None,
-                    scope_id=None,
-                    defaults={'assigned_by': assigned_by, 'is_active': True}
-                )
-                if not created and not assignment.is_active:
-                    # Reactivate if it was somehow deactivated
-                    assignment.is_active = True
-                    assignment.save()
-            except Role.DoesNotExist:
-                pass  # If basic_user role doesn't exist, skip
+            # Update role assignments if role_ids were provided
+            if role_ids is not None:
+                request = self.context.get('request')
+                assigned_by = request.user if request else None
+                if self._sync_roles(instance, role_ids, assigned_by):
+                    transaction.on_commit(lambda: role_assignments_changed.send(
+                        sender=RoleAssignment,
+                        user_ids=[instance.pk]
+                    ))
 
         return instance
 
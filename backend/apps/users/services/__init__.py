@@ -0,0 +1,45 @@
+from .auth_cache import (
+    AuthPrincipal,
+    bump_role_set_versions,
+    full_user,
+    get_auth_user,
+    invalidate_auth_users
+)
+from .customer_codes import format_customer_code, next_customer_code, reserve_customer_codes
+from .customer_import import CustomerImporter, read_import_rows
+from .passwords import (
+    aauthenticate,
+    acheck_user_password,
+    check_user_password,
+    get_password_executor
+)
+from .token_claims import add_role_claims, roles_from_token
+from .token_revocation import (
+    BloomFilter,
+    TokenRevocationIndex,
+    prune_expired_tokens,
+    token_revocations
+)
+
+__all__ = [
+    'AuthPrincipal',
+    'get_auth_user',
+    'full_user',
+    'invalidate_auth_users',
+    'bump_role_set_versions',
+    'format_customer_code',
+    'next_customer_code',
+    'reserve_customer_codes',
+    'CustomerImporter',
+    'read_import_rows',
+    'aauthenticate',
+    'acheck_user_password',
+    'check_user_password',
+    'get_password_executor',
+    'add_role_claims',
+    'roles_from_token',
+    'BloomFilter',
+    'TokenRevocationIndex',
+    'prune_expired_tokens',
+    'token_revocations',
+]
@@ -0,0 +1,191 @@
+"""
+Authenticated user cache
+Every API call resolves the user behind its access token. A few fields of
+the user (identity and flags, never the password hash) and a lightweight
+principal (flags and active roles) are cached for a short time, so
+authentication and role lookups cost no queries on most requests.
+Each user also has a role set version, bumped when its roles change, that
+tells whether role claims embedded in a token are still current.
+"""
+import random
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+AUTH_USER_CACHE_PREFIX = 'auth:user:'
+ROLE_SET_VERSION_PREFIX = 'auth:role-set-version:'
+# Bump when the cached entry changes shape
+AUTH_USER_CACHE_VERSION = 2
+# User fields kept in the cache; the others are loaded on first access
+AUTH_USER_FIELDS = (
+    'id', 'email', 'username', 'first_name', 'last_name', 'user_type',
+    'is_active', 'is_staff', 'is_superuser',
+)
+
+
+@dataclass(frozen=True)
+class AuthPrincipal:
+    """Authorization attributes of a user, as sent to Cerbos"""
+    id: int
+    is_superuser: bool
+    is_staff: bool
+    user_type: str
+    email: str
+    role_ids: Tuple[int, ...] = ()
+    role_codes: Tuple[str, ...] = ()
+    cerbos_roles: Tuple[str, ...] = ()
+
+
+def auth_user_cache_key(user_id) -> str:
+    return f"{AUTH_USER_CACHE_PREFIX}{user_id}:v{AUTH_USER_CACHE_VERSION}"
+
+
+def build_principal(user) -> Tuple[AuthPrincipal, Optional[datetime]]:
+    """
+    Build the principal of a user from its active role assignments.
+
+    Returns:
+        Tuple[AuthPrincipal, Optional[datetime]]: (principal, earliest expires_at
+        of the assignments, None when none of them expires)
+    """
+    # Import here to avoid circular imports
+    from apps.permissions.services import load_role_assignments
+
+    assignments = load_role_assignments(user.pk)
+    roles = {assignment.role_id: assignment.role for assignment in assignments}
+    expirations = [assignment.expires_at for assignment in assignments if assignment.expires_at]
+
+    principal = AuthPrincipal(
+        id=user.pk,
+        is_superuser=user.is_superuser,
+        is_staff=user.is_staff,
+        user_type=user.user_type,
+        email=user.email,
+        role_ids=tuple(sorted(roles)),
+        role_codes=tuple(sorted({role.code for role in roles.values()})),
+        cerbos_roles=tuple(sorted(
+            {role.cerbos_role for role in roles.values() if role.cerbos_role}
+        )),
+    )
+    return principal, min(expirations, default=None)
+
+
+def principal_from_roles(user, roles: Dict[str, Any]) -> AuthPrincipal:
+    """Principal of a user whose roles are already known (e.g. from token claims)"""
+    return AuthPrincipal(
+        id=user.pk,
+        is_superuser=user.is_superuser,
+        is_staff=user.is_staff,
+        user_type=user.user_type,
+        email=user.email,
+        role_ids=tuple(roles['role_ids']),
+        role_codes=tuple(roles['role_codes']),
+        cerbos_roles=tuple(roles['cerbos_roles']),
+    )
+
+
+def full_user(user):
+    """
+    The given user with every field loaded.
+    Users from get_auth_user only carry AUTH_USER_FIELDS; views that serialize
+    the whole user load it with one query instead of one per deferred field.
+    """
+    if not user.get_deferred_fields():
+        return user
+    # Import here to avoid circular imports
+    from apps.users.models import User
+
+    full = User.objects.get(pk=user.pk)
+    full.auth_principal = getattr(user, 'auth_principal', None)
+    return full
+
+
+def get_auth_user(user_id, roles: Optional[Dict[str, Any]] = None, with_roles: bool = True):
+    """
+    User with the given id, with its principal in `user.auth_principal`.
+
+    Served from the cache for AUTH_USER_CACHE_TIMEOUT seconds (never past the
+    expiry of a role assignment). Returns None when the user does not exist.
+
+    Only AUTH_USER_FIELDS are loaded and cached: the password hash and
+    personal data never reach the shared cache. Other fields are deferred and
+    loaded from the database on first access (see full_user).
+
+    Args:
+        user_id: Primary key of the user
+        roles: Trusted role data ({'role_ids', 'role_codes', 'cerbos_roles'}),
+            e.g. from the claims of a current token. When given, roles are not
+            loaded from the database.
+        with_roles: False when the caller loads the roles itself (e.g. to
+            embed them in a token): no principal is built or attached.
+    """
+    # Import here to avoid circular imports
+    from apps.users.models import User
+
+    key = auth_user_cache_key(user_id)
+    timeout = settings.AUTH_USER_CACHE_TIMEOUT
+    cached = cache.get(key) if timeout > 0 else None
+
+    if cached is not None:
+        fields, principal = cached
+        # from_db() expects the values in the model's field order
+        names = [field.attname for field in User._meta.concrete_fields if field.attname in fields]
+        user = User.from_db(User.objects.db, names, [fields[name] for name in names])
+        store = False
+    else:
+        try:
+            user = User.objects.only(*AUTH_USER_FIELDS).get(pk=user_id)
+        except (User.DoesNotExist, ValueError, TypeError):
+            return None
+        principal = None
+        store = True
+
+    if roles is not None:
+        user.auth_principal = principal_from_roles(user, roles)
+    elif with_roles:
+        if principal is None:
+            # Entry cached without roles (by a request with role claims)
+            principal, expires_at = build_principal(user)
+            if expires_at is not None:
+                timeout = min(timeout, int((expires_at - timezone.now()).total_seconds()))
+            store = True
+        user.auth_principal = principal
+
+    if store and timeout > 0:
+        fields = {name: getattr(user, name) for name in AUTH_USER_FIELDS}
+        cache.set(key, (fields, principal), timeout)
+    return user
+
+
+def invalidate_auth_users(user_ids: Iterable) -> None:
+    """Drop the cached entries of the given users"""
+    keys = [auth_user_cache_key(user_id) for user_id in set(user_ids) if user_id is not None]
+    if keys:
+        cache.delete_many(keys)
+
+
+def role_set_version(user_id) -> int:
+    """
+    Current version of the user's role set.
+    A missing counter (first use or evicted) starts at a random value, so a
+    token issued before the eviction never matches by accident.
+    """
+    key = f"{ROLE_SET_VERSION_PREFIX}{user_id}"
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, random.randint(1, 2 ** 31 - 1), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_role_set_versions(user_ids: Iterable) -> None:
+    """Invalidate the role claims of tokens issued to the given users"""
+    keys = [
+        f"{ROLE_SET_VERSION_PREFIX}{user_id}" for user_id in set(user_ids) if user_id is not None
+    ]
+    if keys:
+        cache.delete_many(keys)
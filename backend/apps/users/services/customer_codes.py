@@ -0,0 +1,86 @@
+"""
+Customer code allocation
+Customer codes are 'CLI' followed by a zero-padded number (CLI000001).
+Numbers come from the PostgreSQL sequence users_customer_code_seq, so
+allocation is a single round trip and concurrent creates never collide.
+Other databases (SQLite in tests) use a row in users_codesequence.
+"""
+from typing import List
+
+from django.db import connections, router, transaction
+from django.db.models import F
+
+CUSTOMER_CODE_PREFIX = 'CLI'
+CUSTOMER_CODE_SEQUENCE = 'users_customer_code_seq'
+
+
+def format_customer_code(number: int) -> str:
+    return f"{CUSTOMER_CODE_PREFIX}{number:06d}"
+
+
+def last_customer_number(using: str = None) -> int:
+    """Highest number used by an existing customer code (seed for the counters)"""
+    # Import here to avoid circular imports
+    from apps.users.models import Customer
+
+    numbers = [0]
+    codes = Customer.objects.using(using).filter(
+        customer_code__startswith=CUSTOMER_CODE_PREFIX
+    ).values_list('customer_code', flat=True)
+    for code in codes.iterator():
+        suffix = code[len(CUSTOMER_CODE_PREFIX):]
+        if suffix.isdigit():
+            numbers.append(int(suffix))
+    return max(numbers)
+
+
+def _reserve_from_table(count: int, using: str) -> List[int]:
+    # Import here to avoid circular imports
+    from apps.users.models import CodeSequence
+
+    with transaction.atomic(using=using):
+        sequences = CodeSequence.objects.using(using)
+        if not sequences.filter(name=CUSTOMER_CODE_SEQUENCE).exists():
+            sequences.get_or_create(
+                name=CUSTOMER_CODE_SEQUENCE,
+                defaults={'last_value': last_customer_number(using)}
+            )
+        # The UPDATE takes the row lock before the new value is read
+        sequences.filter(name=CUSTOMER_CODE_SEQUENCE).update(last_value=F('last_value') + count)
+        last_value = sequences.filter(name=CUSTOMER_CODE_SEQUENCE).values_list('last_value', flat=True).get()
+    return list(range(last_value - count + 1, last_value + 1))
+
+
+def reserve_customer_numbers(count: int) -> List[int]:
+    """
+    Reserve `count` customer numbers in one round trip.
+    Numbers are unique; under concurrent reservations on PostgreSQL a block
+    may interleave with others.
+    """
+    if count <= 0:
+        return []
+
+    # Import here to avoid circular imports
+    from apps.users.models import Customer
+
+    using = router.db_for_write(Customer)
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return _reserve_from_table(count, using)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(%s) FROM generate_series(1, %s)",
+            [CUSTOMER_CODE_SEQUENCE, count]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def reserve_customer_codes(count: int) -> List[str]:
+    """Reserve a block of customer codes for bulk imports"""
+    return [format_customer_code(number) for number in reserve_customer_numbers(count)]
+
+
+def next_customer_code() -> str:
+    """Allocate one customer code"""
+    return reserve_customer_codes(1)[0]
@@ -0,0 +1,334 @@
+"""
+Bulk customer import
+Imports CSV or JSONL files in batches: rows are validated in memory,
+uniqueness is checked with one set lookup per field and batch, and users,
+customers and role assignments are inserted with bulk inserts.
+"""
+import csv
+import io
+import json
+import re
+from functools import reduce
+from operator import or_
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.contrib.auth.hashers import make_password
+from django.db import DatabaseError, connections, router, transaction
+from django.db.models import Q
+
+from .customer_codes import reserve_customer_codes
+
+IMPORT_CSV = 'csv'
+IMPORT_JSONL = 'jsonl'
+IMPORT_FORMATS = (IMPORT_CSV, IMPORT_JSONL)
+IMPORT_BATCH_SIZE = 1000
+USERNAME_LOOKUP_CHUNK = 200
+
+DUPLICATE_MESSAGES = {
+    'email': 'Este correo electrónico ya está registrado',
+    'ci': 'Esta cédula de identidad ya está registrada',
+    'tax_id': 'Este RUC/NIT ya está registrado',
+}
+
+
+def _username_bases(username: str, bases: Dict[str, Any]) -> Iterator[str]:
+    """Bases of `bases` that `username` is made of (the base plus only digits)"""
+    stem = username.rstrip('0123456789')
+    for end in range(len(stem), len(username) + 1):
+        if username[:end] in bases:
+            yield username[:end]
+
+
+def detect_import_format(filename: str) -> Optional[str]:
+    """Import format from a file name (.csv, .jsonl or .ndjson)"""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension == 'csv':
+        return IMPORT_CSV
+    if extension in ('jsonl', 'ndjson'):
+        return IMPORT_JSONL
+    return None
+
+
+def read_import_rows(stream, file_format: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Yield (row number, row) pairs from a CSV or JSONL stream.
+    Binary streams (uploaded files) are decoded as UTF-8. Empty values are
+    dropped so they are treated as missing, not as blank strings.
+    """
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if file_format == IMPORT_CSV:
+        # Row 1 is the header
+        for line_number, row in enumerate(csv.DictReader(stream), start=2):
+            yield line_number, {key.strip(): value.strip() for key, value in row.items()
+                                if key and value is not None and value.strip() != ''}
+    else:
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            if not isinstance(row, dict):
+                yield line_number, {'__invalid__': 'JSON inválido'}
+                continue
+            yield line_number, {key: value for key, value in row.items() if value not in ('', None)}
+
+
+class CustomerImporter:
+    """
+    Import customers in batches.
+
+    Per batch: one query per unique field (email, ci, tax_id), one for
+    usernames, one for the block of customer codes, and bulk inserts of
+    users_user, users_customer and RoleAssignment rows in one transaction.
+    Rows that fail validation are reported and skipped; the rest are imported.
+
+    Rows without a password get an unusable password (customers set it with
+    the password reset flow); hashing is by far the most expensive step.
+    """
+
+    def __init__(self, assigned_by=None, batch_size: int = IMPORT_BATCH_SIZE):
+        # Import here to avoid circular imports
+        from apps.users.models import Customer, User
+
+        self.User = User
+        self.Customer = Customer
+        self.assigned_by = assigned_by
+        self.batch_size = batch_size
+        self.customer_fields = [
+            field for field in Customer._meta.local_concrete_fields
+            if not field.primary_key
+        ]
+        self.customer_field_names = {field.name for field in self.customer_fields}
+        self.role = self._get_default_role()
+
+        # Values imported from earlier batches: {field: {value: row number}}
+        self._seen = {field: {} for field in DUPLICATE_MESSAGES}
+
+        self.total = 0
+        self.created = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def _get_default_role():
+        """Same role CustomerCreateSerializer assigns: customer, else basic_user"""
+        # Import here to avoid circular imports
+        from apps.permissions.models import Role
+
+        roles = {
+            role.code: role
+            for role in Role.objects.filter(code__in=['customer', 'basic_user'], is_system=True)
+        }
+        return roles.get('customer') or roles.get('basic_user')
+
+    def run(self, rows: Iterable[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Import all rows.
+
+        Returns:
+            Dict: {'total', 'created', 'failed', 'errors': [{'row', 'errors'}]}
+        """
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+        return self.result()
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            'total': self.total,
+            'created': self.created,
+            'failed': len(self.errors),
+            'errors': sorted(self.errors, key=lambda error: error['row']),
+        }
+
+    def _error(self, line_number: int, errors: Dict[str, Any]) -> None:
+        self.errors.append({'row': line_number, 'errors': errors})
+
+    def import_batch(self, batch: List[Tuple[int, Dict[str, Any]]]) -> None:
+        # Import here to avoid circular imports
+        from apps.users.serializers import CustomerImportSerializer
+
+        self.total += len(batch)
+        valid = []
+        for line_number, row in batch:
+            if '__invalid__' in row:
+                self._error(line_number, {'non_field_errors': [row['__invalid__']]})
+                continue
+            serializer = CustomerImportSerializer(data=row)
+            if not serializer.is_valid():
+                self._error(line_number, serializer.errors)
+                continue
+            data = dict(serializer.validated_data)
+            data['email'] = self.User.objects.normalize_email(data['email'])
+            valid.append((line_number, data))
+
+        valid, seen = self._check_unique(valid)
+        if not valid:
+            return
+
+        usernames = self._allocate_usernames([data['email'] for _, data in valid])
+        codes = reserve_customer_codes(len(valid))
+
+        try:
+            with transaction.atomic(using=router.db_for_write(self.Customer)):
+                self._insert(valid, usernames, codes)
+        except DatabaseError as e:
+            # Concurrent writes (e.g. the same email created meanwhile): the batch is rolled back
+            for line_number, _ in valid:
+                self._error(line_number, {'non_field_errors': [f'Error al guardar el lote: {e}']})
+            return
+
+        # Only rows that were actually imported make later rows duplicates
+        for field, values in seen.items():
+            self._seen[field].update(values)
+        self.created += len(valid)
+
+    def _check_unique(self, valid: List[Tuple[int, Dict[str, Any]]]):
+        """
+        Drop rows whose email, ci or tax_id exists in the database or earlier in the file.
+
+        Returns:
+            Tuple[List, Dict]: (unique rows, their values {field: {value: row number}},
+            to be remembered once the batch is committed)
+        """
+        values = {
+            field: {data[field] for _, data in valid if data.get(field)}
+            for field in DUPLICATE_MESSAGES
+        }
+        users = self.User.objects
+        existing = {
+            'email': set(users.filter(email__in=values['email']).values_list('email', flat=True)),
+            'ci': set(users.filter(ci__in=values['ci']).values_list('ci', flat=True)),
+            'tax_id': set(
+                self.Customer.objects.filter(tax_id__in=values['tax_id'])
+                .values_list('tax_id', flat=True)
+            ),
+        }
+
+        unique = []
+        seen = {field: {} for field in DUPLICATE_MESSAGES}
+        for line_number, data in valid:
+            errors = {}
+            for field, message in DUPLICATE_MESSAGES.items():
+                value = data.get(field)
+                if not value:
+                    continue
+                if value in existing[field]:
+                    errors[field] = [message]
+                elif value in self._seen[field] or value in seen[field]:
+                    first = self._seen[field].get(value) or seen[field][value]
+                    errors[field] = [f'Duplicado en el archivo (fila {first})']
+            if errors:
+                self._error(line_number, errors)
+                continue
+            for field in DUPLICATE_MESSAGES:
+                if data.get(field):
+                    seen[field][data[field]] = line_number
+            unique.append((line_number, data))
+        return unique, seen
+
+    def _allocate_usernames(self, emails: List[str]) -> List[str]:
+        """
+        Email local part, with the next free numeric suffix when taken (as
+        UserManager.generate_username). Only usernames of the exact form
+        base<digits> are loaded, with one query per chunk of bases; earlier
+        batches are already committed, so the database sees them.
+        """
+        # Import here to avoid circular imports
+        from apps.users.models.user import USERNAME_SUFFIX_DIGITS
+
+        bases = [email.split('@')[0] for email in emails]
+        unique_bases = sorted(set(bases))
+        # base -> highest numeric suffix in use (-1: only the base itself, None: free)
+        taken: Dict[str, Optional[int]] = dict.fromkeys(unique_bases)
+        # Chunked to keep the OR expression within database limits
+        for start in range(0, len(unique_bases), USERNAME_LOOKUP_CHUNK):
+            chunk = unique_bases[start:start + USERNAME_LOOKUP_CHUNK]
+            in_range = reduce(or_, (
+                Q(username__gte=base, username__lte=base + '9' * USERNAME_SUFFIX_DIGITS)
+                for base in chunk
+            ))
+            pattern = (
+                '^(' + '|'.join(re.escape(base) for base in chunk) + ')'
+                f'[0-9]{{0,{USERNAME_SUFFIX_DIGITS}}}$'
+            )
+            # Index range scans first, the regex only checks the rows in range
+            existing = self.User.objects.filter(in_range, username__regex=pattern)
+            for username in existing.values_list('username', flat=True):
+                for base in _username_bases(username, taken):
+                    suffix = int(username[len(base):] or -1)
+                    taken[base] = suffix if taken[base] is None else max(taken[base], suffix)
+
+        usernames = []
+        used = set()
+        for base in bases:
+            suffix = taken[base]
+            # Two bases of the batch may reach the same name (ana + 12, ana1 + 2)
+            while True:
+                suffix = -1 if suffix is None else max(suffix, 0) + 1
+                username = base if suffix == -1 else f"{base}{suffix}"
+                if username not in used:
+                    break
+            taken[base] = suffix
+            used.add(username)
+            usernames.append(username)
+        return usernames
+
+    def _insert(self, valid, usernames: List[str], codes: List[str]) -> None:
+        # Import here to avoid circular imports
+        from apps.permissions.models import RoleAssignment
+
+        users = []
+        customer_values = []
+        for (_, data), username, code in zip(valid, usernames, codes):
+            password = data.pop('password', None)
+            customer_data = {
+                name: data.pop(name) for name in list(data) if name in self.customer_field_names
+            }
+            customer_data['customer_code'] = code
+            users.append(self.User(
+                username=username,
+                user_type=self.User.UserType.CUSTOMER,
+                is_staff=False,
+                password=make_password(password),  # None gives an unusable password
+                **data
+            ))
+            customer_values.append(customer_data)
+
+        self.User.objects.bulk_create(users, batch_size=self.batch_size)
+
+        # bulk_create does not support multi-table inheritance: insert the
+        # child rows directly, pointing at the users just created
+        customers = [
+            self.Customer(user_ptr_id=user.pk, **values)
+            for user, values in zip(users, customer_values)
+        ]
+        fields = [self.Customer._meta.pk] + self.customer_fields
+        using = router.db_for_write(self.Customer)
+        batch_size = min(self.batch_size, connections[using].ops.bulk_batch_size(fields, customers))
+        for start in range(0, len(customers), batch_size):
+            self.Customer._base_manager._insert(
+                customers[start:start + batch_size], fields=fields, using=using
+            )
+
+        if self.role is not None:
+            RoleAssignment.objects.bulk_create(
+                [
+                    RoleAssignment(
+                        user_id=user.pk,
+                        role=self.role,
+                        assigned_by=self.assigned_by,
+                        is_active=True
+                    )
+                    for user in users
+                ],
+                batch_size=self.batch_size
+            )
@@ -0,0 +1,104 @@
+"""
+Password verification off the request thread
+Hashing is deliberately slow and CPU bound. Verifications run in a bounded
+thread pool (the argon2, bcrypt and hashlib implementations release the GIL),
+so concurrent logins use every core without oversubscribing it, and async
+callers await the result instead of blocking the event loop.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_backends, hashers
+from django.contrib.auth.signals import user_login_failed
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_password_executor() -> ThreadPoolExecutor:
+    """Process-wide pool of PASSWORD_HASH_WORKERS threads (default: one per core)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+                    thread_name_prefix='password-hash'
+                )
+    return _executor
+
+
+def _verify(raw_password: str, encoded: str) -> Tuple[bool, Optional[str]]:
+    """
+    Check a password against its hash (pure CPU, no database access).
+
+    Returns:
+        Tuple[bool, Optional[str]]: (valid, new hash when the stored one uses
+        another hasher or other costs than the preferred hasher)
+    """
+    upgraded = []
+    valid = hashers.check_password(
+        raw_password, encoded, setter=lambda raw: upgraded.append(hashers.make_password(raw))
+    )
+    return valid, upgraded[0] if upgraded else None
+
+
+def check_user_password(user, raw_password: str) -> bool:
+    """User.check_password with the hashing done in the password pool; upgrades the hash"""
+    valid, encoded = get_password_executor().submit(_verify, raw_password, user.password).result()
+    if valid and encoded is not None:
+        user.password = encoded
+        user.save(update_fields=['password'])
+    return valid
+
+
+async def acheck_user_password(user, raw_password: str) -> bool:
+    """Async check_user_password: awaits the pool instead of blocking the event loop"""
+    valid, encoded = await asyncio.wrap_future(
+        get_password_executor().submit(_verify, raw_password, user.password)
+    )
+    if valid and encoded is not None:
+        user.password = encoded
+        await user.asave(update_fields=['password'])
+    return valid
+
+
+def hash_password(raw_password: str) -> str:
+    """make_password in the password pool"""
+    return get_password_executor().submit(hashers.make_password, raw_password).result()
+
+
+async def ahash_password(raw_password: str) -> str:
+    return await asyncio.wrap_future(
+        get_password_executor().submit(hashers.make_password, raw_password)
+    )
+
+
+async def aauthenticate(request=None, **credentials):
+    """
+    Async counterpart of django.contrib.auth.authenticate.
+
+    Backends with an aauthenticate() method (PooledModelBackend) are awaited;
+    others run in a thread. Django 5.0's own aauthenticate() runs the whole
+    sync authenticate() in the single thread-sensitive executor instead.
+    """
+    for backend in get_backends():
+        if hasattr(backend, 'aauthenticate'):
+            user = await backend.aauthenticate(request, **credentials)
+        else:
+            user = await sync_to_async(backend.authenticate)(request, **credentials)
+        if user is not None:
+            user.backend = f"{backend.__module__}.{backend.__class__.__qualname__}"
+            return user
+
+    await user_login_failed.asend(
+        sender=__name__,
+        credentials={key: value for key, value in credentials.items() if key != 'password'},
+        request=request
+    )
+    return None
@@ -0,0 +1,69 @@
+"""
+Role claims in access tokens
+Opt-in (AUTH_ROLE_CLAIMS): access tokens carry the user's active role ids,
+role codes, Cerbos roles and the version of the role set they were built
+from. While the version matches the user's current role set version, the
+roles are read from the signed token instead of the database.
+"""
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from .auth_cache import build_principal, role_set_version
+
+ROLE_IDS_CLAIM = 'role_ids'
+ROLE_CODES_CLAIM = 'roles'
+CERBOS_ROLES_CLAIM = 'cerbos_roles'
+ROLE_SET_VERSION_CLAIM = 'rsv'
+# Earliest expiry of the assignments behind the claims (epoch seconds)
+ROLES_EXPIRE_CLAIM = 'roles_exp'
+
+ROLE_CLAIMS = (ROLE_IDS_CLAIM, ROLE_CODES_CLAIM, CERBOS_ROLES_CLAIM, ROLE_SET_VERSION_CLAIM, ROLES_EXPIRE_CLAIM)
+
+
+def add_role_claims(token, user) -> None:
+    """Embed the user's current roles in a token (no-op unless AUTH_ROLE_CLAIMS)"""
+    for claim in ROLE_CLAIMS:
+        if claim in token:
+            del token[claim]
+    if not settings.AUTH_ROLE_CLAIMS:
+        return
+
+    # Read the version first: a change made while the roles are loaded bumps it
+    version = role_set_version(user.pk)
+    principal, expires_at = build_principal(user)
+
+    token[ROLE_IDS_CLAIM] = list(principal.role_ids)
+    token[ROLE_CODES_CLAIM] = list(principal.role_codes)
+    token[CERBOS_ROLES_CLAIM] = list(principal.cerbos_roles)
+    token[ROLE_SET_VERSION_CLAIM] = version
+    if expires_at is not None:
+        token[ROLES_EXPIRE_CLAIM] = int(expires_at.timestamp())
+
+
+def roles_from_token(validated_token, user_id) -> Optional[Dict[str, Any]]:
+    """
+    Roles carried by a validated token, or None when they cannot be trusted:
+    the feature is off, the token has no role claims, an assignment behind
+    them has expired, or the user's role set changed since it was issued.
+    """
+    if not settings.AUTH_ROLE_CLAIMS:
+        return None
+
+    version = validated_token.get(ROLE_SET_VERSION_CLAIM)
+    if version is None:
+        return None
+
+    roles_exp = validated_token.get(ROLES_EXPIRE_CLAIM)
+    if roles_exp is not None and roles_exp <= timezone.now().timestamp():
+        return None
+
+    if version != role_set_version(user_id):
+        return None
+
+    return {
+        'role_ids': validated_token.get(ROLE_IDS_CLAIM, []),
+        'role_codes': validated_token.get(ROLE_CODES_CLAIM, []),
+        'cerbos_roles': validated_token.get(CERBOS_ROLES_CLAIM, []),
+    }
@@ -0,0 +1,216 @@
+"""
+Refresh token revocation
+Pruning of expired rows in the simplejwt token tables, and an in-process
+index of revoked JTIs (Bloom filter plus a shared set of recent revocations)
+so that checking a refresh token rarely touches the database.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+RECENTLY_REVOKED_PREFIX = 'auth:revoked:'
+PRUNE_BATCH_SIZE = 5000
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+    No false negatives; false positives at about `error_rate` once
+    `capacity` values have been added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: str):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value: str) -> None:
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value)
+        )
+
+
+class TokenRevocationIndex:
+    """
+    Answers "is this refresh token JTI blacklisted?".
+
+    - JTIs revoked recently (in any process, when the cache is shared) are
+      kept in the cache for a short time and answer "revoked" directly.
+    - Every other JTI goes through a per-process Bloom filter of the
+      blacklist: a miss means "not revoked" without a query, a hit is
+      confirmed in the database.
+
+    The filter is built from the non-expired blacklist on first use, then
+    synced incrementally every TOKEN_REVOCATION_SYNC_INTERVAL seconds, and
+    rebuilt when it grows past its capacity. Each sync reads the rows with a
+    higher id plus the rows blacklisted in the last
+    TOKEN_REVOCATION_SYNC_OVERLAP seconds, so a row whose transaction commits
+    after one with a higher id is still picked up. With a per-process cache,
+    a token revoked in another process is only seen after that process's
+    next sync.
+    """
+
+    def __init__(
+        self,
+        capacity: Optional[int] = None,
+        error_rate: Optional[float] = None,
+        sync_interval: Optional[float] = None
+    ):
+        self.capacity = capacity or settings.TOKEN_REVOCATION_CAPACITY
+        self.error_rate = error_rate or settings.TOKEN_REVOCATION_ERROR_RATE
+        if sync_interval is None:
+            sync_interval = settings.TOKEN_REVOCATION_SYNC_INTERVAL
+        self.sync_interval = sync_interval
+        self.sync_overlap = timedelta(seconds=settings.TOKEN_REVOCATION_SYNC_OVERLAP)
+        self._bloom: Optional[BloomFilter] = None
+        self._last_id = 0
+        # Rows of the overlap window already in the filter, by id
+        self._window: Dict[int, datetime] = {}
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+        self.db_checks = 0
+
+    @property
+    def recent_timeout(self) -> int:
+        """Long enough for every process to have synced the revocation"""
+        return max(60, int(self.sync_interval * 4))
+
+    def is_revoked(self, jti: str) -> bool:
+        # Import here to avoid circular imports
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+        if cache.get(f"{RECENTLY_REVOKED_PREFIX}{jti}"):
+            return True
+        self.sync()
+        if jti not in self._bloom:
+            return False
+        self.db_checks += 1
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+    def add(self, jti: str) -> None:
+        """Record a JTI that was just blacklisted"""
+        cache.set(f"{RECENTLY_REVOKED_PREFIX}{jti}", True, self.recent_timeout)
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+    def sync(self, force: bool = False) -> None:
+        fresh = time.monotonic() - self._synced_at < self.sync_interval
+        if not force and self._bloom is not None and fresh:
+            return
+        with self._lock:
+            since = timezone.now() - self.sync_overlap
+            if self._bloom is None or self._bloom.count > self._bloom.capacity:
+                self._rebuild(since)
+            else:
+                self._sync_new(since)
+            self._window = {
+                row_id: blacklisted_at for row_id, blacklisted_at in self._window.items()
+                if blacklisted_at >= since
+            }
+            self._synced_at = time.monotonic()
+
+    def _rebuild(self, since: datetime) -> None:
+        # Import here to avoid circular imports
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+        last_id = BlacklistedToken.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+        # Expired tokens fail validation before the blacklist is checked
+        active = BlacklistedToken.objects.filter(
+            id__lte=last_id, token__expires_at__gt=timezone.now()
+        )
+        bloom = BloomFilter(max(self.capacity, active.count() * 2), self.error_rate)
+        self._window = {}
+        rows = active.values_list('id', 'token__jti', 'blacklisted_at')
+        for row_id, jti, blacklisted_at in rows.iterator(chunk_size=10000):
+            bloom.add(jti)
+            if blacklisted_at >= since:
+                self._window[row_id] = blacklisted_at
+        self._bloom = bloom
+        self._last_id = last_id
+
+    def _sync_new(self, since: datetime) -> None:
+        # Import here to avoid circular imports
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+        rows = (
+            BlacklistedToken.objects
+            .filter(Q(id__gt=self._last_id) | Q(blacklisted_at__gte=since))
+            .order_by('id')
+            .values_list('id', 'token__jti', 'blacklisted_at')
+        )
+        for row_id, jti, blacklisted_at in rows.iterator(chunk_size=10000):
+            if row_id in self._window:
+                continue
+            self._bloom.add(jti)
+            self._window[row_id] = blacklisted_at
+            self._last_id = max(self._last_id, row_id)
+
+    def stats(self) -> Dict[str, object]:
+        bloom = self._bloom
+        return {
+            'entries': bloom.count if bloom else 0,
+            'capacity': bloom.capacity if bloom else self.capacity,
+            'size_bytes': len(bloom.bits) if bloom else 0,
+            'hashes': bloom.hashes if bloom else 0,
+            'last_id': self._last_id,
+            'db_checks': self.db_checks,
+        }
+
+
+token_revocations = TokenRevocationIndex()
+
+
+def prune_expired_tokens(batch_size: int = PRUNE_BATCH_SIZE, pause: float = 0, now=None):
+    """
+    Delete expired outstanding tokens (and their blacklist rows) in batches.
+
+    Each batch is its own short transaction over at most `batch_size` rows
+    picked by primary key, so locks are held briefly and replicas keep up;
+    `pause` seconds are slept between batches.
+
+    Yields:
+        int: rows of token_blacklist_outstandingtoken deleted per batch
+    """
+    # Import here to avoid circular imports
+    from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+    now = now or timezone.now()
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=now)
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        with transaction.atomic():
+            # Blacklist rows are removed with them (CASCADE, as one DELETE ... IN)
+            OutstandingToken.objects.filter(id__in=ids).delete()
+        yield len(ids)
+        if pause:
+            time.sleep(pause)
@@ -0,0 +1,48 @@
+"""
+Signal handlers for the users app
+Keep the authenticated user cache and the role set versions consistent
+with users and their roles
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.permissions.models import Role, RoleAssignment
+from apps.permissions.signals import role_assignments_changed
+from apps.users.models import Customer, User
+from apps.users.services.auth_cache import bump_role_set_versions, invalidate_auth_users
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def user_changed(sender, instance, **kwargs):
+    """Profile, flags, password or activation changed"""
+    invalidate_auth_users([instance.pk])
+
+
+@receiver(post_save, sender=RoleAssignment)
+@receiver(post_delete, sender=RoleAssignment)
+def role_assignment_changed(sender, instance, **kwargs):
+    invalidate_auth_users([instance.user_id])
+    bump_role_set_versions([instance.user_id])
+
+
+@receiver(role_assignments_changed)
+def role_assignments_bulk_changed(sender, user_ids=(), **kwargs):
+    invalidate_auth_users(user_ids)
+    bump_role_set_versions(user_ids)
+
+
+@receiver(post_save, sender=Role)
+def role_changed(sender, instance, created, **kwargs):
+    """Activation or Cerbos role of a role changed: drop the entries of its holders"""
+    if created:
+        return
+    user_ids = list(
+        RoleAssignment.objects.filter(role_id=instance.pk)
+        .values_list('user_id', flat=True)
+        .distinct()
+    )
+    invalidate_auth_users(user_ids)
+    bump_role_set_versions(user_ids)
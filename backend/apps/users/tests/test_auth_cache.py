@@ -0,0 +1,45 @@
+"""
+Tests for the authenticated user cache
+"""
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.users.models import User
+from apps.users.services import full_user, get_auth_user
+from apps.users.services.auth_cache import AUTH_USER_FIELDS, auth_user_cache_key
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_cached_entry_has_no_password_hash():
+    user = User.objects.create_user(email='ana@example.com', password='secreto', phone='0991234567')
+    get_auth_user(user.pk)
+
+    fields, principal = cache.get(auth_user_cache_key(user.pk))
+    assert set(fields) == set(AUTH_USER_FIELDS)
+    assert 'password' not in fields
+    assert principal.email == 'ana@example.com'
+
+
+@pytest.mark.django_db
+def test_cached_user_is_rebuilt_without_queries():
+    user = User.objects.create_user(email='ana@example.com', password='secreto', phone='0991234567')
+    get_auth_user(user.pk)
+
+    with CaptureQueriesContext(connection) as queries:
+        cached = get_auth_user(user.pk)
+        assert (cached.pk, cached.email, cached.is_active) == (user.pk, 'ana@example.com', True)
+        assert cached.auth_principal.id == user.pk
+    assert len(queries) == 0
+
+    # Fields outside the cache are still readable, from the database
+    assert cached.check_password('secreto')
+    assert full_user(cached).phone == '0991234567'
@@ -0,0 +1,74 @@
+"""
+Tests for the bulk customer importer
+"""
+from unittest import mock
+
+import pytest
+from django.db import DatabaseError
+
+from apps.users.models import Customer, User
+from apps.users.services import CustomerImporter
+
+
+def rows(*emails):
+    return [
+        (number, {'email': email, 'first_name': 'Ana', 'last_name': 'Pérez'})
+        for number, email in enumerate(emails, start=2)
+    ]
+
+
+@pytest.mark.django_db
+def test_usernames_continue_after_the_highest_suffix():
+    # Suffixes longer than a BigInteger holds are not numbered usernames
+    for username in ('ana', 'ana7', 'anabel', 'ana1x', 'ana' + '9' * 19):
+        User.objects.create_user(email=f'{username}@old.com')
+
+    result = CustomerImporter().run(rows('ana@a.com', 'ana@b.com', 'anabel@c.com', 'luis@d.com'))
+
+    assert result['created'] == 4
+    usernames = dict(User.objects.filter(email__in=[
+        'ana@a.com', 'ana@b.com', 'anabel@c.com', 'luis@d.com'
+    ]).values_list('email', 'username'))
+    assert usernames == {
+        'ana@a.com': 'ana8',
+        'ana@b.com': 'ana9',
+        'anabel@c.com': 'anabel1',
+        'luis@d.com': 'luis',
+    }
+    assert User.objects.generate_username('ana') == 'ana10'
+
+
+@pytest.mark.django_db
+def test_customer_code_in_the_file_is_rejected():
+    imported = rows('ana@a.com', 'luis@b.com')
+    imported[0][1]['customer_code'] = 'CLI-9999'
+    imported[1][1]['customer_code'] = ''
+
+    result = CustomerImporter().run(imported)
+
+    assert (result['created'], result['failed']) == (1, 1)
+    assert result['errors'] == [{
+        'row': 2,
+        'errors': {'customer_code': ['El código de cliente se asigna automáticamente']},
+    }]
+    assert not Customer.objects.filter(customer_code='CLI-9999').exists()
+
+
+@pytest.mark.django_db
+def test_rolled_back_batch_is_not_remembered():
+    importer = CustomerImporter(batch_size=2)
+    insert = importer._insert
+    failures = [DatabaseError('conflicto')]
+
+    def insert_failing_once(*args):
+        if failures:
+            raise failures.pop()
+        return insert(*args)
+
+    with mock.patch.object(importer, '_insert', side_effect=insert_failing_once):
+        # The first batch fails; the same emails in the next batch are imported
+        result = importer.run(rows('ana@a.com', 'luis@b.com', 'ana@a.com', 'luis@b.com'))
+
+    assert (result['created'], result['failed']) == (2, 2)
+    assert [error['row'] for error in result['errors']] == [2, 3]
+    assert set(Customer.objects.values_list('username', flat=True)) == {'ana', 'luis'}
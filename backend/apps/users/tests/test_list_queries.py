@@ -0,0 +1,58 @@
+"""
+The user and customer lists run a fixed number of queries per page:
+roles, assignments and related objects are prefetched, never loaded per row.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.permissions.models import Role, RoleAssignment
+from apps.users.models import Customer, User
+
+
+@pytest.fixture
+def client():
+    superuser = User.objects.create_superuser(email='root@example.com', password='secreto')
+    client = APIClient()
+    client.force_authenticate(superuser)
+    return client
+
+
+@pytest.fixture
+def customers():
+    roles = [
+        Role.objects.create(code='cliente', name='Cliente', cerbos_role='customer'),
+        Role.objects.create(code='mayorista', name='Mayorista', cerbos_role='customer'),
+    ]
+    customers = []
+    for i in range(12):
+        customer = Customer.objects.create(
+            email=f'cliente{i}@example.com',
+            first_name='Cliente',
+            last_name=str(i)
+        )
+        for role in roles:
+            RoleAssignment.objects.create(user=customer, role=role)
+        customers.append(customer)
+    return customers
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200, response.content
+    return len(queries), len(response.data['results'])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', ['/api/users/?count=exact', '/api/customers/?count=exact'])
+def test_list_queries_do_not_grow_with_page_size(client, customers, url):
+    # Warm up per-process caches (content types, policies) outside the measurement
+    client.get(f'{url}&page_size=1')
+
+    small_queries, small_rows = count_queries(client, f'{url}&page_size=2')
+    large_queries, large_rows = count_queries(client, f'{url}&page_size=10')
+
+    assert (small_rows, large_rows) == (2, 10)
+    assert small_queries == large_queries
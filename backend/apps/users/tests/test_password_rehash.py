@@ -0,0 +1,65 @@
+"""
+Tests for password hash upgrades on login (PooledModelBackend)
+"""
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import identify_hasher
+from rest_framework.test import APIClient
+
+from apps.users.models import User
+from apps.users.services import aauthenticate
+
+PBKDF2 = 'apps.users.hashers.PBKDF2PasswordHasher'
+MD5 = 'django.contrib.auth.hashers.MD5PasswordHasher'
+
+
+@pytest.fixture
+def md5_user(settings):
+    settings.PASSWORD_HASHERS = [MD5]
+    user = User.objects.create_user(email='ana@example.com', password='secreto')
+    assert user.password.startswith('md5$')
+    return user
+
+
+def login(email, password):
+    return APIClient().post(
+        '/api/auth/login/', {'email': email, 'password': password}, format='json'
+    )
+
+
+@pytest.mark.django_db
+def test_login_rehashes_with_the_new_hasher(settings, md5_user):
+    settings.PASSWORD_HASHERS = [PBKDF2, MD5]
+    settings.PBKDF2_ITERATIONS = 1000
+
+    assert login('ana@example.com', 'secreto').status_code == 200
+
+    md5_user.refresh_from_db()
+    assert md5_user.password.startswith('pbkdf2_sha256$1000$')
+    assert md5_user.check_password('secreto')
+
+
+@pytest.mark.django_db
+def test_login_rehashes_when_the_cost_changes(settings, md5_user):
+    settings.PASSWORD_HASHERS = [PBKDF2]
+    settings.PBKDF2_ITERATIONS = 1000
+    md5_user.set_password('secreto')
+    md5_user.save()
+
+    settings.PBKDF2_ITERATIONS = 2000
+    assert async_to_sync(aauthenticate)(email='ana@example.com', password='secreto') == md5_user
+
+    md5_user.refresh_from_db()
+    assert identify_hasher(md5_user.password).safe_summary(md5_user.password)['iterations'] == 2000
+
+
+@pytest.mark.django_db
+def test_failed_login_keeps_the_old_hash(settings, md5_user):
+    settings.PASSWORD_HASHERS = [PBKDF2, MD5]
+    settings.PBKDF2_ITERATIONS = 1000
+    old_hash = md5_user.password
+
+    assert login('ana@example.com', 'incorrecta').status_code != 200
+
+    md5_user.refresh_from_db()
+    assert md5_user.password == old_hash
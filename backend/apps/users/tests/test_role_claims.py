@@ -0,0 +1,89 @@
+"""
+Tests for role claims in access tokens (AUTH_ROLE_CLAIMS)
+"""
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.permissions.models import Role, RoleAssignment
+from apps.users.authentication import CachedJWTAuthentication
+from apps.users.models import User
+from apps.users.services import auth_cache, roles_from_token
+
+
+@pytest.fixture(autouse=True)
+def role_claims(settings):
+    settings.AUTH_ROLE_CLAIMS = True
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def user():
+    user = User.objects.create_user(email='vendedor@example.com', password='secreto')
+    role = Role.objects.create(code='vendedor', name='Vendedor', cerbos_role='sales')
+    RoleAssignment.objects.create(user=user, role=role)
+    return user
+
+
+def login(user):
+    response = APIClient().post(
+        '/api/auth/login/', {'email': user.email, 'password': 'secreto'}, format='json'
+    )
+    assert response.status_code == 200, response.content
+    return response.data
+
+
+def refresh(tokens):
+    response = APIClient().post('/api/auth/refresh/', {'refresh': tokens['refresh']}, format='json')
+    assert response.status_code == 200, response.content
+    return AccessToken(response.data['access'])
+
+
+def principal_of(access):
+    return CachedJWTAuthentication().get_user(AccessToken(access)).auth_principal
+
+
+@pytest.mark.django_db
+def test_access_token_carries_current_roles(user):
+    access = AccessToken(login(user)['access'])
+
+    assert access['roles'] == ['vendedor']
+    assert access['cerbos_roles'] == ['sales']
+    assert roles_from_token(access, user.pk)['role_codes'] == ['vendedor']
+
+
+@pytest.mark.django_db
+def test_role_change_invalidates_claims(user):
+    tokens = login(user)
+    bodega = Role.objects.create(code='bodega', name='Bodega', cerbos_role='warehouse')
+    RoleAssignment.objects.create(user=user, role=bodega)
+
+    # The claims are no longer trusted: roles come from the database
+    assert roles_from_token(AccessToken(tokens['access']), user.pk) is None
+    assert principal_of(tokens['access']).role_codes == ('bodega', 'vendedor')
+
+    # Deactivating a role of the user invalidates them as well
+    access = refresh(tokens)
+    assert access['roles'] == ['bodega', 'vendedor']
+    bodega.is_active = False
+    bodega.save()
+    assert roles_from_token(access, user.pk) is None
+
+
+@pytest.mark.django_db
+def test_refresh_loads_roles_once(user):
+    tokens = login(user)
+    cache.clear()
+
+    spy = mock.Mock(wraps=auth_cache.build_principal)
+    with mock.patch.object(auth_cache, 'build_principal', spy), \
+            mock.patch('apps.users.services.token_claims.build_principal', spy):
+        access = refresh(tokens)
+
+    assert spy.call_count == 1
+    assert access['roles'] == ['vendedor']
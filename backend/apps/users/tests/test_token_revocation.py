@@ -0,0 +1,97 @@
+"""
+Tests for refresh token revocation through the revocation index
+"""
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from apps.users.models import User
+from apps.users.services import TokenRevocationIndex
+from apps.users.tokens import IndexedRefreshToken
+
+
+@pytest.fixture
+def revocations(monkeypatch):
+    """A fresh index for this process, in place of the module singleton"""
+    cache.clear()
+    index = TokenRevocationIndex(capacity=1000, sync_interval=0)
+    monkeypatch.setattr('apps.users.tokens.token_revocations', index)
+    yield index
+    cache.clear()
+
+
+def post(client, url, refresh):
+    return client.post(url, {'refresh': str(refresh)}, format='json').status_code
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(email='ana@example.com', password='secreto')
+
+
+@pytest.mark.django_db
+def test_rotated_refresh_token_is_rejected(revocations, user):
+    old = IndexedRefreshToken.for_user(user)
+    # Rotation issues a new token and blacklists the old one (BLACKLIST_AFTER_ROTATION)
+    new = IndexedRefreshToken.for_user(user)
+    old.blacklist()
+
+    with pytest.raises(TokenError):
+        IndexedRefreshToken(str(old))
+    IndexedRefreshToken(str(new))
+
+    client = APIClient()
+    assert post(client, '/api/auth/refresh/', old) == 401
+    assert post(client, '/api/auth/refresh/', new) == 200
+
+
+@pytest.mark.django_db
+def test_revocation_seen_by_another_process_through_the_bloom_filter(revocations, user):
+    revoked = IndexedRefreshToken.for_user(user)
+    valid = IndexedRefreshToken.for_user(user)
+    revoked.blacklist()
+
+    # Another process: no recent revocation in its cache, only the database
+    cache.clear()
+    other = TokenRevocationIndex(capacity=1000, sync_interval=0)
+
+    assert other.is_revoked(valid[api_settings.JTI_CLAIM]) is False
+    assert other.stats()['db_checks'] == 0
+    assert other.is_revoked(revoked[api_settings.JTI_CLAIM]) is True
+    assert other.stats()['db_checks'] == 1
+
+
+@pytest.mark.django_db
+def test_blacklist_row_committed_out_of_id_order_is_synced(revocations, user):
+    late = IndexedRefreshToken.for_user(user)
+    early = IndexedRefreshToken.for_user(user)
+    BlacklistedToken.objects.create(
+        id=10, token=OutstandingToken.objects.get(jti=early[api_settings.JTI_CLAIM])
+    )
+    revocations.sync(force=True)
+    assert revocations.stats()['last_id'] == 10
+
+    # A transaction that took id 5 commits after the sync above
+    BlacklistedToken.objects.create(
+        id=5, token=OutstandingToken.objects.get(jti=late[api_settings.JTI_CLAIM])
+    )
+    cache.clear()
+
+    assert revocations.is_revoked(late[api_settings.JTI_CLAIM]) is True
+    # Rows already read are not added to the filter again
+    revocations.sync(force=True)
+    assert revocations.stats()['entries'] == 2
+
+
+@pytest.mark.django_db
+def test_logout_revokes_the_refresh_token(revocations, user):
+    refresh = IndexedRefreshToken.for_user(user)
+    client = APIClient()
+    client.force_authenticate(user)
+
+    assert post(client, '/api/auth/logout/', refresh) == 200
+    assert revocations.is_revoked(refresh[api_settings.JTI_CLAIM])
+    assert post(client, '/api/auth/refresh/', refresh) == 401
@@ -0,0 +1,25 @@
+"""
+JWT token classes
+"""
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.users.services.token_revocation import token_revocations
+
+
+class IndexedRefreshToken(RefreshToken):
+    """
+    Refresh token whose blacklist check goes through the revocation index
+    (see apps.users.services.token_revocation) instead of a query per check.
+    """
+
+    def check_blacklist(self) -> None:
+        if token_revocations.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        result = super().blacklist()
+        token_revocations.add(self.payload[api_settings.JTI_CLAIM])
+        return result
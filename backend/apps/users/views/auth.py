@@ -2,16 +2,20 @@
 Authentication views
 Migrated from FastAPI auth endpoints
 """
+from django.conf import settings
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.views import TokenObtainPairView
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from apps.users.serializers import LoginSerializer, CustomTokenObtainPairSerializer
 from apps.users.models import User
+from apps.users.services import add_role_claims, get_auth_user
+from apps.users.tokens import IndexedRefreshToken
 
 
 class LoginView(TokenObtainPairView):
@@ -82,7 +86,7 @@ class LogoutView(APIView):
         try:
             refresh_token = request.data.get('refresh')
             if refresh_token:
-                token = RefreshToken(refresh_token)
+                token = IndexedRefreshToken(refresh_token)
                 token.blacklist()
 
             return Response({
@@ -140,9 +144,17 @@ class RefreshTokenView(APIView):
                     'detail': 'Refresh token requerido'
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            token = RefreshToken(refresh_token)
+            token = IndexedRefreshToken(refresh_token)
+            access = token.access_token
+            if settings.AUTH_ROLE_CLAIMS:
+                # Role claims copied from the refresh token may be stale;
+                # add_role_claims loads the current roles, once
+                user = get_auth_user(token[api_settings.USER_ID_CLAIM], with_roles=False)
+                if user is None:
+                    raise TokenError('User not found')
+                add_role_claims(access, user)
             return Response({
-                'access': str(token.access_token),
+                'access': str(access),
                 'token_type': 'bearer'
             }, status=status.HTTP_200_OK)
 
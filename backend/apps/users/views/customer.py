@@ -2,13 +2,26 @@
 Customer views with Cerbos integration
 Customers have read-only access to view their own information
 """
+import csv
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from common.utils.export import EXPORT_CSV, EXPORT_NDJSON, EXPORT_OUTPUTS, streaming_export
 from apps.users.models import Customer
+from apps.users.services.customer_import import (
+    IMPORT_CSV,
+    IMPORT_FORMATS,
+    IMPORT_JSONL,
+    CustomerImporter,
+    detect_import_format,
+    read_import_rows
+)
+from apps.permissions.models import RoleAssignment
 from apps.users.serializers import (
     CustomerSerializer,
     CustomerCreateSerializer,
@@ -28,6 +41,18 @@ class CustomerViewSet(viewsets.ModelViewSet):
     queryset = Customer.objects.all()
     permission_classes = [IsAuthenticated]
     swagger_tags = ['Customers']
+    # Rows are restricted by CerbosQueryPlanFilter using the 'customer' policy
+    cerbos_resource_kind = 'customer'
+    # Cursor pagination unless ?page= is given (deep pages cost the same as the first)
+    keyset_ordering = ('-created_at', '-id')
+    keyset_by_default = True
+    # Columns of /api/customers/export/
+    export_fields = (
+        'id', 'customer_code', 'customer_type', 'email', 'first_name', 'last_name',
+        'ci', 'phone', 'address', 'city', 'country', 'tax_id', 'company_name',
+        'contact_person', 'credit_limit', 'payment_terms', 'discount_percentage',
+        'is_active', 'is_active_customer', 'created_at', 'updated_at',
+    )
 
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -42,7 +67,8 @@ class CustomerViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """
-        Filter queryset based on permissions.
+        Base queryset. Visibility is decided by Cerbos: CerbosQueryPlanFilter
+        turns the 'customer' policy into a filter.
         - Admin/Staff: can see all customers
         - Customers: can only see themselves
         """
@@ -50,22 +76,20 @@ class CustomerViewSet(viewsets.ModelViewSet):
         if getattr(self, 'swagger_fake_view', False):
             return Customer.objects.none()
 
-        user = self.request.user
-
-        # Admin/Staff can see all customers
-        if user.is_superuser or user.is_staff:
-            return Customer.objects.all()
-
-        # Customers can only see themselves if they are a customer
-        try:
-            customer = Customer.objects.get(id=user.id)
-            return Customer.objects.filter(id=customer.id)
-        except Customer.DoesNotExist:
-            return Customer.objects.none()
+        # Active role assignments are loaded in one extra query for the whole page
+        return Customer.objects.prefetch_related(RoleAssignment.prefetch_active())
 
     @swagger_auto_schema(
         tags=['Gestión de clientes'],
         operation_description="Listar todos los clientes. Admin/Staff puede ver todos, clientes solo se ven a sí mismos.",
+        manual_parameters=[
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Paginación por cursor (vacío para la primera página)",
+                type=openapi.TYPE_STRING
+            )
+        ],
         responses={
             200: CustomerSerializer(many=True),
             401: "No autenticado"
@@ -75,6 +99,107 @@ class CustomerViewSet(viewsets.ModelViewSet):
         """GET /api/customers/ - List customers"""
         return super().list(request, *args, **kwargs)
 
+    @swagger_auto_schema(
+        tags=['Gestión de clientes'],
+        operation_description="Exportar clientes (streaming). Aplica los mismos filtros y permisos que el listado.",
+        manual_parameters=[
+            openapi.Parameter(
+                'output',
+                openapi.IN_QUERY,
+                description="Formato de salida: csv (por defecto) o ndjson",
+                type=openapi.TYPE_STRING,
+                enum=[EXPORT_CSV, EXPORT_NDJSON]
+            )
+        ],
+        responses={
+            200: "Archivo CSV o NDJSON",
+            400: "Formato de salida no soportado",
+            401: "No autenticado"
+        }
+    )
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        GET /api/customers/export/?output=csv|ndjson
+        Stream all customers visible to the current user.
+        """
+        output = request.query_params.get('output', EXPORT_CSV)
+        if output not in EXPORT_OUTPUTS:
+            return Response({
+                'detail': f'Formato de salida no soportado: {output}.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Same filter backends as the list (CerbosQueryPlanFilter maps export to 'list')
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        return streaming_export(queryset, self.export_fields, output=output, filename='clientes')
+
+    @swagger_auto_schema(
+        tags=['Gestión de clientes'],
+        operation_description="Importación masiva de clientes desde un archivo CSV o JSONL. Solo admin/staff.",
+        manual_parameters=[
+            openapi.Parameter(
+                'file',
+                openapi.IN_FORM,
+                description="Archivo CSV (con encabezados) o JSONL, una fila por cliente",
+                type=openapi.TYPE_FILE,
+                required=True
+            ),
+            openapi.Parameter(
+                'file_format',
+                openapi.IN_FORM,
+                description="csv o jsonl (por defecto según la extensión del archivo)",
+                type=openapi.TYPE_STRING,
+                enum=[IMPORT_CSV, IMPORT_JSONL]
+            )
+        ],
+        responses={
+            200: "Resumen de la importación con los errores por fila",
+            400: "Archivo inválido",
+            401: "No autenticado",
+            403: "Solo admin/staff puede importar clientes"
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        """
+        POST /api/customers/import/
+        Bulk create customers. Invalid rows are reported and skipped.
+        """
+        # Import here to avoid circular imports
+        from apps.permissions.services.authorization_context import get_authorization_context
+
+        if not get_authorization_context(request).check(
+            resource_type='customer',
+            resource_id='new',
+            action='create'
+        ):
+            return Response({
+                'detail': 'No tienes permiso para importar clientes. Solo admin/staff.'
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({
+                'detail': 'Se requiere un archivo.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.data.get('file_format') or detect_import_format(upload.name)
+        if file_format not in IMPORT_FORMATS:
+            return Response({
+                'detail': 'Formato no soportado. Use csv o jsonl.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        importer = CustomerImporter(assigned_by=request.user)
+        try:
+            result = importer.run(read_import_rows(upload.file, file_format))
+        except (UnicodeDecodeError, csv.Error) as e:
+            return Response({
+                'detail': f'No se pudo leer el archivo: {e}',
+                **importer.result()
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(result)
+
     @swagger_auto_schema(
         tags=['Gestión de clientes'],
         operation_description="Obtener detalles de un cliente específico.",
@@ -105,10 +230,9 @@ class CustomerViewSet(viewsets.ModelViewSet):
         Create a new customer (admin/staff only).
         """
         # Check permission with Cerbos
-        from apps.permissions.services.cerbos_client import cerbos_service
+        from apps.permissions.services.authorization_context import get_authorization_context
 
-        if not cerbos_service.check_user_permission(
-            user=request.user,
+        if not get_authorization_context(request).check(
             resource_type='customer',
             resource_id='new',
             action='create'
@@ -144,13 +268,12 @@ class CustomerViewSet(viewsets.ModelViewSet):
         Admin/Staff can update any customer.
         Customers can only update their own profile (limited fields).
         """
-        from apps.permissions.services.cerbos_client import cerbos_service
+        from apps.permissions.services.authorization_context import get_authorization_context
 
         instance = self.get_object()
 
         # Check permission with Cerbos
-        if not cerbos_service.check_user_permission(
-            user=request.user,
+        if not get_authorization_context(request).check(
             resource_type='customer',
             resource_id=str(instance.id),
             action='update'
@@ -197,13 +320,12 @@ class CustomerViewSet(viewsets.ModelViewSet):
         """
         Delete customer (admin/staff only).
         """
-        from apps.permissions.services.cerbos_client import cerbos_service
+        from apps.permissions.services.authorization_context import get_authorization_context
 
         instance = self.get_object()
 
         # Check permission with Cerbos
-        if not cerbos_service.check_user_permission(
-            user=request.user,
+        if not get_authorization_context(request).check(
             resource_type='customer',
             resource_id=str(instance.id),
             action='delete'
@@ -313,7 +435,7 @@ class CustomerViewSet(viewsets.ModelViewSet):
         Get current customer permissions.
         Customers typically have read-only access.
         """
-        from apps.permissions.services.cerbos_client import cerbos_service
+        from apps.permissions.services.authorization_context import get_authorization_context
 
         user = request.user
 
@@ -326,10 +448,10 @@ class CustomerViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_404_NOT_FOUND)
 
         # Get permissions for 'customer' resource
-        customer_perms = cerbos_service.get_user_permissions_for_resource(
-            user=user,
+        customer_perms = get_authorization_context(request).permissions_for(
             resource_type='customer',
-            resource_id=str(customer.id)
+            resource_id=str(customer.id),
+            actions=['read', 'update', 'delete']
         )
 
         return Response({
@@ -8,7 +8,11 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from common.utils.etag import conditional_response, make_etag
+from common.utils.export import EXPORT_CSV, EXPORT_NDJSON, EXPORT_OUTPUTS, streaming_export
 from apps.users.models import User
+from apps.users.services import full_user
+from apps.permissions.models import RoleAssignment
 from apps.users.serializers import (
     UserSerializer,
     UserCreateSerializer,
@@ -26,6 +30,16 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     permission_classes = [IsAuthenticated]
     swagger_tags = ['Users']
+    # Rows are restricted by CerbosQueryPlanFilter using the 'user' policy
+    cerbos_resource_kind = 'user'
+    # Cursor pagination with ?cursor=
+    keyset_ordering = ('-date_joined', '-id')
+    # Columns of /api/users/export/
+    export_fields = (
+        'id', 'email', 'username', 'first_name', 'last_name', 'ci', 'phone',
+        'city', 'country', 'user_type', 'is_active', 'is_staff', 'is_superuser',
+        'date_joined', 'last_login',
+    )
 
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -37,26 +51,28 @@ class UserViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """
-        Filter queryset based on permissions.
-        Regular users can only see themselves.
-        Superusers can see all users.
+        Base queryset. Visibility is decided by Cerbos: CerbosQueryPlanFilter
+        turns the 'user' policy into a filter (regular users only see themselves,
+        staff and superusers see all users).
         """
         # Skip permission checks during schema generation
         if getattr(self, 'swagger_fake_view', False):
             return User.objects.none()
 
-        user = self.request.user
-
-        # SIMPLIFIED: Superusers see all, regular users see only themselves
-        if user.is_superuser or user.is_staff:
-            return User.objects.all()
-
-        # Otherwise, only return the current user
-        return User.objects.filter(id=user.id)
+        # Active role assignments are loaded in one extra query for the whole page
+        return User.objects.prefetch_related(RoleAssignment.prefetch_active())
 
     @swagger_auto_schema(
         tags=['Gestión de usuarios'],
         operation_description="Listar todos los usuarios. Superadmin puede ver todos, usuarios regulares solo se ven a sí mismos.",
+        manual_parameters=[
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Paginación por cursor (vacío para la primera página)",
+                type=openapi.TYPE_STRING
+            )
+        ],
         responses={
             200: UserSerializer(many=True),
             401: "No autenticado"
@@ -66,6 +82,40 @@ class UserViewSet(viewsets.ModelViewSet):
         """GET /api/users/ - List users"""
         return super().list(request, *args, **kwargs)
 
+    @swagger_auto_schema(
+        tags=['Gestión de usuarios'],
+        operation_description="Exportar usuarios (streaming). Aplica los mismos filtros y permisos que el listado.",
+        manual_parameters=[
+            openapi.Parameter(
+                'output',
+                openapi.IN_QUERY,
+                description="Formato de salida: csv (por defecto) o ndjson",
+                type=openapi.TYPE_STRING,
+                enum=[EXPORT_CSV, EXPORT_NDJSON]
+            )
+        ],
+        responses={
+            200: "Archivo CSV o NDJSON",
+            400: "Formato de salida no soportado",
+            401: "No autenticado"
+        }
+    )
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        GET /api/users/export/?output=csv|ndjson
+        Stream all users visible to the current user.
+        """
+        output = request.query_params.get('output', EXPORT_CSV)
+        if output not in EXPORT_OUTPUTS:
+            return Response({
+                'detail': f'Formato de salida no soportado: {output}.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Same filter backends as the list (CerbosQueryPlanFilter maps export to 'list')
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        return streaming_export(queryset, self.export_fields, output=output, filename='usuarios')
+
     @swagger_auto_schema(
         tags=['Gestión de usuarios'],
         operation_description="Obtener detalles de un usuario específico.",
@@ -97,11 +147,10 @@ class UserViewSet(viewsets.ModelViewSet):
         Migrated from FastAPI POST /users endpoint.
         """
         # Import here to avoid circular imports
-        from apps.permissions.services.cerbos_client import cerbos_service
+        from apps.permissions.services.authorization_context import get_authorization_context
 
         # Check permission with Cerbos
-        if not cerbos_service.check_user_permission(
-            user=request.user,
+        if not get_authorization_context(request).check(
             resource_type='user',
             resource_id='new',
             action='create'
@@ -137,13 +186,12 @@ class UserViewSet(viewsets.ModelViewSet):
         Users can only update themselves unless they are superadmin.
         """
         # Import here to avoid circular imports
-        from apps.permissions.services.cerbos_client import cerbos_service
+        from apps.permissions.services.authorization_context import get_authorization_context
 
         instance = self.get_object()
 
         # Check permission with Cerbos
-        if not cerbos_service.check_user_permission(
-            user=request.user,
+        if not get_authorization_context(request).check(
             resource_type='user',
             resource_id=str(instance.id),
             action='update'
@@ -190,13 +238,12 @@ class UserViewSet(viewsets.ModelViewSet):
         Delete user (superadmin only).
         """
         # Import here to avoid circular imports
-        from apps.permissions.services.cerbos_client import cerbos_service
+        from apps.permissions.services.authorization_context import get_authorization_context
 
         instance = self.get_object()
 
         # Check permission with Cerbos
-        if not cerbos_service.check_user_permission(
-            user=request.user,
+        if not get_authorization_context(request).check(
             resource_type='user',
             resource_id=str(instance.id),
             action='delete'
@@ -223,7 +270,7 @@ class UserViewSet(viewsets.ModelViewSet):
         Get current user information.
         Compatible with FastAPI /users/me endpoint.
         """
-        serializer = UserSerializer(request.user)
+        serializer = UserSerializer(full_user(request.user))
         return Response(serializer.data)
 
     @swagger_auto_schema(
@@ -249,6 +296,7 @@ class UserViewSet(viewsets.ModelViewSet):
                     }
                 }
             ),
+            304: "Sin cambios desde el ETag enviado en If-None-Match",
             401: "No autenticado"
         }
     )
@@ -260,31 +308,41 @@ class UserViewSet(viewsets.ModelViewSet):
         Migrated from FastAPI endpoint.
         """
         # Import here to avoid circular imports
-        from apps.permissions.services.cerbos_client import cerbos_service
+        from apps.permissions.services.authorization_context import get_authorization_context
+        from apps.navigation.services import get_navigation_version
 
         user = request.user
+        context = get_authorization_context(request)
 
-        # Get permissions for 'user' resource
-        user_perms = cerbos_service.get_user_permissions_for_resource(
-            user=user,
-            resource_type='user',
-            resource_id='generic'
+        # Decisions depend on the principal (attributes and roles); role changes bump the version
+        etag = make_etag(
+            'user-permissions', get_navigation_version(), user.id, user.email,
+            user.is_superuser, user.is_staff, user.user_type, context.cerbos_roles
         )
 
-        return Response({
-            'user_id': user.id,
-            'email': user.email,
-            'is_superuser': user.is_superuser,
-            'permissions': {
-                'users': {
-                    'create': user_perms.get('create', False),
-                    'read': user_perms.get('read', False),
-                    'update': user_perms.get('update', False),
-                    'delete': user_perms.get('delete', False),
-                    'list': user_perms.get('list', False),
+        def build_response():
+            # Get permissions for 'user' resource
+            user_perms = context.permissions_for(
+                resource_type='user',
+                resource_id='generic'
+            )
+
+            return Response({
+                'user_id': user.id,
+                'email': user.email,
+                'is_superuser': user.is_superuser,
+                'permissions': {
+                    'users': {
+                        'create': user_perms.get('create', False),
+                        'read': user_perms.get('read', False),
+                        'update': user_perms.get('update', False),
+                        'delete': user_perms.get('delete', False),
+                        'list': user_perms.get('list', False),
+                    }
                 }
-            }
-        })
+            })
+
+        return conditional_response(request, etag, build_response)
 
     @swagger_auto_schema(
         tags=['Usuario actual'],
@@ -325,6 +383,7 @@ class UserViewSet(viewsets.ModelViewSet):
                     ]
                 }
             ),
+            304: "Sin cambios desde el ETag enviado en If-None-Match",
             401: "No autenticado"
         }
     )
@@ -335,84 +394,20 @@ class UserViewSet(viewsets.ModelViewSet):
         Get dynamic menu for current user based on their roles and assigned functions.
         Functions are grouped by categories (collapsible sections).
         """
-        user = request.user
-
-        # Import models here to avoid circular imports
-        from apps.permissions.models import RoleAssignment
-        from apps.navigation.models import Function, Category
-
-        # Get all active role assignments for the user
-        role_assignments = RoleAssignment.objects.filter(
-            user=user,
-            is_active=True,
-            role__is_active=True
-        ).select_related('role').prefetch_related('role__functions')
-
-        # Collect all unique functions from all roles
-        functions_dict = {}
-
-        for assignment in role_assignments:
-            role = assignment.role
-            for function in role.functions.filter(is_active=True):
-                if function.id not in functions_dict:
-                    functions_dict[function.id] = function
-
-        all_functions = list(functions_dict.values())
-
-        # Get all unique categories from the functions
-        category_ids = {f.category_id for f in all_functions if f.category_id}
-        categories = Category.objects.filter(id__in=category_ids, is_active=True).order_by('order', 'name')
-
-        # Build menu structure grouped by categories
-        menu = []
-
-        # 1. Add functions WITHOUT category first (root level items like "Mi Perfil")
-        root_functions = [f for f in all_functions if not f.category_id]
-        root_functions.sort(key=lambda f: (f.order, f.name))
-
-        for func in root_functions:
-            menu.append({
-                'id': func.id,
-                'name': func.name,
-                'code': func.code,
-                'url': func.url,
-                'icon': func.icon,
-                'order': func.order,
-            })
-
-        # 2. Add categories with their functions as children
-        for category in categories:
-            # Get functions belonging to this category
-            category_functions = [f for f in all_functions if f.category_id == category.id]
-            category_functions.sort(key=lambda f: (f.order, f.name))
-
-            if category_functions:  # Only add category if it has functions
-                category_item = {
-                    'id': f'cat_{category.id}',
-                    'name': category.name,
-                    'code': category.code,
-                    'icon': category.icon,
-                    'color': category.color,
-                    'order': category.order,
-                    'is_category': True,
-                    'children': [
-                        {
-                            'id': f.id,
-                            'name': f.name,
-                            'code': f.code,
-                            'url': f.url,
-                            'icon': f.icon,
-                            'order': f.order,
-                        }
-                        for f in category_functions
-                    ]
-                }
-                menu.append(category_item)
-
-        # Sort final menu by order
-        menu.sort(key=lambda x: x['order'])
-
-        return Response(menu)
+        # Import here to avoid circular imports
+        from apps.permissions.services.authorization_context import get_authorization_context
+        from apps.navigation.services import get_menu_for_roles, get_navigation_version
+
+        # Active roles come from the request authorization context (loaded once per request);
+        # the rendered menu is shared by every user with the same role set
+        role_ids = get_authorization_context(request).role_ids
+        version = get_navigation_version()
+
+        return conditional_response(
+            request,
+            make_etag('menu', version, role_ids),
+            lambda: Response(get_menu_for_roles(role_ids, version=version))
+        )
 
     @swagger_auto_schema(
         methods=['patch', 'put'],
@@ -432,7 +427,7 @@ class UserViewSet(viewsets.ModelViewSet):
         Update current user profile.
         Users can only update their own personal information.
         """
-        user = request.user
+        user = full_user(request.user)
         serializer = ProfileUpdateSerializer(
             user,
             data=request.data,
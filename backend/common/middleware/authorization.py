@@ -0,0 +1,17 @@
+"""
+Authorization context middleware
+"""
+from django.utils.deprecation import MiddlewareMixin
+
+
+class AuthorizationContextMiddleware(MiddlewareMixin):
+    """
+    Attach a lazy AuthorizationContext to every request as `request.authorization`.
+    Nothing is queried until a view, serializer or filter uses it.
+    """
+
+    def process_request(self, request):
+        # Import here to avoid loading models before the app registry is ready
+        from apps.permissions.services.authorization_context import AuthorizationContext
+
+        request.authorization = AuthorizationContext(request)
@@ -1,45 +1,111 @@
 """
 Request logging middleware
 """
+import json
 import logging
-import time
-from django.utils.deprecation import MiddlewareMixin
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from common.utils.telemetry import RequestMetrics, activate_metrics, deactivate_metrics
 
 logger = logging.getLogger('apps')
 
 
-class RequestLoggingMiddleware(MiddlewareMixin):
+@contextmanager
+def tracking(metrics: RequestMetrics):
+    """Count SQL queries (every database connection) and Cerbos calls into `metrics`"""
+    token = activate_metrics(metrics)
+    try:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(metrics.query_wrapper))
+            yield
+    finally:
+        deactivate_metrics(token)
+
+
+class RequestLoggingMiddleware:
     """
-    Middleware to log all requests and responses
+    Log one structured JSON line per request with its performance telemetry:
+    wall time, SQL query count and time (every database connection, through
+    connection.execute_wrapper), Cerbos call count and latency, timed phases
+    (serialize, render) and response size.
+
+    The same timings are sent in a Server-Timing header (REQUEST_SERVER_TIMING),
+    so browser dev tools show whether a slow call waits on SQL, authorization
+    or serialization.
+
+    Streaming responses (exports) do their work while the body is iterated:
+    the body is wrapped so those queries are counted too, and the line is
+    logged once the body is consumed, with `"streamed": true`. Their
+    Server-Timing header only covers the time before the body.
     """
 
-    def process_request(self, request):
-        """Log request information"""
-        request.start_time = time.time()
-
-        logger.info(
-            f"Request: {request.method} {request.path}",
-            extra={
-                'method': request.method,
-                'path': request.path,
-                'user': getattr(request.user, 'email', 'anonymous'),
-            }
-        )
-
-    def process_response(self, request, response):
-        """Log response information"""
-        if hasattr(request, 'start_time'):
-            duration = time.time() - request.start_time
-
-            logger.info(
-                f"Response: {request.method} {request.path} - {response.status_code} ({duration:.2f}s)",
-                extra={
-                    'method': request.method,
-                    'path': request.path,
-                    'status_code': response.status_code,
-                    'duration': duration,
-                    'user': getattr(request.user, 'email', 'anonymous'),
-                }
-            )
+    def __init__(self, get_response):
+        self.get_response = get_response
 
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        with tracking(metrics):
+            response = self.get_response(request)
+
+        if settings.REQUEST_SERVER_TIMING:
+            response['Server-Timing'] = metrics.server_timing(metrics.total)
+
+        if not response.streaming:
+            self.log(request, response, metrics, len(response.content))
+        elif response.is_async:
+            response.streaming_content = self._astream(
+                request, response, metrics, aiter(response.streaming_content)
+            )
+        else:
+            response.streaming_content = self._stream(
+                request, response, metrics, iter(response.streaming_content)
+            )
         return response
+
+    def _stream(self, request, response, metrics, content):
+        size = 0
+        try:
+            while True:
+                # Tracked per chunk: the server may do other work between chunks
+                with tracking(metrics):
+                    chunk = next(content, None)
+                if chunk is None:
+                    break
+                size += len(chunk)
+                yield chunk
+        finally:
+            self.log(request, response, metrics, size, streamed=True)
+
+    async def _astream(self, request, response, metrics, content):
+        size = 0
+        try:
+            while True:
+                with tracking(metrics):
+                    chunk = await anext(content, None)
+                if chunk is None:
+                    break
+                size += len(chunk)
+                yield chunk
+        finally:
+            self.log(request, response, metrics, size, streamed=True)
+
+    @staticmethod
+    def log(request, response, metrics: RequestMetrics, size: int, streamed: bool = False) -> None:
+        user = getattr(request, 'user', None)
+        entry = {
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'status_code': response.status_code,
+            'user': getattr(user, 'email', None) or 'anonymous',
+            'response_bytes': size,
+            **metrics.as_dict(metrics.total),
+        }
+        if streamed:
+            # Duration and queries include producing the body
+            entry['streamed'] = True
+        logger.info(json.dumps(entry), extra={'telemetry': entry})
@@ -0,0 +1,159 @@
+"""
+Count strategies for paginated lists
+An exact COUNT(*) on every list request is the most expensive part of deep
+or heavily filtered pages. These helpers provide cheaper alternatives.
+"""
+import hashlib
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.utils.functional import cached_property
+
+COUNT_EXACT = 'exact'
+COUNT_ESTIMATE = 'estimate'
+COUNT_NONE = 'none'
+COUNT_STRATEGIES = (COUNT_EXACT, COUNT_ESTIMATE, COUNT_NONE)
+
+COUNT_CACHE_PREFIX = 'pagination:count:'
+
+
+def estimate_count(queryset) -> Optional[int]:
+    """
+    Row estimate from PostgreSQL statistics (pg_class.reltuples).
+    Only valid for unfiltered querysets; returns None when no estimate applies.
+    """
+    connection = connections[queryset.db]
+    query = queryset.query
+    if connection.vendor != 'postgresql' or query.where or query.distinct or query.is_sliced:
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table]
+        )
+        row = cursor.fetchone()
+
+    # -1 (or 0) until the table has been vacuumed/analyzed
+    if row is None or row[0] <= 0:
+        return None
+    return int(row[0])
+
+
+def count_cache_key(queryset) -> Optional[str]:
+    """Cache key for the normalized query (SQL without ordering, plus params)"""
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    digest = hashlib.sha1(f"{queryset.db}:{sql}:{params!r}".encode('utf-8')).hexdigest()
+    return f"{COUNT_CACHE_PREFIX}{queryset.model._meta.label_lower}:{digest}"
+
+
+def cached_count(queryset) -> Tuple[int, bool]:
+    """
+    Exact count cached for PAGINATION_COUNT_CACHE_TIMEOUT seconds per filter set.
+
+    Returns:
+        Tuple[int, bool]: (count, exact) - exact is False when served from cache
+    """
+    key = count_cache_key(queryset)
+    if key is None:
+        return 0, True
+
+    count = cache.get(key)
+    if count is not None:
+        return count, False
+
+    count = queryset.count()
+    cache.set(key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+    return count, True
+
+
+def resolve_count(queryset, strategy: str) -> Tuple[Optional[int], bool]:
+    """
+    Count a queryset with the given strategy.
+
+    - exact: fresh COUNT(*)
+    - estimate: table statistics when unfiltered, otherwise a cached exact count
+    - none: no count
+
+    Returns:
+        Tuple[Optional[int], bool]: (count, exact)
+    """
+    if strategy == COUNT_NONE:
+        return None, False
+    if strategy == COUNT_EXACT:
+        return queryset.count(), True
+
+    estimate = estimate_count(queryset)
+    if estimate is not None:
+        return estimate, False
+    return cached_count(queryset)
+
+
+class UncountedPage(Page):
+    """Page whose paginator does not know the total count"""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class CountStrategyPaginator(Paginator):
+    """
+    Django paginator that counts with a count strategy.
+
+    Unless the count is exact, pages are fetched with one extra row to know
+    whether there is a next page, so an estimated or cached count never
+    truncates a page. With the 'none' strategy num_pages is None.
+    """
+
+    def __init__(self, object_list, per_page, count_strategy=COUNT_EXACT, **kwargs):
+        self.count_strategy = count_strategy
+        self.count_exact = False
+        super().__init__(object_list, per_page, **kwargs)
+
+    @cached_property
+    def count(self):
+        count, self.count_exact = resolve_count(self.object_list, self.count_strategy)
+        return count
+
+    @cached_property
+    def num_pages(self):
+        if self.count is None:
+            return None
+        return super().num_pages
+
+    def validate_number(self, number):
+        if self.count_strategy == COUNT_EXACT:
+            return super().validate_number(number)
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+
+    def page(self, number):
+        if self.count_strategy == COUNT_EXACT:
+            return super().page(number)
+
+        # The count is unknown, estimated or possibly stale: never slice by it
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not object_list and number > 1:
+            raise EmptyPage(self.error_messages['no_results'])
+        has_next = len(object_list) > self.per_page
+        return UncountedPage(object_list[:self.per_page], number, self, has_next)
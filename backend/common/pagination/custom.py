@@ -1,22 +1,117 @@
 """
 Custom pagination classes
 """
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 
+from common.utils.telemetry import start_timing, stop_timing
+
+from .counting import COUNT_STRATEGIES, CountStrategyPaginator
+from .keyset import KeysetPagination
+
 
 class CustomPageNumberPagination(PageNumberPagination):
     """
     Custom pagination class with configurable page size
+
+    Switches to keyset pagination when the request has `?cursor=`, or when
+    the view sets `keyset_by_default = True` and no `?page=` is given.
+    Views declare the keyset with `keyset_ordering`.
+
+    The total is computed with a count strategy chosen with
+    `?count=exact|estimate|none` (default: PAGINATION_COUNT_STRATEGY):
+    - exact: COUNT(*) on every request
+    - estimate: table statistics for unfiltered lists, otherwise an exact
+      count cached for a short time per filter set
+    - none: no count, `count` and `total_pages` are null
+    `count_exact` tells whether the count is a fresh, exact COUNT(*).
     """
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
+    keyset_class = KeysetPagination
+    django_paginator_class = CountStrategyPaginator
+    count_query_param = 'count'
+
+    def use_keyset(self, request, view=None):
+        """Whether this request is paginated with a cursor"""
+        if view is None or not getattr(view, 'keyset_ordering', None):
+            return False
+        if self.keyset_class.cursor_query_param in request.query_params:
+            return True
+        return getattr(view, 'keyset_by_default', False) and self.page_query_param not in request.query_params
+
+    def get_count_strategy(self, request, view=None):
+        strategy = request.query_params.get(self.count_query_param)
+        if strategy in COUNT_STRATEGIES:
+            return strategy
+        return getattr(view, 'count_strategy', settings.PAGINATION_COUNT_STRATEGY)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = self._paginate_queryset(queryset, request, view)
+        if page is not None:
+            # The view serializes the page before calling get_paginated_response
+            start_timing('serialize')
+        return page
+
+    def _paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request, view):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(
+            queryset,
+            page_size,
+            count_strategy=self.get_count_strategy(request, view)
+        )
+        page_number = request.query_params.get(self.page_query_param) or 1
+        if page_number in self.last_page_strings:
+            page_number = paginator.num_pages
+            if page_number is None:
+                raise NotFound(self.invalid_page_message.format(
+                    page_number='last', message='Sin conteo no hay última página'
+                ))
+
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+
+        if self.template is not None and (self.page.has_next() or self.page.has_previous()):
+            # The browsable API should display pagination controls
+            self.display_page_controls = paginator.num_pages is not None
+
+        return list(self.page)
 
     def get_paginated_response(self, data):
         """
         Custom paginated response format
         """
+        stop_timing('serialize')
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+
         response = super().get_paginated_response(data)
+        response.data['count_exact'] = self.page.paginator.count_exact
         response.data['page_size'] = self.page_size
         response.data['total_pages'] = self.page.paginator.num_pages
         return response
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count']['nullable'] = True
+        response_schema['properties']['count_exact'] = {'type': 'boolean'}
+        response_schema['properties']['page_size'] = {'type': 'integer'}
+        response_schema['properties']['total_pages'] = {'type': 'integer', 'nullable': True}
+        return response_schema
@@ -0,0 +1,184 @@
+"""
+Keyset (cursor) pagination
+Pages are fetched with a WHERE on the ordering key instead of an OFFSET, so
+a deep page costs the same as the first one.
+"""
+import base64
+import datetime
+import json
+from collections import OrderedDict
+from typing import Any, List, Optional, Sequence
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .counting import COUNT_NONE, COUNT_STRATEGIES, resolve_count
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """JSON encoder that keeps microseconds (DjangoJSONEncoder truncates to ms)"""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a composite, unique ordering key.
+
+    Views declare the key with `keyset_ordering`, e.g. ('-date_joined', '-id').
+    The last field must be unique so that the key identifies a single row.
+    The cursor is an opaque token holding the key values of the boundary row
+    and the direction; `?cursor=` (empty) starts at the first page.
+
+    The total count is not computed unless requested with `?count=exact` or
+    `?count=estimate` (see common.pagination.counting).
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    default_ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None) -> Optional[List[Any]]:
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = tuple(getattr(view, 'keyset_ordering', self.default_ordering))
+        self.base_url = request.build_absolute_uri()
+
+        position, reverse = self.decode_cursor(request)
+
+        strategy = request.query_params.get(self.count_query_param)
+        if strategy not in COUNT_STRATEGIES:
+            strategy = COUNT_NONE
+        self.count, self.count_exact = resolve_count(queryset, strategy)
+
+        ordering = self._invert(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, self._to_python(queryset.model, position)))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        # Going back always leaves a next page, coming from a cursor always leaves a previous one
+        self.has_next = has_more if not reverse else True
+        self.has_previous = has_more if reverse else position is not None
+        self.page = results
+        return results
+
+    def get_page_size(self, request) -> int:
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self._link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data) -> Response:
+        content = [
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('page_size', self.page_size),
+            ('results', data),
+        ]
+        if self.count is not None:
+            content[:0] = [('count', self.count), ('count_exact', self.count_exact)]
+        return Response(OrderedDict(content))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'description': 'Solo con ?count=exact|estimate'},
+                'count_exact': {'type': 'boolean'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'page_size': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+    # Cursor encoding
+
+    def encode_cursor(self, position: Sequence[Any], reverse: bool) -> str:
+        payload = json.dumps({'p': list(position), 'r': int(reverse)}, cls=CursorEncoder)
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request):
+        """Return (position, reverse); position is None for the first page"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position = payload['p']
+            reverse = bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def _link(self, instance, reverse: bool) -> str:
+        position = [getattr(instance, field.lstrip('-')) for field in self.ordering]
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(position, reverse))
+
+    # Keyset filtering
+
+    @staticmethod
+    def _invert(ordering: Sequence[str]) -> tuple:
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+    def _to_python(self, model, position: Sequence[Any]) -> list:
+        values = []
+        for field_name, value in zip(self.ordering, position):
+            field = model._meta.get_field(field_name.lstrip('-'))
+            try:
+                values.append(field.to_python(value))
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+        return values
+
+    @staticmethod
+    def _after(ordering: Sequence[str], values: Sequence[Any]) -> Q:
+        """
+        Rows strictly after the position in the given ordering:
+        (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... with '<' for descending keys
+        """
+        condition = None
+        equal = {}
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            step = Q(**equal, **{f'{name}__{lookup}': value})
+            condition = step if condition is None else condition | step
+            equal[name] = value
+        return condition
@@ -0,0 +1,42 @@
+"""
+ETag utilities
+Conditional GET support for endpoints whose payload can be versioned cheaply.
+"""
+import hashlib
+
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts) -> str:
+    """Build a strong, quoted ETag from the values the payload depends on"""
+    digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request, etag: str) -> bool:
+    """Whether the request's If-None-Match header matches the ETag"""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2)
+    return '*' in etags or etag in {e[2:] if e.startswith('W/') else e for e in etags}
+
+
+def conditional_response(request, etag: str, build_response) -> Response:
+    """
+    Return 304 Not Modified when the client already has this version,
+    otherwise build the response (serializers only run here) and tag it.
+    """
+    if etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = build_response()
+
+    response['ETag'] = etag
+    # Clients may store the payload but must revalidate it on every use
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
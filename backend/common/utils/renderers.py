@@ -0,0 +1,14 @@
+"""
+Renderers
+"""
+from rest_framework.renderers import JSONRenderer
+
+from .telemetry import timed
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that reports its encoding time as the 'render' phase of the request"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('render'):
+            return super().render(data, accepted_media_type, renderer_context)
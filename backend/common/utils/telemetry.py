@@ -0,0 +1,125 @@
+"""
+Per-request performance telemetry
+RequestLoggingMiddleware activates a RequestMetrics for every request; SQL
+queries, Cerbos calls and timed phases (serialization, rendering) add to it
+wherever they happen, through a context variable.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+_current_metrics: ContextVar[Optional["RequestMetrics"]] = ContextVar(
+    'request_metrics', default=None
+)
+
+
+class RequestMetrics:
+    """
+    Counters and timings of one request.
+
+    Phase timings (`timings`) are exclusive: SQL and Cerbos time spent
+    inside a phase (e.g. lazy queries while serializing) is reported under
+    db and cerbos only, so the parts never add up to more than the total.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_count = 0
+        self.db_time = 0.0
+        self.cerbos_count = 0
+        self.cerbos_time = 0.0
+        self.timings: Dict[str, float] = {}
+        self._open: Dict[str, tuple] = {}
+
+    def query_wrapper(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_count += 1
+            self.db_time += time.perf_counter() - started
+
+    def record_cerbos(self, duration: float) -> None:
+        self.cerbos_count += 1
+        self.cerbos_time += duration
+
+    def start(self, name: str) -> None:
+        self._open[name] = (time.perf_counter(), self.db_time, self.cerbos_time)
+
+    def stop(self, name: str) -> None:
+        opened = self._open.pop(name, None)
+        if opened is None:
+            return
+        started, db_time, cerbos_time = opened
+        elapsed = time.perf_counter() - started
+        nested = (self.db_time - db_time) + (self.cerbos_time - cerbos_time)
+        self.timings[name] = self.timings.get(name, 0.0) + max(elapsed - nested, 0.0)
+
+    @property
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total: float) -> str:
+        """Value of the Server-Timing header (durations in ms)"""
+        entries = [
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_count} queries"',
+            f'cerbos;dur={self.cerbos_time * 1000:.1f};desc="{self.cerbos_count} calls"',
+        ]
+        entries += [f'{name};dur={duration * 1000:.1f}' for name, duration in self.timings.items()]
+        entries.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(entries)
+
+    def as_dict(self, total: float) -> Dict[str, Any]:
+        """Durations in ms"""
+        return {
+            'duration_ms': round(total * 1000, 1),
+            'db_queries': self.db_count,
+            'db_ms': round(self.db_time * 1000, 1),
+            'cerbos_calls': self.cerbos_count,
+            'cerbos_ms': round(self.cerbos_time * 1000, 1),
+            **{f'{name}_ms': round(duration * 1000, 1) for name, duration in self.timings.items()},
+        }
+
+
+def activate_metrics(metrics: RequestMetrics):
+    """Make `metrics` the current request's metrics; returns a token for deactivate_metrics"""
+    return _current_metrics.set(metrics)
+
+
+def deactivate_metrics(token) -> None:
+    _current_metrics.reset(token)
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    return _current_metrics.get()
+
+
+def record_cerbos_call(duration: float) -> None:
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.record_cerbos(duration)
+
+
+def start_timing(name: str) -> None:
+    """Open a phase that is closed elsewhere with stop_timing (no-op outside a request)"""
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.start(name)
+
+
+def stop_timing(name: str) -> None:
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.stop(name)
+
+
+@contextmanager
+def timed(name: str):
+    """Time a phase of the current request"""
+    start_timing(name)
+    try:
+        yield
+    finally:
+        stop_timing(name)
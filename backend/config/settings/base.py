@@ -52,6 +52,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'common.middleware.authorization.AuthorizationContextMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'common.middleware.request_logging.RequestLoggingMiddleware',
@@ -107,6 +108,31 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing: 'argon2', 'bcrypt' or 'pbkdf2'. The other hashers stay enabled
+# so existing hashes keep verifying; they are rehashed with the selected hasher
+# (and its current costs) on the next successful login.
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='pbkdf2')
+_PASSWORD_HASHER_CLASSES = {
+    'argon2': 'apps.users.hashers.Argon2PasswordHasher',
+    'bcrypt': 'apps.users.hashers.BCryptSHA256PasswordHasher',
+    'pbkdf2': 'apps.users.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+ARGON2_TIME_COST = config('ARGON2_TIME_COST', default=2, cast=int)
+ARGON2_MEMORY_COST = config('ARGON2_MEMORY_COST', default=102400, cast=int)  # KiB
+ARGON2_PARALLELISM = config('ARGON2_PARALLELISM', default=8, cast=int)
+BCRYPT_ROUNDS = config('BCRYPT_ROUNDS', default=12, cast=int)
+PBKDF2_ITERATIONS = config('PBKDF2_ITERATIONS', default=720000, cast=int)
+
+# Password verification runs in a bounded thread pool (0: one thread per core)
+AUTHENTICATION_BACKENDS = ['apps.users.backends.PooledModelBackend']
+PASSWORD_HASH_WORKERS = config('PASSWORD_HASH_WORKERS', default=0, cast=int)
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
 LANGUAGE_CODE = 'es-es'
@@ -134,7 +160,7 @@ AUTH_USER_MODEL = 'users.User'
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -142,12 +168,13 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'common.pagination.custom.CustomPageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': (
+        'apps.permissions.filters.CerbosQueryPlanFilter',
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ),
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'common.utils.renderers.TimedJSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
     ),
     'EXCEPTION_HANDLER': 'common.utils.response_utils.custom_exception_handler',
@@ -178,6 +205,63 @@ CERBOS_HOST = config('CERBOS_HOST', default='localhost')
 CERBOS_HTTP_PORT = config('CERBOS_HTTP_PORT', default='3592', cast=int)
 CERBOS_GRPC_PORT = config('CERBOS_GRPC_PORT', default='3593', cast=int)
 CERBOS_GRPC_ADDRESS = f"{CERBOS_HOST}:{CERBOS_GRPC_PORT}"
+CERBOS_HTTP_ADDRESS = f"http://{CERBOS_HOST}:{CERBOS_HTTP_PORT}"
+CERBOS_TLS_VERIFY = config('CERBOS_TLS_VERIFY', default=False, cast=bool)
+
+# Deadline for every PDP request (seconds), so a slow Cerbos cannot pin workers
+CERBOS_TIMEOUT = config('CERBOS_TIMEOUT', default=0.5, cast=float)
+
+# Circuit breaker: after N consecutive PDP failures, fail fast for RESET_TIMEOUT seconds
+CERBOS_CIRCUIT_BREAKER_THRESHOLD = config('CERBOS_CIRCUIT_BREAKER_THRESHOLD', default=5, cast=int)
+CERBOS_CIRCUIT_BREAKER_RESET_TIMEOUT = config('CERBOS_CIRCUIT_BREAKER_RESET_TIMEOUT', default=30, cast=float)
+
+# Answer when Cerbos is unavailable: 'closed' (deny), 'open' (allow) or 'superuser' (only superusers)
+CERBOS_FAILURE_MODE = config('CERBOS_FAILURE_MODE', default='superuser')
+
+# In-process cache of Cerbos decisions (TTL in seconds, 0 disables the cache)
+CERBOS_DECISION_CACHE_SIZE = config('CERBOS_DECISION_CACHE_SIZE', default=10000, cast=int)
+CERBOS_DECISION_CACHE_TTL = config('CERBOS_DECISION_CACHE_TTL', default=60, cast=int)
+
+# Policy decision point: 'remote' (Cerbos PDP), 'embedded' (in-process evaluator)
+# or 'shadow' (remote is authoritative, embedded decisions are compared and logged)
+CERBOS_MODE = config('CERBOS_MODE', default='remote')
+CERBOS_POLICY_DIR = BASE_DIR / 'cerbos' / 'policies'
+
+# Cache (per-process by default, shared Redis cache in production)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'roska-default',
+    }
+}
+
+# Rendered menus are cached per role set and invalidated on navigation changes (seconds)
+NAVIGATION_MENU_CACHE_TIMEOUT = config('NAVIGATION_MENU_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Paginated list counts: 'exact', 'estimate' (table statistics or a short-lived cached
+# exact count) or 'none'. Clients can override it with ?count=
+PAGINATION_COUNT_STRATEGY = config('PAGINATION_COUNT_STRATEGY', default='estimate')
+PAGINATION_COUNT_CACHE_TIMEOUT = config('PAGINATION_COUNT_CACHE_TIMEOUT', default=30, cast=int)
+
+# Per-request timings (SQL, Cerbos, serialize, render) in a Server-Timing response header
+REQUEST_SERVER_TIMING = config('REQUEST_SERVER_TIMING', default=True, cast=bool)
+
+# Authenticated user and principal cache (seconds, 0 disables it)
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=60, cast=int)
+
+# Embed role ids, codes and Cerbos roles in access tokens (read back while the
+# user's role set version is unchanged)
+AUTH_ROLE_CLAIMS = config('AUTH_ROLE_CLAIMS', default=False, cast=bool)
+
+# Refresh token revocation index (Bloom filter of blacklisted JTIs, synced from
+# the blacklist every TOKEN_REVOCATION_SYNC_INTERVAL seconds). Prune expired
+# tokens periodically with: python manage.py prune_token_blacklist
+TOKEN_REVOCATION_CAPACITY = config('TOKEN_REVOCATION_CAPACITY', default=1000000, cast=int)
+TOKEN_REVOCATION_ERROR_RATE = config('TOKEN_REVOCATION_ERROR_RATE', default=0.01, cast=float)
+TOKEN_REVOCATION_SYNC_INTERVAL = config('TOKEN_REVOCATION_SYNC_INTERVAL', default=5, cast=float)
+# Blacklist rows newer than this are re-read on every sync; keep it above the
+# longest transaction that blacklists a token
+TOKEN_REVOCATION_SYNC_OVERLAP = config('TOKEN_REVOCATION_SYNC_OVERLAP', default=60, cast=float)
 
 # Celery Configuration (for future use)
 CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/0')
@@ -18,6 +18,9 @@ DATABASES = {
     }
 }
 
+# Evaluate Cerbos policies in-process, no PDP needed for tests
+CERBOS_MODE = 'embedded'
+
 # Email backend for testing
 EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
 
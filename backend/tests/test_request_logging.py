@@ -0,0 +1,54 @@
+"""
+Tests for RequestLoggingMiddleware
+"""
+import json
+import logging
+
+import pytest
+from rest_framework.test import APIClient
+
+from apps.users.models import Customer, User
+
+
+def logged_requests(caplog):
+    return [record.telemetry for record in caplog.records if hasattr(record, 'telemetry')]
+
+
+@pytest.fixture
+def client():
+    superuser = User.objects.create_superuser(email='root@example.com', password='secreto')
+    for i in range(3):
+        Customer.objects.create(
+            email=f'cliente{i}@example.com', first_name='Cliente', last_name=str(i)
+        )
+    client = APIClient()
+    client.force_authenticate(superuser)
+    return client
+
+
+@pytest.mark.django_db
+def test_regular_response_is_logged_with_its_size(client, caplog):
+    with caplog.at_level(logging.INFO, logger='apps'):
+        response = client.get('/api/customers/?page=1')
+
+    entry = logged_requests(caplog)[-1]
+    assert entry['response_bytes'] == len(response.content)
+    assert entry['db_queries'] > 0
+    assert 'streamed' not in entry
+    assert 'db;dur=' in response['Server-Timing']
+
+
+@pytest.mark.django_db
+def test_streamed_response_is_logged_after_the_body(client, caplog):
+    with caplog.at_level(logging.INFO, logger='apps'):
+        response = client.get('/api/customers/export/?output=ndjson')
+        assert logged_requests(caplog) == []
+
+        body = b''.join(response.streaming_content)
+
+    entry = logged_requests(caplog)[-1]
+    assert entry['streamed'] is True
+    assert entry['response_bytes'] == len(body)
+    # The export query runs while the body is iterated
+    assert entry['db_queries'] >= 1
+    assert len([json.loads(line) for line in body.decode().splitlines()]) == 3